@@ -0,0 +1,126 @@
+"""
+Пакетный расчёт кратчайших путей для всех графов из базы данных
+
+Графы читаются из таблицы graphs пачками, считаются на пуле процессов
+(shortest_paths с автоматическим выбором алгоритма), а результаты
+записываются в таблицу apsp_results одной транзакцией на пачку. Пока пул
+считает очередную пачку, предыдущая записывается в БД.
+
+Запуск: python3 batch.py [--db kurspy.db] [--workers N] [--batch 50] [--missing]
+"""
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+from database import Database
+from graph import pack_shortest_paths, shortest_paths
+
+
+def engine_label(engines):
+    """Подпись алгоритмов для отчёта: без повторов через "+"
+
+    Несвязный граф считается по компонентам, и у них алгоритмы могут
+    различаться; "-" - считать было нечего (только изолированные вершины).
+    """
+    return "+".join(dict.fromkeys(engines)) or "-"
+
+
+def analyze_graph(record):
+    """Кратчайшие пути одного графа (выполняется в процессе пула)
+
+    Returns:
+        tuple: (graph_id, engine, blob, comparisons, time_taken, error) -
+        строка для Database.save_apsp_results; engine - алгоритмы, которые
+        действительно запускались (engine_label); при цикле отрицательного
+        веса blob = None, а error - текст ошибки
+    """
+    start_time = time.perf_counter()
+    engines = []
+    try:
+        # Процесс пула не может создавать свои процессы - компоненты считаются подряд
+        paths, comparisons, _ = shortest_paths(record['matrix'], next_hop=True,
+                                               engines=engines, workers=1)
+        blob, error = pack_shortest_paths(paths), None
+    except ValueError as e:
+        blob, comparisons, error = None, 0, str(e)
+    return (record['id'], engine_label(engines), blob, comparisons,
+            time.perf_counter() - start_time, error)
+
+
+def run_batch(database, workers=None, batch_size=50, only_missing=False, on_result=None):
+    """Расчёт кратчайших путей для всех графов базы
+
+    Args:
+        database: экземпляр Database
+        workers: число процессов (по умолчанию - по числу ядер; 1 - без пула)
+        batch_size: графов в пачке чтения и в транзакции записи
+        only_missing: пропускать графы, для которых результат уже есть
+        on_result: вызывается после записи пачки для каждого графа
+            как on_result(record, row), row - результат analyze_graph
+
+    Returns:
+        dict: graphs, errors, total_time (с), compute_time (сумма времени
+        по графам, с) и graphs_per_sec
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = {'graphs': 0, 'errors': 0, 'compute_time': 0.0}
+    start_time = time.perf_counter()
+
+    def flush(batch, results):
+        database.save_apsp_results(results)
+        for record, row in zip(batch, results):
+            stats['graphs'] += 1
+            stats['errors'] += row[5] is not None
+            stats['compute_time'] += row[4]
+            if on_result is not None:
+                on_result(record, row)
+
+    batches = database.iter_graph_batches(batch_size, only_missing)
+    if workers == 1:
+        for batch in batches:
+            flush(batch, [analyze_graph(record) for record in batch])
+    else:
+        with Pool(workers) as pool:
+            # Следующая пачка уходит в пул до записи предыдущей
+            pending = None
+            for batch in batches:
+                submitted = (batch, pool.map_async(analyze_graph, batch))
+                if pending is not None:
+                    flush(pending[0], pending[1].get())
+                pending = submitted
+            if pending is not None:
+                flush(pending[0], pending[1].get())
+
+    stats['total_time'] = time.perf_counter() - start_time
+    stats['graphs_per_sec'] = (stats['graphs'] / stats['total_time']
+                               if stats['total_time'] > 0 else 0.0)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Кратчайшие пути для всех графов из БД")
+    parser.add_argument("--db", default="kurspy.db", help="файл базы данных")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов")
+    parser.add_argument("--batch", type=int, default=50, help="графов в пачке")
+    parser.add_argument("--missing", action="store_true",
+                        help="только графы без сохранённого результата")
+    parser.add_argument("--quiet", action="store_true", help="без строки на каждый граф")
+    args = parser.parse_args()
+
+    def report(record, row):
+        _, engine, _, _, time_taken, error = row
+        print(f"{record['id']:>6} {record['name'][:24]:<24} {record['vertices']:>7} "
+              f"{engine:<24} {time_taken * 1000:>10.1f} {error or ''}")
+
+    if not args.quiet:
+        print(f"{'id':>6} {'Граф':<24} {'Вершин':>7} {'Алгоритм':<24} {'Время, мс':>10}")
+    stats = run_batch(Database(args.db), args.workers, args.batch, args.missing,
+                      None if args.quiet else report)
+    print(f"\nГрафов: {stats['graphs']}, ошибок: {stats['errors']}")
+    print(f"Время: {stats['total_time']:.2f} с (в процессах: {stats['compute_time']:.2f} с), "
+          f"{stats['graphs_per_sec']:.1f} графов/с")
+
+
+if __name__ == "__main__":
+    main()
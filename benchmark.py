@@ -0,0 +1,388 @@
+"""
+Замеры производительности для KursPy
+
+Запуск: python3 benchmark.py <сценарий>
+"""
+import argparse
+import math
+import os
+import random
+import time
+import tracemalloc
+
+import graph
+
+import generators
+import layout
+import matrix
+from graph_model import Graph
+
+
+def _linear_vertex_at(positions, x, y, radius):
+    """Прежний поиск вершины по клику: перебор всех вершин"""
+    for vid, (vx, vy) in positions.items():
+        if math.sqrt((x - vx)**2 + (y - vy)**2) <= radius:
+            return vid
+    return None
+
+
+def _ijk_multiplication(A, B):
+    """Прежнее умножение: порядок i-j-k, B[k][j] читается по столбцу"""
+    C = [[0] * len(B[0]) for _ in A]
+    for i in range(len(A)):
+        for j in range(len(B[0])):
+            for k in range(len(B)):
+                C[i][j] += A[i][k] * B[k][j]
+    return C
+
+
+def bench_hit_testing(sizes=(100, 1000, 10000, 100000), clicks=200, radius=20):
+    """Задержка поиска вершины по клику: линейный перебор против сетки
+
+    Плотность вершин постоянна (площадь растёт вместе с их числом), поэтому
+    время запроса к сетке не должно зависеть от количества вершин.
+    """
+    print("=== Поиск вершины по клику ===")
+    print(f"{'Вершин':>8} {'Перебор, мкс':>14} {'Сетка, мкс':>12}")
+
+    for n in sizes:
+        rng = random.Random(n)
+        side = math.sqrt(n) * radius * 3
+        graph = Graph(cell_size=radius * 2)
+        for _ in range(n):
+            graph.add_vertex(rng.uniform(0, side), rng.uniform(0, side))
+        points = [(rng.uniform(0, side), rng.uniform(0, side)) for _ in range(clicks)]
+
+        start_time = time.perf_counter()
+        for x, y in points:
+            _linear_vertex_at(graph.positions, x, y, radius)
+        linear = (time.perf_counter() - start_time) / clicks * 1e6
+
+        start_time = time.perf_counter()
+        for x, y in points:
+            graph.vertex_at(x, y, radius)
+        grid = (time.perf_counter() - start_time) / clicks * 1e6
+
+        print(f"{n:>8} {linear:>14.1f} {grid:>12.1f}")
+
+
+def bench_generators(edges=1000000):
+    """Время генерации графа примерно с edges рёбрами каждым генератором"""
+    print("=== Генерация случайных графов ===")
+    print(f"{'Генератор':>12} {'Вершин':>8} {'Рёбер':>9} {'Время, с':>9} {'Рёбер/с':>10}")
+
+    n = edges // 5
+    cases = [
+        ("gnm", (n, edges)),
+        ("gnp", (n, 2 * edges / (n * (n - 1)))),
+        ("grid", (int(math.sqrt(edges / 2)), int(math.sqrt(edges / 2)))),
+        ("geometric", (n, math.sqrt(2 * edges / (math.pi * n * n)))),
+        ("scale_free", (n, edges // n)),
+    ]
+    for name, args in cases:
+        start_time = time.perf_counter()
+        result = generators.FAMILIES[name](*args, seed=1)
+        elapsed = time.perf_counter() - start_time
+        print(f"{name:>12} {len(result):>8} {result.edge_count:>9} {elapsed:>9.2f} "
+              f"{result.edge_count / elapsed:>10.0f}")
+
+
+def bench_layout(sizes=(100, 1000, 10000), iterations=3):
+    """Время одной итерации силовой раскладки на безмасштабных графах"""
+    print("=== Силовая раскладка ===")
+    print(f"{'Вершин':>8} {'Отталкивание':>14} {'Итерация, с':>12}")
+
+    for n in sizes:
+        edges = list(generators.barabasi_albert(n, 2, seed=n).edges())
+        if layout.np is None:
+            engine = "Барнс-Хат"
+        else:
+            engine = "NumPy, точно" if n <= layout.EXACT_LIMIT else "NumPy, Б-Х"
+        start_time = time.perf_counter()
+        layout.force_layout(n, edges, iterations=iterations, seed=1)
+        elapsed = (time.perf_counter() - start_time) / iterations
+        print(f"{n:>8} {engine:>14} {elapsed:>12.3f}")
+
+
+def bench_out_of_core(sizes=(500, 1000, 2000), block_rows=256):
+    """Флойд-Уоршелл в памяти (списки) против матрицы в файле (float32)
+
+    Для списков в памяти оценивается размер матрицы (float - 24 байта плюс
+    8 байт указателя), для файла - 4 байта на элемент на диске и два блока
+    строк в оперативной памяти.
+    """
+    print("=== Флойд-Уоршелл во внешней памяти ===")
+    print(f"{'Вершин':>8} {'Списки, МБ':>11} {'Файл, МБ':>9} {'Блоки, МБ':>10} {'Время, с':>9}")
+
+    for n in sizes:
+        edges = generators.gnm(n, 4 * n, seed=n)
+        start_time = time.perf_counter()
+        dist, _, _ = graph.floyd_warshall_mmap(n, edges, block_rows=block_rows)
+        elapsed = time.perf_counter() - start_time
+        dist.close()
+
+        lists_mb = n * n * 32 / 2 ** 20
+        file_mb = n * n * 4 / 2 ** 20
+        blocks_mb = 2 * min(block_rows, n) * n * 4 / 2 ** 20
+        print(f"{n:>8} {lists_mb:>11.1f} {file_mb:>9.1f} {blocks_mb:>10.1f} {elapsed:>9.2f}")
+
+
+def bench_components(n=600, parts=(1, 4, 12)):
+    """Полный Флойд-Уоршелл против расчёта по компонентам связности"""
+    print("=== Разбиение на компоненты связности ===")
+    print(f"{'Компонент':>10} {'Полный ФУ, с':>13} {'По компонентам, с':>18}")
+
+    for count in parts:
+        # count одинаковых случайных компонент без рёбер между ними
+        size = n // count
+        matrix = [[0] * n for _ in range(n)]
+        for c in range(count):
+            part = generators.gnm(size, size * 3, seed=c)
+            for u, v, w in part.edges():
+                matrix[c * size + u][c * size + v] = w
+                matrix[c * size + v][c * size + u] = w
+
+        backend = "numpy" if graph.np is not None else "python"
+        start_time = time.perf_counter()
+        graph.floyd_warshall(matrix, backend=backend)
+        full = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        # density_threshold=0: в каждой компоненте тоже Флойд-Уоршелл
+        graph.componentwise_shortest_paths(matrix, density_threshold=0)
+        split = time.perf_counter() - start_time
+        print(f"{count:>10} {full:>13.3f} {split:>18.3f}")
+
+
+def bench_reachability(sizes=(200, 500, 1000)):
+    """Достижимость: Флойд-Уоршелл на float против битового Уоршелла"""
+    print("=== Транзитивное замыкание ===")
+    print(f"{'Вершин':>8} {'ФУ, с':>8} {'Биты (int), с':>14} {'Биты (uint64), с':>17}")
+
+    for n in sizes:
+        matrix = generators.gnp(n, 2 / n, seed=n).to_matrix()
+        backend = "numpy" if graph.np is not None else "python"
+        start_time = time.perf_counter()
+        graph.floyd_warshall(matrix, backend=backend)
+        weighted = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        graph.transitive_closure(matrix, backend="python")
+        bits = time.perf_counter() - start_time
+
+        if graph.np is not None:
+            start_time = time.perf_counter()
+            graph.transitive_closure(matrix, backend="numpy")
+            words = f"{time.perf_counter() - start_time:>17.3f}"
+        else:
+            words = f"{'-':>17}"
+        print(f"{n:>8} {weighted:>8.3f} {bits:>14.3f} {words}")
+
+
+def bench_int_distances(sizes=(100, 300, 600)):
+    """Память и время: списки с float('inf') против DistanceMatrix (int64)"""
+    print("=== Целочисленная матрица расстояний ===")
+    print(f"{'Вершин':>8} {'Списки, с':>10} {'байт/ячейку':>12} {'int64, с':>9} {'байт/ячейку':>12}")
+
+    backend = "numpy" if graph.np is not None else "python"
+    for n in sizes:
+        matrix = generators.gnp(n, 4 / n, seed=n, max_weight=1000).to_matrix()
+        row = [f"{n:>8}"]
+        for engine in (backend, "int64"):
+            start_time = time.perf_counter()
+            graph.floyd_warshall(matrix, backend=engine)
+            elapsed = time.perf_counter() - start_time
+            # Память, которую занимает сам результат (отдельный запуск:
+            # tracemalloc замедляет выполнение)
+            tracemalloc.start()
+            dist, _, _ = graph.floyd_warshall(matrix, backend=engine)
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del dist
+            row.append(f"{elapsed:>10.3f} {size / (n * n):>12.1f}")
+        print(" ".join(row))
+
+
+def bench_oracle(small=(200, 500), large=100000, landmarks=16, queries=50):
+    """Оракул по ориентирам: точность и время против floyd_warshall,
+    затем время запроса на большом графе против полной Дейкстры"""
+    print("=== Оракул расстояний (ALT) ===")
+    print(f"{'Вершин':>8} {'ФУ, с':>8} {'Ориентиры, с':>13} {'Запрос, мс':>11} "
+          f"{'Ошибок':>7} {'Ошибка оценки':>14} {'Работа A*':>10}")
+    for n in small:
+        edges = generators.random_geometric(n, math.sqrt(8 / (math.pi * n)), seed=n)
+        report = graph.landmark_report(edges.to_matrix(), landmarks, queries, seed=n)
+        print(f"{n:>8} {report['exact_time']:>8.3f} {report['build_time']:>13.3f} "
+              f"{report['query_time'] * 1000:>11.3f} {report['mismatches']:>7} "
+              f"{report['mean_error']:>14.1%} {report['work_ratio']:>10.1%}")
+
+    side = int(math.sqrt(large))
+    edges = generators.grid(side, side, seed=1)
+    oracle = graph.LandmarkOracle(edges, landmarks, seed=1)
+    rng = random.Random(1)
+    pairs = [(rng.randrange(len(edges)), rng.randrange(len(edges))) for _ in range(queries)]
+    start_time = time.perf_counter()
+    for u, v in pairs:
+        oracle.distance(u, v)
+    astar = (time.perf_counter() - start_time) / queries
+    start_time = time.perf_counter()
+    for u, _ in pairs[:5]:
+        graph.dijkstra(oracle.adj, u)
+    plain = (time.perf_counter() - start_time) / 5
+    print(f"\nРешётка {side}×{side}: ориентиры {oracle.time_taken:.2f} с, "
+          f"запрос A* {astar * 1000:.1f} мс, Дейкстра {plain * 1000:.1f} мс")
+
+
+def bench_semiring(sizes=(100, 200, 400)):
+    """Ядро semiring_product: (+, ×) и (min, +) на списках и в NumPy,
+    кратчайшие пути возведением в квадрат против Флойда-Уоршелла"""
+    print("=== Произведение над полукольцами ===")
+    backends = ["python"] + (["numpy"] if matrix.np is not None else [])
+    header = " ".join(f"{f'{name} {b}, с':>18}" for name in ("(+,×)", "(min,+)") for b in backends)
+    print(f"{'n':>6} {header} {'APSP², с':>10} {'ФУ, с':>8}")
+
+    fw_backend = "numpy" if graph.np is not None else "python"
+    for n in sizes:
+        A = matrix.generate_matrix(n)
+        weights = generators.gnp(n, 4 / n, seed=n).to_matrix()
+        cells = []
+        for semiring in ("plus_times", "min_plus"):
+            for backend in backends:
+                start_time = time.perf_counter()
+                matrix.semiring_product(A, A, semiring, backend)
+                cells.append(f"{time.perf_counter() - start_time:>18.3f}")
+
+        start_time = time.perf_counter()
+        graph.min_plus_shortest_paths(weights)
+        squaring = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        graph.floyd_warshall(weights, backend=fw_backend)
+        reference = time.perf_counter() - start_time
+        print(f"{n:>6} {' '.join(cells)} {squaring:>10.3f} {reference:>8.3f}")
+
+
+def bench_matmul(sizes=(20, 100, 200, 500)):
+    """matrix_multiplication: эталон на Python против NumPy/BLAS"""
+    print("=== Умножение матриц ===")
+    print(f"{'n':>6} " + " ".join(f"{f'{b}, с':>10}" for b in matrix.MULTIPLY_BACKENDS))
+    for n in sizes:
+        A = matrix.generate_matrix(n)
+        B = matrix.generate_matrix(n)
+        cells = []
+        for backend in matrix.MULTIPLY_BACKENDS:
+            _, _, time_taken = matrix.matrix_multiplication(A, B, backend=backend)
+            cells.append(f"{time_taken:>10.4f}")
+        print(f"{n:>6} {' '.join(cells)}")
+
+
+def bench_kernels(sizes=(50, 100, 200, 500, 1000)):
+    """Ядра на чистом Python: прежнее i-j-k, i-k-j, transposed и tiled"""
+    print("=== Ядра умножения без NumPy ===")
+    kernels = ("python", "transposed", "tiled")
+    print(f"{'n':>6} {'i-j-k, с':>10} " + " ".join(f"{f'{k}, с':>14}" for k in kernels)
+          + f" {'ускорение':>10}")
+    for n in sizes:
+        A = matrix.generate_matrix(n)
+        B = matrix.generate_matrix(n)
+        start_time = time.perf_counter()
+        _ijk_multiplication(A, B)
+        reference = time.perf_counter() - start_time
+        timings = []
+        for kernel in kernels:
+            start_time = time.perf_counter()
+            matrix.matrix_multiplication(A, B, backend=kernel)
+            timings.append(time.perf_counter() - start_time)
+        cells = " ".join(f"{t:>14.3f}" for t in timings)
+        print(f"{n:>6} {reference:>10.3f} {cells} {reference / min(timings[1:]):>9.1f}×")
+
+
+def bench_strassen(sizes=(128, 256, 512)):
+    """Подбор порога Штрассена на этой машине и сравнение с обычным ядром"""
+    print("=== Штрассен-Виноград ===")
+    backends = ["python"] + (["numpy"] if matrix.np is not None else [])
+    for backend in backends:
+        cutoff, timings = matrix.tune_strassen_cutoff(backend=backend)
+        cells = ", ".join(f"{c}: {t:.3f} с" for c, t in timings.items())
+        print(f"{backend}: порог {cutoff} ({cells})")
+
+    print(f"{'n':>6} " + " ".join(f"{f'{b}, с':>10} {f'Штрассен {b}, с':>18}" for b in backends))
+    for n in sizes:
+        A = matrix.generate_matrix(n)
+        B = matrix.generate_matrix(n)
+        cells = []
+        for backend in backends:
+            _, _, reference = matrix.matrix_multiplication(A, B, backend=backend)
+            _, _, strassen = matrix.strassen_multiplication(A, B, backend=backend)
+            cells.append(f"{reference:>10.3f} {strassen:>18.3f}")
+        print(f"{n:>6} {' '.join(cells)}")
+
+
+def bench_parallel(sizes=None):
+    """Параллельное умножение через общую память: время и ускорение по
+    числу процессов (NumPy - 2000×2000, без него - 500×500)"""
+    print("=== Параллельное умножение ===")
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, cores} | {w for w in (4, 8, 16) if w <= cores})
+    print(f"Ядер: {cores}")
+    backend = "numpy" if matrix.np is not None else "python"
+    for n in sizes or ((2000,) if backend == "numpy" else (500,)):
+        A = matrix.generate_matrix(n)
+        B = matrix.generate_matrix(n)
+        print(f"{backend}, {n}×{n}:")
+        print(f"{'Процессов':>10} {'Время, с':>9} {'Ускорение':>10}")
+        base = None
+        for workers in counts:
+            start_time = time.perf_counter()
+            matrix.parallel_multiplication(A, B, workers, backend)
+            elapsed = time.perf_counter() - start_time
+            base = base or elapsed
+            print(f"{workers:>10} {elapsed:>9.3f} {base / elapsed:>9.2f}×")
+
+
+def bench_chain(n=200):
+    """Цепочка A·B·C·v (n×n, n×n, n×n, n×1): слева направо против плана"""
+    print("=== Цепочка умножений ===")
+    chain = [matrix.generate_matrix(n) for _ in range(3)] + [matrix.generate_matrix(n, 1)]
+    backends = ["transposed"] + (["numpy"] if matrix.np is not None else [])
+    plan = matrix.plan_chain(chain)
+    print(f"План: {plan['order']}, умножений {plan['cost']} против {plan['naive_cost']}")
+    print(f"{'Ядро':>12} {'Слева направо, с':>17} {'По плану, с':>12}")
+    for backend in backends:
+        start_time = time.perf_counter()
+        result = chain[0]
+        for M in chain[1:]:
+            result, _, _ = matrix.matrix_multiplication(result, M, backend=backend)
+        naive = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        matrix.multiply_chain(chain, backend)
+        planned = time.perf_counter() - start_time
+        print(f"{backend:>12} {naive:>17.3f} {planned:>12.3f}")
+
+
+SCENARIOS = {
+    "hit-testing": bench_hit_testing,
+    "generators": bench_generators,
+    "layout": bench_layout,
+    "out-of-core": bench_out_of_core,
+    "components": bench_components,
+    "reachability": bench_reachability,
+    "int-distances": bench_int_distances,
+    "oracle": bench_oracle,
+    "semiring": bench_semiring,
+    "matmul": bench_matmul,
+    "kernels": bench_kernels,
+    "strassen": bench_strassen,
+    "parallel": bench_parallel,
+    "chain": bench_chain,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры производительности KursPy")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS), help="сценарий замера")
+    args = parser.parse_args()
+    SCENARIOS[args.scenario]()
+
+
+if __name__ == "__main__":
+    main()
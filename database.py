@@ -3,6 +3,11 @@
 """
 import sqlite3
 import json
+import time
+
+
+# Предельный суммарный размер кэша кратчайших путей, байт
+APSP_CACHE_LIMIT = 64 * 1024 * 1024
 
 
 class Database:
@@ -59,6 +64,31 @@ class Database:
             )
         ''')
         
+        # Кэш кратчайших путей: ключ - канонический хеш матрицы смежности
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS apsp_cache (
+                hash TEXT PRIMARY KEY,
+                vertices INTEGER NOT NULL,
+                result BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        
+        # Результаты пакетного расчёта кратчайших путей (batch.py):
+        # одна строка на граф, blob - в формате pack_shortest_paths
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS apsp_results (
+                graph_id INTEGER PRIMARY KEY REFERENCES graphs(id),
+                engine TEXT NOT NULL,
+                result BLOB,
+                comparisons INTEGER NOT NULL,
+                time_taken REAL NOT NULL,
+                error TEXT,
+                computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
         conn.commit()
         conn.close()
     
@@ -107,6 +137,41 @@ class Database:
         conn.close()
         return graphs
     
+    def iter_graph_batches(self, batch_size=100, only_missing=False):
+        """Потоковое чтение графов пачками по batch_size (списки словарей)
+        
+        Каждая пачка читается отдельным коротким запросом по возрастанию
+        id, поэтому между пачками соединение закрыто и запись результатов
+        не блокируется. only_missing - только графы без строки в apsp_results.
+        """
+        missing = "AND id NOT IN (SELECT graph_id FROM apsp_results)" if only_missing else ""
+        last_id = 0
+        while True:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+                SELECT id, name, vertices, edges, matrix, created_at
+                FROM graphs
+                WHERE id > ? {missing}
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, batch_size))
+            rows = cursor.fetchall()
+            conn.close()
+            if not rows:
+                return
+            
+            yield [{
+                'id': row[0],
+                'name': row[1],
+                'vertices': row[2],
+                'edges': row[3],
+                'matrix': json.loads(row[4]),
+                'created_at': row[5]
+            } for row in rows]
+            last_id = rows[-1][0]
+    
     # ========================================================================
     # РАБОТА С МАТРИЦАМИ
     # ========================================================================
@@ -218,6 +283,136 @@ class Database:
         conn.close()
         return sorts
     
-# Глобальный экземпляр БД
-db = Database()
+    # ========================================================================
+    # КЭШ КРАТЧАЙШИХ ПУТЕЙ (LRU)
+    # ========================================================================
+    
+    def get_cached_apsp(self, key):
+        """Получить blob результата по хешу графа (None - промах)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT result FROM apsp_cache WHERE hash = ?', (key,))
+        row = cursor.fetchone()
+        if row is not None:
+            # Обращение делает запись самой свежей для вытеснения
+            cursor.execute('UPDATE apsp_cache SET last_used = ? WHERE hash = ?',
+                           (time.time(), key))
+            conn.commit()
+        
+        conn.close()
+        return row[0] if row else None
+    
+    def save_cached_apsp(self, key, vertices, blob, max_bytes=APSP_CACHE_LIMIT):
+        """Сохранить blob результата и вытеснить давно не использованные
+        записи, пока суммарный размер кэша больше max_bytes
+        
+        Returns:
+            bool: False, если blob сам больше max_bytes и не сохранён
+        """
+        if len(blob) > max_bytes:
+            return False
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO apsp_cache (hash, vertices, result, size, last_used)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (key, vertices, sqlite3.Binary(blob), len(blob), time.time()))
+        
+        cursor.execute('SELECT COALESCE(SUM(size), 0) FROM apsp_cache')
+        total = cursor.fetchone()[0]
+        if total > max_bytes:
+            cursor.execute('''
+                SELECT hash, size FROM apsp_cache
+                WHERE hash != ?
+                ORDER BY last_used, rowid
+            ''', (key,))
+            evicted = []
+            for old_key, size in cursor.fetchall():
+                if total <= max_bytes:
+                    break
+                evicted.append((old_key,))
+                total -= size
+            cursor.executemany('DELETE FROM apsp_cache WHERE hash = ?', evicted)
+        
+        conn.commit()
+        conn.close()
+        return True
+    
+    def get_apsp_cache_stats(self):
+        """Число записей и суммарный размер кэша в байтах"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM apsp_cache')
+        entries, size = cursor.fetchone()
+        
+        conn.close()
+        return {'entries': entries, 'size': size}
+    
+    def clear_apsp_cache(self):
+        """Очистить кэш кратчайших путей"""
+        conn = self.get_connection()
+        conn.execute('DELETE FROM apsp_cache')
+        conn.commit()
+        conn.close()
+    
+    # ========================================================================
+    # РЕЗУЛЬТАТЫ ПАКЕТНОГО РАСЧЁТА
+    # ========================================================================
+    
+    def save_apsp_results(self, results):
+        """Записать пачку результатов одной транзакцией
+        
+        results - кортежи (graph_id, engine, blob, comparisons, time_taken, error);
+        прежний результат для того же графа заменяется.
+        """
+        conn = self.get_connection()
+        with conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO apsp_results
+                    (graph_id, engine, result, comparisons, time_taken, error)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(graph_id, engine, sqlite3.Binary(blob) if blob is not None else None,
+                   comparisons, time_taken, error)
+                  for graph_id, engine, blob, comparisons, time_taken, error in results])
+        conn.close()
+    
+    def get_apsp_result(self, graph_id):
+        """Результат пакетного расчёта для графа (None - ещё не считался)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT engine, result, comparisons, time_taken, error, computed_at
+            FROM apsp_results
+            WHERE graph_id = ?
+        ''', (graph_id,))
+        row = cursor.fetchone()
+        
+        conn.close()
+        if row is None:
+            return None
+        return {
+            'engine': row[0],
+            'result': row[1],
+            'comparisons': row[2],
+            'time_taken': row[3],
+            'error': row[4],
+            'computed_at': row[5]
+        }
+    
+# Общий экземпляр БД приложения: создаётся при первом обращении, а не при
+# импорте модуля, чтобы тесты и batch.py не трогали kurspy.db
+_db = None
+
+
+def get_db():
+    """Общий экземпляр Database для файла kurspy.db"""
+    global _db
+    if _db is None:
+        _db = Database()
+    return _db
 
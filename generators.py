@@ -0,0 +1,235 @@
+"""
+Генераторы случайных графов без зависимости от Tkinter
+
+Все генераторы принимают seed (или готовый random.Random) и строят
+рёбра сразу в компактных массивах array за ожидаемое время O(n + m).
+"""
+import math
+import random
+from array import array
+
+
+class EdgeList:
+    """Компактный список рёбер неориентированного графа с n вершинами
+
+    Рёбра хранятся в трёх параллельных массивах sources/targets/weights.
+    len() возвращает число вершин, как у graph_model.Graph, поэтому
+    EdgeList можно передавать в shortest_paths и all_pairs_dijkstra.
+    """
+
+    def __init__(self, n, positions=None):
+        self.n = n
+        self.sources = array('l')
+        self.targets = array('l')
+        self.weights = array('q')
+        self.positions = positions  # [(x, y), ...] или None
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def edge_count(self):
+        return len(self.sources)
+
+    def append(self, u, v, weight):
+        self.sources.append(u)
+        self.targets.append(v)
+        self.weights.append(weight)
+
+    def edges(self):
+        """Итератор (u, v, вес)"""
+        return zip(self.sources, self.targets, self.weights)
+
+    def to_matrix(self):
+        """Плотная матрица смежности n×n"""
+        matrix = [[0] * self.n for _ in range(self.n)]
+        for u, v, w in self.edges():
+            matrix[u][v] = w
+            matrix[v][u] = w
+        return matrix
+
+    def to_csr(self):
+        """Экспорт (indptr, indices, weights) подсчётом степеней за O(n + m)"""
+        n = self.n
+        degree = [0] * (n + 1)
+        for u, v in zip(self.sources, self.targets):
+            degree[u + 1] += 1
+            degree[v + 1] += 1
+        for i in range(n):
+            degree[i + 1] += degree[i]
+
+        indptr = array('l', degree)
+        fill = degree[:n]
+        indices = array('l', [0]) * degree[n]
+        weights = array('q', [0]) * degree[n]
+        for u, v, w in self.edges():
+            indices[fill[u]] = v
+            weights[fill[u]] = w
+            fill[u] += 1
+            indices[fill[v]] = u
+            weights[fill[v]] = w
+            fill[v] += 1
+        return indptr, indices, weights
+
+    def to_graph(self, positions=None, cell_size=40):
+        """Построение graph_model.Graph (id вершины = индекс)"""
+        from graph_model import Graph
+
+        positions = positions or self.positions
+        graph = Graph(cell_size)
+        for i in range(self.n):
+            x, y = positions[i] if positions else (0, 0)
+            graph.add_vertex(x, y, i)
+        for u, v, w in self.edges():
+            graph.add_edge(u, v, w)
+        return graph
+
+
+def _rng(seed):
+    return seed if isinstance(seed, random.Random) else random.Random(seed)
+
+
+def _pair_from_index(k, n):
+    """Пара (i, j), i < j, с номером k в порядке (0,1), (0,2), ..., (1,2), ..."""
+    # Число пар с первой вершиной меньше i: i * (2n - i - 1) / 2
+    b = 2 * n - 1
+    i = (b - math.isqrt(b * b - 8 * k)) // 2
+    while i * (b - i) // 2 > k:
+        i -= 1
+    while (i + 1) * (b - i - 1) // 2 <= k:
+        i += 1
+    j = k - i * (b - i) // 2 + i + 1
+    return i, j
+
+
+def gnm(n, m, seed=None, min_weight=1, max_weight=10):
+    """G(n, m): ровно m различных рёбер, выбранных равновероятно
+
+    Номера рёбер выбираются random.sample без повторов, поэтому запрос
+    всегда заполняется полностью (m ограничивается числом пар n(n-1)/2).
+    """
+    rng = _rng(seed)
+    total = n * (n - 1) // 2
+    if m < 0:
+        raise ValueError("Число рёбер не может быть отрицательным")
+    m = min(m, total)
+
+    edges = EdgeList(n)
+    for k in rng.sample(range(total), m):
+        i, j = _pair_from_index(k, n)
+        edges.append(i, j, rng.randint(min_weight, max_weight))
+    return edges
+
+
+def gnp(n, p, seed=None, min_weight=1, max_weight=10):
+    """G(n, p): каждое ребро независимо с вероятностью p, O(n + m)
+
+    Пропуски между рёбрами выбираются геометрическим распределением
+    (Batagelj, Brandes), поэтому отсутствующие пары не перебираются.
+    """
+    if not 0 <= p <= 1:
+        raise ValueError("Вероятность должна быть в диапазоне [0, 1]")
+    rng = _rng(seed)
+    edges = EdgeList(n)
+    if p == 0:
+        return edges
+    if p == 1:
+        for i in range(n):
+            for j in range(i + 1, n):
+                edges.append(i, j, rng.randint(min_weight, max_weight))
+        return edges
+
+    log_q = math.log(1 - p)
+    v, w = 1, -1
+    while v < n:
+        w += 1 + int(math.log(1 - rng.random()) / log_q)
+        while w >= v and v < n:
+            w -= v
+            v += 1
+        if v < n:
+            edges.append(w, v, rng.randint(min_weight, max_weight))
+    return edges
+
+
+def grid(rows, cols, seed=None, min_weight=1, max_weight=10, spacing=1.0):
+    """Решётка rows×cols: каждая вершина связана с соседями справа и снизу"""
+    rng = _rng(seed)
+    positions = [(c * spacing, r * spacing) for r in range(rows) for c in range(cols)]
+    edges = EdgeList(rows * cols, positions)
+    for r in range(rows):
+        for c in range(cols):
+            v = r * cols + c
+            if c + 1 < cols:
+                edges.append(v, v + 1, rng.randint(min_weight, max_weight))
+            if r + 1 < rows:
+                edges.append(v, v + cols, rng.randint(min_weight, max_weight))
+    return edges
+
+
+def random_geometric(n, radius, seed=None, min_weight=1, max_weight=10):
+    """Случайный геометрический граф в единичном квадрате
+
+    Точки связываются, если расстояние между ними не больше radius.
+    Кандидаты ищутся только в соседних ячейках сетки со стороной radius,
+    поэтому ожидаемое время - O(n + m).
+    """
+    if radius <= 0:
+        raise ValueError("Радиус должен быть положительным")
+    rng = _rng(seed)
+    positions = [(rng.random(), rng.random()) for _ in range(n)]
+    edges = EdgeList(n, positions)
+
+    cells = {}
+    for v, (x, y) in enumerate(positions):
+        cells.setdefault((int(x / radius), int(y / radius)), []).append(v)
+
+    r2 = radius * radius
+    for (cx, cy), members in cells.items():
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            others = cells.get((cx + dx, cy + dy))
+            if not others:
+                continue
+            for a_pos, u in enumerate(members):
+                ux, uy = positions[u]
+                # В своей ячейке пары берём один раз, в соседних - все
+                candidates = members[a_pos + 1:] if (dx, dy) == (0, 0) else others
+                for v in candidates:
+                    vx, vy = positions[v]
+                    if (ux - vx) ** 2 + (uy - vy) ** 2 <= r2:
+                        edges.append(u, v, rng.randint(min_weight, max_weight))
+    return edges
+
+
+def barabasi_albert(n, m, seed=None, min_weight=1, max_weight=10):
+    """Безмасштабный граф Барабаши-Альберт: каждая новая вершина
+    присоединяется к m различным вершинам с вероятностью, пропорциональной
+    степени (выбор из списка концов рёбер), O(n·m)
+    """
+    if m < 1 or m >= max(n, 1):
+        raise ValueError("Должно выполняться 1 <= m < n")
+    rng = _rng(seed)
+    edges = EdgeList(n)
+    # Каждая вершина встречается в списке столько раз, какова её степень
+    endpoints = []
+    targets = list(range(m))
+
+    for v in range(m, n):
+        for u in targets:
+            edges.append(u, v, rng.randint(min_weight, max_weight))
+        endpoints.extend(targets)
+        endpoints.extend([v] * m)
+
+        chosen = set()
+        while len(chosen) < m:
+            chosen.add(rng.choice(endpoints))
+        targets = list(chosen)
+    return edges
+
+
+FAMILIES = {
+    "gnm": gnm,
+    "gnp": gnp,
+    "grid": grid,
+    "geometric": random_geometric,
+    "scale_free": barabasi_albert,
+}
@@ -1,12 +1,31 @@
+import hashlib
+import heapq
+import mmap
+import os
+import random
+import struct
+import tempfile
 import time
-def floyd_warshall(graph):
-    """Алгоритм Флойда-Уоршелла n**3"""
+from collections import deque
+from array import array
+from multiprocessing import Pool, current_process, shared_memory
+
+from matrix import MIN_PLUS, semiring_product
+
+try:
+    import numpy as np
+except ImportError:  # NumPy не обязателен, без него работает эталонный вариант
+    np = None
+
+
+def _floyd_warshall_python(graph, next_hop=False):
+    """Эталонная реализация на списках списков"""
     comparisons = 0
-    start_time = time.time()
-    
+
     n = len(graph)
     dist = [[float('inf')] * n for _ in range(n)]
-    
+    nxt = array('l', [-1]) * (n * n) if next_hop else None
+
     # Инициализация матрицы расстояний
     for i in range(n):
         for j in range(n):
@@ -15,7 +34,11 @@ def floyd_warshall(graph):
                 dist[i][j] = 0
             elif graph[i][j] != 0:
                 dist[i][j] = graph[i][j]
-    
+            else:
+                continue
+            if nxt is not None:
+                nxt[i * n + j] = j
+
     # Основной алгоритм
     for k in range(n):
         for i in range(n):
@@ -23,6 +46,1815 @@ def floyd_warshall(graph):
                 comparisons += 1
                 if dist[i][j] > dist[i][k] + dist[k][j]:
                     dist[i][j] = dist[i][k] + dist[k][j]
-    
+                    if nxt is not None:
+                        nxt[i * n + j] = nxt[i * n + k]
+
+    return dist, comparisons, nxt
+
+
+def _floyd_warshall_numpy(graph, next_hop=False):
+    """Векторизованная реализация: на шаге k обновляется сразу весь срез"""
+    if np is None:
+        raise ImportError("Для backend='numpy' требуется пакет numpy")
+
+    n = len(graph)
+    if n == 0:
+        return [], 0, (array('l') if next_hop else None)
+
+    weights = np.array(graph, dtype=np.float64)
+    dist = np.where(weights != 0, weights, np.inf)
+    np.fill_diagonal(dist, 0)
+
+    if next_hop:
+        nxt = np.where(np.isfinite(dist), np.arange(n)[None, :], -1)
+        for k in range(n):
+            candidate = dist[:, k, None] + dist[None, k, :]
+            better = candidate < dist
+            dist[better] = candidate[better]
+            nxt[better] = np.broadcast_to(nxt[:, k, None], (n, n))[better]
+        nxt = array('l', nxt.ravel().tolist())
+    else:
+        nxt = None
+        # Строка k и столбец k транслируются на всю матрицу
+        for k in range(n):
+            np.minimum(dist, dist[:, k, None] + dist[None, k, :], out=dist)
+
+    # Количество сравнений совпадает с эталонной реализацией
+    comparisons = n * n + n ** 3
+    return _as_reference(dist.tolist(), graph), comparisons, nxt
+
+
+def _as_reference(rows, graph):
+    """Приведение строк float к виду эталона: целые числа и float('inf')"""
+    if not all(isinstance(w, int) for row in graph for w in row):
+        return rows
+    inf = float('inf')
+    return [[int(val) if val != inf else inf for val in row] for row in rows]
+
+
+# ============================================================================
+# ЦЕЛОЧИСЛЕННАЯ МАТРИЦА РАССТОЯНИЙ
+# ============================================================================
+
+class DistanceMatrix:
+    """Матрица расстояний n×n с целыми весами в плоском array('q')
+
+    Ячейка занимает 8 байт вместо ~32 у списка списков из int и
+    float('inf'). Отсутствие пути хранится значением INF (максимум int64),
+    а наружу строки отдаются списками с float('inf'), как у эталона,
+    поэтому объект взаимозаменяем со списком строк. Буфер data без
+    копирования передаётся в NumPy, в кэш (pack_shortest_paths) и в
+    форматирование для вывода.
+    """
+
+    INF = 2 ** 63 - 1
+
+    def __init__(self, n, data=None):
+        if data is None:
+            data = array('q', [self.INF]) * (n * n)
+        elif len(data) != n * n:
+            raise ValueError("Размер буфера не совпадает с n×n")
+        self.n = n
+        self.data = data
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Матрица из строк с целыми числами и float('inf')"""
+        rows = list(rows)
+        inf = float('inf')
+        return cls(len(rows), array('q', (cls.INF if d == inf else d
+                                          for row in rows for d in row)))
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, index):
+        n, inf = self.n, float('inf')
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("Номер вершины вне диапазона")
+        row = self.data[index * n:(index + 1) * n].tolist()
+        return [inf if d == self.INF else d for d in row]
+
+    def __iter__(self):
+        return (self[i] for i in range(self.n))
+
+    def __eq__(self, other):
+        if isinstance(other, DistanceMatrix):
+            return self.n == other.n and self.data == other.data
+        try:
+            return len(other) == self.n and all(self[i] == list(other[i]) for i in range(self.n))
+        except TypeError:
+            return NotImplemented
+
+    def get(self, u, v):
+        """Расстояние из u в v без построения строки"""
+        d = self.data[u * self.n + v]
+        return float('inf') if d == self.INF else d
+
+    @property
+    def nbytes(self):
+        return len(self.data) * self.data.itemsize
+
+    def format_rows(self, width=4):
+        """Строки для вывода: числа по ширине width, "inf" - нет пути"""
+        n, inf_text = self.n, f"{'inf':>{width}}"
+        return [" ".join(inf_text if d == self.INF else f"{d:>{width}}"
+                         for d in self.data[i * n:(i + 1) * n])
+                for i in range(n)]
+
+
+# Граница конечных расстояний: сумма двух таких значений ещё помещается в int64
+INT64_SAFE = 2 ** 62
+
+
+def _check_int64_weights(graph):
+    """Проверка, что матрицу можно посчитать в int64 без переполнения"""
+    if not all(isinstance(w, int) for row in graph for w in row):
+        raise ValueError("Для backend='int64' веса должны быть целыми")
+    n = len(graph)
+    heaviest = max((abs(w) for row in graph for w in row), default=0)
+    # Кратчайший путь содержит не больше n-1 рёбер
+    if max(n - 1, 1) * heaviest >= INT64_SAFE:
+        raise OverflowError("Длины путей могут не поместиться в int64")
+
+
+def _floyd_warshall_int64(graph, next_hop=False):
+    """Целочисленная реализация на DistanceMatrix (8 байт на ячейку)
+
+    Сложение с INF не выполняется (маска), а конечные расстояния
+    ограничены INT64_SAFE, поэтому переполнения быть не может. Без
+    next_hop при наличии NumPy шаг k выполняется над тем же буфером
+    через np.frombuffer - без копирования матрицы.
+    """
+    _check_int64_weights(graph)
+    n = len(graph)
+    inf = DistanceMatrix.INF
+    dist = DistanceMatrix(n)
+    data = dist.data
+    nxt = array('l', [-1]) * (n * n) if next_hop else None
+
+    for i in range(n):
+        for j, w in enumerate(graph[i]):
+            if i == j:
+                data[i * n + j] = 0
+            elif w != 0:
+                data[i * n + j] = w
+            else:
+                continue
+            if nxt is not None:
+                nxt[i * n + j] = j
+
+    if np is not None and nxt is None and n:
+        view = np.frombuffer(data, dtype=np.int64).reshape(n, n)
+        for k in range(n):
+            col = view[:, k, None]
+            row = view[None, k, :]
+            np.minimum(view, col + row, out=view, where=(col != inf) & (row != inf))
+        del view  # освобождаем экспорт буфера, иначе array нельзя изменить
+    else:
+        try:
+            for k in range(n):
+                # Перебираются только конечные элементы строки k
+                row_k = [(j, d) for j, d in enumerate(data[k * n:(k + 1) * n]) if d != inf]
+                for i in range(n):
+                    base = i * n
+                    d_ik = data[base + k]
+                    if d_ik == inf:
+                        continue
+                    row_i = data[base:base + n].tolist()
+                    changed = False
+                    for j, d_kj in row_k:
+                        if d_ik + d_kj < row_i[j]:
+                            row_i[j] = d_ik + d_kj
+                            changed = True
+                            if nxt is not None:
+                                nxt[base + j] = nxt[base + k]
+                    if changed:
+                        data[base:base + n] = array('q', row_i)
+        except OverflowError:
+            # Без отрицательных циклов расстояния ограничены INT64_SAFE
+            raise ValueError("В графе есть цикл отрицательного веса") from None
+
+    comparisons = n * n + n ** 3
+    return dist, comparisons, nxt
+
+
+# ============================================================================
+# БЛОЧНЫЙ (ТАЙЛОВЫЙ) АЛГОРИТМ НА НЕСКОЛЬКИХ ПРОЦЕССАХ
+# ============================================================================
+
+# Высота полосы строк и длина блока промежуточных вершин. Полоса из 32
+# строк вместе с временным массивом помещается в L2 (2 МиБ) до n ≈ 4000;
+# замер на одном ядре: n=1000 - 1.5 с (numpy - 1.8 с), n=2000 - 12-14 с
+# (numpy - 14 с); с блоком 64 при n=2000 - 14-16 с
+BLOCK_SIZE = 32
+
+_worker_shm = None
+_worker_dist = None
+_worker_n = 0
+
+
+def _wrap_buffer(buf, n):
+    """Представление общего буфера как матрицы n×n из float64"""
+    if np is not None:
+        return np.ndarray((n, n), dtype=np.float64, buffer=buf)
+    return memoryview(buf).cast('d')
+
+
+def _relax_band(dist, n, rows, ks):
+    """Релаксация полосы строк rows (по всем столбцам) через вершины из ks
+
+    Шаг k - одна операция над всей полосой; полоса высотой в блок
+    остаётся в кэше на все шаги блока ks.
+    """
+    i0, i1 = rows
+    if np is not None:
+        band = dist[i0:i1]
+        candidate = np.empty_like(band)
+        for k in range(*ks):
+            np.add(band[:, k, None], dist[None, k], out=candidate)
+            np.minimum(band, candidate, out=band)
+        return
+
+    inf = float('inf')
+    for k in range(*ks):
+        row_k = dist[k * n:(k + 1) * n].tolist()
+        for i in range(i0, i1):
+            d_ik = dist[i * n + k]
+            if d_ik == inf:
+                continue
+            start = i * n
+            row_i = dist[start:start + n].tolist()
+            dist[start:start + n] = array('d', [
+                old if old <= d_ik + d_kj else d_ik + d_kj
+                for old, d_kj in zip(row_i, row_k)
+            ])
+
+
+def _init_worker(shm_name, n):
+    """Подключение процесса пула к общей матрице расстояний"""
+    global _worker_shm, _worker_dist, _worker_n
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_dist = _wrap_buffer(_worker_shm.buf, n)
+    _worker_n = n
+
+
+def _relax_bands_shared(bands):
+    """Задача для пула: релаксация подряд идущих полос в общей памяти"""
+    for rows, ks in bands:
+        _relax_band(_worker_dist, _worker_n, rows, ks)
+
+
+def _floyd_warshall_blocked(graph, block_size=BLOCK_SIZE, workers=None, next_hop=False):
+    """Блочный Флойд-Уоршелл: полосы строк фазы 3 делятся между процессами"""
+    if next_hop:
+        raise ValueError("Блочный вариант не строит матрицу следующих вершин")
+    n = len(graph)
+    if n == 0:
+        return [], 0, None
+    if block_size < 1:
+        raise ValueError("Размер блока должен быть положительным")
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    blocks = [(s, min(s + block_size, n)) for s in range(0, n, block_size)]
+    use_pool = workers > 1 and len(blocks) > 2
+
+    shm = shared_memory.SharedMemory(create=True, size=n * n * 8) if use_pool else None
+    try:
+        dist = _wrap_buffer(shm.buf if use_pool else bytearray(n * n * 8), n)
+
+        # Инициализация матрицы расстояний
+        inf = float('inf')
+        if np is not None:
+            weights = np.array(graph, dtype=np.float64)
+            dist[:] = np.where(weights != 0, weights, inf)
+            np.fill_diagonal(dist, 0)
+        else:
+            for i in range(n):
+                row = [graph[i][j] if graph[i][j] != 0 else inf for j in range(n)]
+                row[i] = 0
+                dist[i * n:(i + 1) * n] = array('d', row)
+
+        pool = Pool(workers, initializer=_init_worker, initargs=(shm.name, n)) if use_pool else None
+        try:
+            for ks in blocks:
+                # Фазы 1 и 2: полоса блока k (диагональный тайл и строка блока)
+                _relax_band(dist, n, ks, ks)
+                # Фаза 3: остальным полосам нужны только строки блока k, которые
+                # уже окончательны, поэтому полосы независимы друг от друга
+                bands = [(rows, ks) for rows in blocks if rows != ks]
+                if pool is None:
+                    for rows, k_range in bands:
+                        _relax_band(dist, n, rows, k_range)
+                else:
+                    # Каждому процессу - подряд идущие полосы (непрерывный участок памяти)
+                    size = -(-len(bands) // workers)
+                    pool.map(_relax_bands_shared,
+                             [bands[w:w + size] for w in range(0, len(bands), size)])
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        if np is not None:
+            rows = dist.tolist()
+        else:
+            rows = [dist[i * n:(i + 1) * n].tolist() for i in range(n)]
+        del dist
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    # Каждая тройка (k, i, j) обрабатывается ровно один раз, как и в эталоне
+    comparisons = n * n + n ** 3
+    return _as_reference(rows, graph), comparisons, None
+
+
+def floyd_warshall_blocked(graph, block_size=BLOCK_SIZE, workers=None):
+    """Блочный многопроцессный алгоритм Флойда-Уоршелла
+
+    Матрица расстояний хранится в multiprocessing.shared_memory и делится
+    на полосы по block_size строк; независимые полосы фазы 3 обновляются
+    параллельно на пуле из workers процессов (по умолчанию - по числу ядер).
+    """
+    start_time = time.time()
+    dist, comparisons, _ = _floyd_warshall_blocked(graph, block_size, workers)
+    time_taken = time.time() - start_time
+    return dist, comparisons, time_taken
+
+
+# ============================================================================
+# ВНЕШНЯЯ ПАМЯТЬ: МАТРИЦА РАССТОЯНИЙ В ФАЙЛЕ, ОТОБРАЖЁННОМ В ПАМЯТЬ
+# ============================================================================
+
+# Тип элементов -> (код array, "бесконечность"). Для int32 бесконечность
+# меньше половины диапазона, поэтому сумма двух значений не переполняется
+MMAP_DTYPES = {
+    "float32": ('f', float('inf')),
+    "int32": ('i', 2 ** 30 - 1),
+}
+
+
+class MappedDistances:
+    """Матрица расстояний n×n во внешней памяти (файл + mmap)
+
+    Занимает 4 байта на элемент на диске, в оперативной памяти - только
+    страницы, к которым идёт обращение. Строка matrix[i] возвращается
+    списком с float('inf') для недостижимых вершин, как у floyd_warshall.
+    Файл, созданный во временном каталоге (path=None), удаляется в close().
+    """
+
+    def __init__(self, path, n, dtype="float32", temporary=False):
+        if dtype not in MMAP_DTYPES:
+            raise ValueError(f"Неизвестный тип элементов: {dtype}")
+        self.path = path
+        self.n = n
+        self.dtype = dtype
+        self.typecode, self.inf = MMAP_DTYPES[dtype]
+        self.temporary = temporary
+
+        itemsize = array(self.typecode).itemsize
+        self._file = open(path, 'r+b')
+        self._file.truncate(n * n * itemsize)
+        # mmap не отображает файлы нулевой длины
+        self._mmap = mmap.mmap(self._file.fileno(), 0) if n else None
+        if n == 0:
+            self.matrix = None
+        elif np is not None:
+            self.matrix = np.ndarray((n, n), dtype=self.dtype, buffer=self._mmap)
+        else:
+            self.matrix = memoryview(self._mmap).cast(self.typecode)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        row = self.read_rows(i, i + 1)
+        row = row[0].tolist() if np is not None else row[0]
+        if self.typecode == 'i':
+            inf = float('inf')
+            return [inf if d >= self.inf else d for d in row]
+        return row
+
+    def __iter__(self):
+        return (self[i] for i in range(self.n))
+
+    def read_rows(self, start, stop):
+        """Копия строк [start, stop) в оперативной памяти
+
+        ndarray при наличии NumPy, иначе список строк-списков.
+        """
+        if np is not None:
+            return np.array(self.matrix[start:stop])
+        n = self.n
+        return [self.matrix[i * n:(i + 1) * n].tolist() for i in range(start, stop)]
+
+    def write_rows(self, start, rows):
+        """Запись блока строк, прочитанного read_rows, обратно в файл"""
+        if np is not None:
+            self.matrix[start:start + len(rows)] = rows
+            return
+        n = self.n
+        for offset, row in enumerate(rows):
+            i = start + offset
+            self.matrix[i * n:(i + 1) * n] = array(self.typecode, row)
+
+    def close(self):
+        """Сброс изменений на диск и закрытие файла"""
+        if self._file is None:
+            return
+        if self._mmap is not None:
+            if np is None:
+                self.matrix.release()
+            self.matrix = None
+            self._mmap.flush()
+            self._mmap.close()
+        self._file.close()
+        self._file = None
+        if self.temporary:
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _relax_rows(rows, pivot, k0, inf):
+    """Релаксация блока строк rows через вершины k0..k0+len(pivot)-1
+
+    pivot - строки этих вершин. Может совпадать с rows (блок ведущих
+    строк обрабатывается сам с собой, как обычный Флойд-Уоршелл).
+    """
+    if np is not None:
+        integral = rows.dtype.kind == 'i'
+        for k in range(len(pivot)):
+            row_k = pivot[k]
+            candidate = rows[:, k0 + k, None] + row_k
+            if integral:
+                # Сумма с "бесконечностью" при отрицательном слагаемом
+                # стала бы конечной, такие пары пропускаются
+                mask = (rows[:, k0 + k, None] < inf) & (row_k < inf)
+                np.minimum(rows, candidate, out=rows, where=mask)
+            else:
+                np.minimum(rows, candidate, out=rows)
+        return
+
+    for k in range(len(pivot)):
+        row_k = pivot[k]
+        for i, row in enumerate(rows):
+            d_ik = row[k0 + k]
+            if d_ik >= inf:
+                continue
+            rows[i] = [old if d_kj >= inf or old <= d_ik + d_kj else d_ik + d_kj
+                       for old, d_kj in zip(row, row_k)]
+
+
+def floyd_warshall_mmap(n, edges, path=None, dtype="float32", block_rows=None,
+                        memory_limit=64 * 1024 * 1024):
+    """Флойд-Уоршелл во внешней памяти для графов, не помещающихся в ОЗУ
+
+    Матрица расстояний хранится в файле (float32 или int32, 4 байта на
+    элемент) и обрабатывается блоками строк. Для каждого блока ведущих
+    вершин K сначала замыкается сам блок строк K, затем все остальные
+    блоки строк по очереди читаются, релаксируются через K и пишутся
+    обратно. Ввод-вывод последовательный, за проход по K файл читается
+    и пишется один раз: всего n / block_rows проходов вместо n.
+
+    Args:
+        n: число вершин
+        edges: дуги (u, v, вес) или объект с to_csr() (graph_model.Graph,
+            generators.EdgeList); кратные дуги сводятся к минимальной
+        path: файл матрицы (по умолчанию временный, удаляется в close())
+        dtype: "float32" (целые точны до 2**24) или "int32" (расстояния
+            меньше 2**30 - 1)
+        block_rows: строк в блоке (по умолчанию - из memory_limit)
+        memory_limit: оперативная память на два блока строк, байт
+
+    Returns:
+        (MappedDistances, comparisons, time_taken) - результат нужно
+        закрыть (close() или with)
+    """
+    start_time = time.time()
+    if dtype not in MMAP_DTYPES:
+        raise ValueError(f"Неизвестный тип элементов: {dtype}")
+    typecode, inf = MMAP_DTYPES[dtype]
+    if block_rows is None:
+        block_rows = max(1, memory_limit // (2 * max(n, 1) * array(typecode).itemsize))
+    if block_rows < 1:
+        raise ValueError("Размер блока должен быть положительным")
+
+    temporary = path is None
+    if temporary:
+        fd, path = tempfile.mkstemp(suffix=".dist")
+        os.close(fd)
+    else:
+        open(path, 'wb').close()
+    dist = MappedDistances(path, n, dtype, temporary)
+
+    blocks = [(s, min(s + block_rows, n)) for s in range(0, n, block_rows)]
+
+    # Инициализация: "бесконечность" и нули на диагонали блоками строк
+    for r0, r1 in blocks:
+        if np is not None:
+            rows = np.full((r1 - r0, n), inf, dtype=dtype)
+            rows[np.arange(r1 - r0), np.arange(r0, r1)] = 0
+        else:
+            rows = [[inf] * n for _ in range(r0, r1)]
+            for i in range(r0, r1):
+                rows[i - r0][i] = 0
+        dist.write_rows(r0, rows)
+
+    # Дуги записываются точечно, из нескольких параллельных - минимальная
+    if hasattr(edges, "to_csr"):
+        indptr, indices, weights = edges.to_csr()
+        edges = ((u, indices[p], weights[p]) for u in range(n)
+                 for p in range(indptr[u], indptr[u + 1]))
+    for u, v, w in edges:
+        if u == v:
+            continue
+        if np is not None:
+            if w < dist.matrix[u, v]:
+                dist.matrix[u, v] = w
+        elif w < dist.matrix[u * n + v]:
+            dist.matrix[u * n + v] = w
+
+    for k0, k1 in blocks:
+        # Блок ведущих строк K замыкается сам с собой
+        pivot = dist.read_rows(k0, k1)
+        _relax_rows(pivot, pivot, k0, inf)
+        dist.write_rows(k0, pivot)
+
+        # Остальные блоки строк: последовательное чтение - релаксация - запись
+        for r0, r1 in blocks:
+            if r0 == k0:
+                continue
+            rows = dist.read_rows(r0, r1)
+            _relax_rows(rows, pivot, k0, inf)
+            dist.write_rows(r0, rows)
+
+    if dist._mmap is not None:
+        dist._mmap.flush()
+    # Каждая тройка (k, i, j) обрабатывается ровно один раз, как и в эталоне
+    comparisons = n * n + n ** 3
+    time_taken = time.time() - start_time
+    return dist, comparisons, time_taken
+
+
+_BACKENDS = {
+    "python": _floyd_warshall_python,
+    "numpy": _floyd_warshall_numpy,
+    "blocked": _floyd_warshall_blocked,
+    "int64": _floyd_warshall_int64,
+}
+
+
+def floyd_warshall(graph, backend="python", next_hop=False):
+    """Алгоритм Флойда-Уоршелла n**3
+
+    Args:
+        graph: матрица смежности (0 - нет ребра)
+        backend: "python" (эталон), "numpy" (векторизованный),
+            "blocked" (блочный многопроцессный) или "int64"
+            (целые веса, результат - DistanceMatrix)
+        next_hop: вернуть вместо списка dist объект ShortestPaths
+            с матрицей следующих вершин для восстановления маршрутов
+    """
+    if backend not in _BACKENDS:
+        raise ValueError(f"Неизвестный backend: {backend}")
+
+    start_time = time.time()
+    dist, comparisons, nxt = _BACKENDS[backend](graph, next_hop=next_hop)
+    if next_hop:
+        dist = ShortestPaths(dist, nxt)
+    time_taken = time.time() - start_time
+    return dist, comparisons, time_taken
+
+
+def min_plus_shortest_paths(graph, backend=None):
+    """Кратчайшие пути возведением матрицы в квадрат над (min, +)
+
+    D₁ - матрица весов с нулевой диагональю, D₂ₜ = D_t ⊗ D_t содержит
+    кратчайшие пути не длиннее 2t рёбер, поэтому хватает ⌈log₂ n⌉
+    произведений (semiring_product из matrix.py, O(n³ log n)); если
+    очередной квадрат не изменил матрицу, пути уже найдены. Это то же
+    ядро, что и у умножения матриц, - векторизованное и тайловое.
+
+    Args:
+        graph: матрица смежности (0 - нет ребра) или модель с to_matrix()
+        backend: backend semiring_product (None - выбор по наличию NumPy)
+
+    Returns:
+        (dist, comparisons, time_taken) - как у floyd_warshall
+
+    Raises:
+        ValueError: если в графе есть цикл отрицательного веса
+    """
+    start_time = time.time()
+    if hasattr(graph, "to_matrix"):
+        graph = graph.to_matrix()
+    n = len(graph)
+    inf = float('inf')
+    dist = [[0 if i == j else (w if w != 0 else inf) for j, w in enumerate(row)]
+            for i, row in enumerate(graph)]
+
+    comparisons = 0
+    length = 1
+    # Отрицательный цикл из n рёбер проявляется на путях длины n
+    while length < n:
+        squared, count, _ = semiring_product(dist, dist, MIN_PLUS, backend)
+        comparisons += count
+        length *= 2
+        if squared == dist:
+            break
+        dist = squared
+
+    if any(dist[i][i] < 0 for i in range(n)):
+        raise ValueError("В графе есть цикл отрицательного веса")
     time_taken = time.time() - start_time
-    return dist, comparisons, time_taken
\ No newline at end of file
+    return dist, comparisons, time_taken
+
+
+class ShortestPaths:
+    """Матрица кратчайших расстояний вместе с матрицей следующих вершин
+
+    Ведёт себя как список строк dist. Матрица следующих вершин хранится
+    плоским массивом array('l') длины n*n (-1 - пути нет), поэтому path(u, v)
+    восстанавливает маршрут за O(длины пути) без повторного запуска алгоритма.
+    """
+
+    def __init__(self, dist, next_hop):
+        self.dist = dist
+        self.next_hop = next_hop
+
+    def __len__(self):
+        return len(self.dist)
+
+    def __getitem__(self, index):
+        return self.dist[index]
+
+    def __iter__(self):
+        return iter(self.dist)
+
+    def _next(self, u, v):
+        """Следующая вершина маршрута из u в v (-1 - пути нет)"""
+        return self.next_hop[u * len(self.dist) + v]
+
+    def path(self, u, v):
+        """Маршрут из u в v списком вершин ([] - если пути нет)"""
+        if self._next(u, v) < 0:
+            return []
+
+        n = len(self.dist)
+        route = [u]
+        while u != v:
+            u = self._next(u, v)
+            route.append(u)
+            if len(route) > n:
+                raise ValueError("Маршрут зациклился: в графе есть отрицательный цикл")
+        return route
+
+
+# ============================================================================
+# ДОСТИЖИМОСТЬ: ТРАНЗИТИВНОЕ ЗАМЫКАНИЕ НА БИТОВЫХ СТРОКАХ
+# ============================================================================
+
+class Reachability:
+    """Транзитивное замыкание: строка i - целое число, бит j которого
+    равен 1, если вершина j достижима из i (каждая вершина достижима
+    из самой себя). n² бит вместо n² чисел float.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        """Строка i списком 0/1"""
+        row = self.rows[i]
+        return [(row >> j) & 1 for j in range(len(self.rows))]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self.rows)))
+
+    def reachable(self, u, v):
+        """Достижима ли v из u"""
+        return bool((self.rows[u] >> v) & 1)
+
+    def count(self, u):
+        """Число вершин, достижимых из u (включая её саму)"""
+        return self.rows[u].bit_count()
+
+
+def _closure_rows(adj):
+    """Начальные битовые строки: сама вершина и её соседи"""
+    rows = []
+    for u, neighbours in enumerate(adj):
+        row = 1 << u
+        for v, _ in neighbours:
+            row |= 1 << v
+        rows.append(row)
+    return rows
+
+
+def _transitive_closure_python(adj):
+    """Уоршелл на целых числах Python: OR строки k идёт по машинным словам"""
+    reach = _closure_rows(adj)
+    n = len(reach)
+    for k in range(n):
+        bit = 1 << k
+        row_k = reach[k]
+        for i in range(n):
+            if reach[i] & bit:
+                reach[i] |= row_k
+    return reach
+
+
+def _transitive_closure_numpy(adj):
+    """Уоршелл на массиве uint64: строки с битом k обновляются одним OR"""
+    if np is None:
+        raise ImportError("Для backend='numpy' требуется пакет numpy")
+    n = len(adj)
+    words = (n + 63) // 64
+    reach = np.zeros((n, words), dtype=np.uint64)
+    for u, row in enumerate(_closure_rows(adj)):
+        reach[u] = np.frombuffer(row.to_bytes(words * 8, 'little'), dtype='<u8')
+
+    for k in range(n):
+        word, shift = divmod(k, 64)
+        has_k = ((reach[:, word] >> np.uint64(shift)) & np.uint64(1)).astype(bool)
+        reach[has_k] |= reach[k]
+
+    return [int.from_bytes(reach[u].astype('<u8').tobytes(), 'little') for u in range(n)]
+
+
+_CLOSURE_BACKENDS = {
+    "python": _transitive_closure_python,
+    "numpy": _transitive_closure_numpy,
+}
+
+
+def transitive_closure(graph, backend=None):
+    """Достижимость между всеми парами вершин (алгоритм Уоршелла)
+
+    Строки матрицы достижимости хранятся битовыми множествами, поэтому
+    шаг "i достигает k => i достигает всего, что достигает k" - это одно
+    побитовое OR по n / 64 машинным словам вместо n сравнений float.
+    Веса рёбер не учитываются.
+
+    Args:
+        graph: матрица смежности (0 - нет ребра) или модель с to_csr()
+        backend: "python" (целые числа Python) или "numpy" (uint64);
+            по умолчанию - "numpy", если он установлен
+
+    Returns:
+        (Reachability, comparisons, time_taken) - comparisons - число
+        проверок бита (n²)
+    """
+    if backend is None:
+        backend = "numpy" if np is not None else "python"
+    if backend not in _CLOSURE_BACKENDS:
+        raise ValueError(f"Неизвестный backend: {backend}")
+
+    start_time = time.time()
+    adj = adjacency_list(graph)
+    rows = _CLOSURE_BACKENDS[backend](adj)
+    comparisons = len(adj) ** 2
+    time_taken = time.time() - start_time
+    return Reachability(rows), comparisons, time_taken
+
+
+# ============================================================================
+# РАЗРЕЖЕННЫЕ ГРАФЫ: ДЕЙКСТРА / BFS ИЗ КАЖДОЙ ВЕРШИНЫ
+# ============================================================================
+
+def adjacency_list(graph):
+    """Список смежности adj[i] = [(j, вес), ...]
+
+    graph - матрица смежности или модель графа с методом to_csr()
+    (graph_model.Graph), которая экспортируется без плотной матрицы.
+    """
+    if hasattr(graph, "to_csr"):
+        indptr, indices, weights = graph.to_csr()
+        return [list(zip(indices[indptr[i]:indptr[i + 1]], weights[indptr[i]:indptr[i + 1]]))
+                for i in range(len(indptr) - 1)]
+
+    n = len(graph)
+    return [[(j, w) for j, w in enumerate(graph[i]) if w != 0 and j != i]
+            for i in range(n)]
+
+
+def dijkstra(adj, source, first_hop=None):
+    """Дейкстра на двоичной куче O(E log V)
+
+    Если передан список first_hop (длины V), в него записывается первая
+    вершина кратчайшего маршрута из source в каждую вершину.
+
+    Returns:
+        (dist, comparisons) - расстояния от source и число сравнений
+    """
+    inf = float('inf')
+    dist = [inf] * len(adj)
+    dist[source] = 0
+    heap = [(0, source)]
+    comparisons = 0
+    if first_hop is not None:
+        first_hop[source] = source
+
+    while heap:
+        d, u = heapq.heappop(heap)
+        comparisons += 1
+        if d > dist[u]:
+            continue
+        for v, w in adj[u]:
+            comparisons += 1
+            nd = d + w
+            if nd < dist[v]:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+                if first_hop is not None:
+                    first_hop[v] = v if u == source else first_hop[u]
+
+    return dist, comparisons
+
+
+def bfs_distances(adj, source, weight=1, first_hop=None):
+    """Обход в ширину O(V + E) для графа с одинаковыми весами рёбер"""
+    inf = float('inf')
+    hops = [-1] * len(adj)
+    hops[source] = 0
+    queue = deque([source])
+    comparisons = 0
+    if first_hop is not None:
+        first_hop[source] = source
+
+    while queue:
+        u = queue.popleft()
+        for v, _ in adj[u]:
+            comparisons += 1
+            if hops[v] < 0:
+                hops[v] = hops[u] + 1
+                queue.append(v)
+                if first_hop is not None:
+                    first_hop[v] = v if u == source else first_hop[u]
+
+    return [h * weight if h >= 0 else inf for h in hops], comparisons
+
+
+def _uniform_weight(adj):
+    """Общий положительный вес всех рёбер или None"""
+    weights = {w for row in adj for _, w in row}
+    if len(weights) == 1:
+        weight = weights.pop()
+        if weight > 0:
+            return weight
+    return None
+
+
+def all_pairs_dijkstra(graph, next_hop=False):
+    """Кратчайшие пути между всеми парами для разреженных графов O(V·E log V)
+
+    Запускает Дейкстру из каждой вершины (или BFS, если все веса равны).
+    Веса рёбер должны быть неотрицательными. При next_hop=True вместо
+    списка dist возвращается ShortestPaths.
+    """
+    start_time = time.time()
+
+    adj = adjacency_list(graph)
+    if any(w < 0 for row in adj for _, w in row):
+        raise ValueError("Алгоритм Дейкстры не поддерживает отрицательные веса")
+
+    n = len(adj)
+    weight = _uniform_weight(adj)
+    dist = []
+    nxt = array('l') if next_hop else None
+    comparisons = 0
+    for source in range(n):
+        first_hop = [-1] * n if next_hop else None
+        if weight is not None:
+            row, count = bfs_distances(adj, source, weight, first_hop)
+        else:
+            row, count = dijkstra(adj, source, first_hop)
+        dist.append(row)
+        comparisons += count
+        if next_hop:
+            nxt.extend(first_hop)
+
+    if next_hop:
+        dist = ShortestPaths(dist, nxt)
+    time_taken = time.time() - start_time
+    return dist, comparisons, time_taken
+
+
+# ============================================================================
+# АЛГОРИТМ ДЖОНСОНА: ОТРИЦАТЕЛЬНЫЕ ВЕСА В РАЗРЕЖЕННЫХ ГРАФАХ
+# ============================================================================
+
+def bellman_ford_potentials(adj):
+    """Потенциалы вершин алгоритмом Беллмана-Форда O(V·E)
+
+    Расстояния считаются от фиктивной вершины, соединённой со всеми
+    вершинами рёбрами веса 0, поэтому начальные потенциалы нулевые.
+    Проходы прекращаются, как только ни одно ребро не релаксируется.
+
+    Returns:
+        (h, comparisons) - потенциалы, для которых w(u, v) + h[u] - h[v] >= 0
+
+    Raises:
+        ValueError: если в графе есть цикл отрицательного веса
+    """
+    n = len(adj)
+    h = [0] * n
+    comparisons = 0
+    # Кратчайший путь из фиктивной вершины содержит не больше n - 1
+    # настоящих рёбер; изменения на n-м проходе означают отрицательный цикл
+    for _ in range(n):
+        changed = False
+        for u in range(n):
+            hu = h[u]
+            for v, w in adj[u]:
+                comparisons += 1
+                if hu + w < h[v]:
+                    h[v] = hu + w
+                    changed = True
+        if not changed:
+            return h, comparisons
+    raise ValueError("В графе есть цикл отрицательного веса")
+
+
+def johnson(graph, next_hop=False):
+    """Алгоритм Джонсона O(V·E log V) для разреженных графов с отрицательными весами
+
+    Беллман-Форд находит потенциалы h, после чего веса рёбер заменяются
+    на неотрицательные w + h[u] - h[v] и из каждой вершины запускается
+    Дейкстра. Кратчайшие маршруты при такой замене не меняются, а
+    расстояния восстанавливаются как d' - h[u] + h[v].
+
+    Raises:
+        ValueError: если в графе есть цикл отрицательного веса
+            (в неориентированном графе его образует любое отрицательное ребро)
+    """
+    start_time = time.time()
+
+    adj = adjacency_list(graph)
+    n = len(adj)
+    h, comparisons = bellman_ford_potentials(adj)
+    reweighted = [[(v, w + h[u] - h[v]) for v, w in row] for u, row in enumerate(adj)]
+
+    inf = float('inf')
+    dist = []
+    nxt = array('l') if next_hop else None
+    for source in range(n):
+        first_hop = [-1] * n if next_hop else None
+        row, count = dijkstra(reweighted, source, first_hop)
+        dist.append([d - h[source] + h[v] if d != inf else inf for v, d in enumerate(row)])
+        comparisons += count
+        if next_hop:
+            nxt.extend(first_hop)
+
+    if next_hop:
+        dist = ShortestPaths(dist, nxt)
+    time_taken = time.time() - start_time
+    return dist, comparisons, time_taken
+
+
+# ============================================================================
+# ЛЕНИВАЯ МАТРИЦА РАССТОЯНИЙ
+# ============================================================================
+
+class LazyDistanceMatrix:
+    """Матрица расстояний, строки которой считаются при первом обращении
+
+    dist[i] вычисляется Дейкстрой из i (или BFS при одинаковых весах) за
+    O(E log V) и запоминается, поэтому запрос расстояний от нескольких
+    вершин не требует всей матрицы: она строится, только если перебрать
+    все строки (materialize()). При отрицательных весах один раз считаются
+    потенциалы Беллмана-Форда, и строки считаются по перевзвешенным
+    рёбрам, как в johnson.
+
+    Счётчики comparisons и time_taken накапливаются, как у
+    DynamicShortestPaths.
+    """
+
+    def __init__(self, graph):
+        """graph - матрица смежности или модель графа с to_csr()
+
+        Raises:
+            ValueError: если в графе есть цикл отрицательного веса
+        """
+        start_time = time.time()
+        self.adj = adjacency_list(graph)
+        self.potentials = None
+        self.comparisons = 0
+        if any(w < 0 for row in self.adj for _, w in row):
+            h, self.comparisons = bellman_ford_potentials(self.adj)
+            self.potentials = h
+            self.adj = [[(v, w + h[u] - h[v]) for v, w in row] for u, row in enumerate(self.adj)]
+        self.weight = _uniform_weight(self.adj) if self.potentials is None else None
+        self.rows = {}  # источник -> строка расстояний
+        self.time_taken = time.time() - start_time
+
+    def __len__(self):
+        return len(self.adj)
+
+    def __getitem__(self, source):
+        row = self.rows.get(source)
+        if row is not None:
+            return row
+        if not 0 <= source < len(self.adj):
+            raise IndexError("Номер вершины вне диапазона")
+
+        start_time = time.time()
+        if self.weight is not None:
+            row, comparisons = bfs_distances(self.adj, source, self.weight)
+        else:
+            row, comparisons = dijkstra(self.adj, source)
+        h = self.potentials
+        if h is not None:
+            inf = float('inf')
+            row = [d - h[source] + h[v] if d != inf else inf for v, d in enumerate(row)]
+        self.rows[source] = row
+        self.comparisons += comparisons
+        self.time_taken += time.time() - start_time
+        return row
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self.adj)))
+
+    @property
+    def computed(self):
+        """Число уже вычисленных строк"""
+        return len(self.rows)
+
+    def materialize(self):
+        """Вся матрица списком строк (недостающие строки досчитываются)"""
+        return list(self)
+
+
+# ============================================================================
+# АВТОМАТИЧЕСКИЙ ВЫБОР АЛГОРИТМА
+# ============================================================================
+
+ENGINE_NAMES = {
+    "dijkstra": "Дейкстра из каждой вершины",
+    "johnson": "Джонсон (Беллман-Форд + Дейкстра)",
+    "floyd_warshall": "Флойд-Уоршелл",
+}
+
+
+def choose_engine(graph, density_threshold=0.1):
+    """Выбор алгоритма по плотности графа
+
+    Для разреженных графов (доля заполненных ячеек матрицы не больше
+    density_threshold) выгоднее Дейкстра из каждой вершины, а при
+    отрицательных весах - алгоритм Джонсона. Для плотных графов -
+    Флойд-Уоршелл.
+    """
+    n = len(graph)
+    if n < 2:
+        return "floyd_warshall"
+
+    if hasattr(graph, "to_csr"):
+        _, indices, weights = graph.to_csr()
+        edges = len(indices)
+        negative = any(w < 0 for w in weights)
+    else:
+        edges = 0
+        negative = False
+        for i in range(n):
+            for j, w in enumerate(graph[i]):
+                if w != 0 and i != j:
+                    edges += 1
+                    if w < 0:
+                        negative = True
+
+    if edges / (n * (n - 1)) > density_threshold:
+        return "floyd_warshall"
+    return "johnson" if negative else "dijkstra"
+
+
+def shortest_paths(graph, density_threshold=0.1, next_hop=False, decompose=True, engines=None,
+                   workers=None):
+    """Кратчайшие пути между всеми парами с автоматическим выбором алгоритма
+
+    graph - матрица смежности или модель графа (graph_model.Graph); для
+    разреженных графов плотная матрица не строится. При decompose=True
+    несвязный граф сначала разбивается на компоненты связности, и
+    алгоритм выбирается и запускается для каждой из них отдельно
+    (см. componentwise_shortest_paths). Если передан список engines, в
+    него дописывается имя каждого запущенного алгоритма (по одному на
+    компоненту; изолированные вершины алгоритма не требуют). workers -
+    число процессов для компонент (см. componentwise_shortest_paths);
+    workers=1 - без пула.
+
+    Returns:
+        (dist, comparisons, time_taken) - как у floyd_warshall
+
+    Raises:
+        ValueError: если в графе есть цикл отрицательного веса
+    """
+    if decompose:
+        return componentwise_shortest_paths(graph, density_threshold, next_hop, workers, engines)
+
+    engine = choose_engine(graph, density_threshold)
+    if engines is not None:
+        engines.append(engine)
+    if engine == "dijkstra":
+        return all_pairs_dijkstra(graph, next_hop)
+    if engine == "johnson":
+        return johnson(graph, next_hop)
+
+    if hasattr(graph, "to_matrix"):
+        graph = graph.to_matrix()
+    try:
+        # Целые веса - компактная DistanceMatrix вместо списков с float('inf')
+        _check_int64_weights(graph)
+        backend = "int64"
+    except (ValueError, OverflowError):
+        backend = "numpy" if np is not None else "python"
+    dist, comparisons, time_taken = floyd_warshall(graph, backend=backend, next_hop=next_hop)
+    # Отрицательный цикл через i даёт dist[i][i] < 0
+    if any(dist[i][i] < 0 for i in range(len(dist))):
+        raise ValueError("В графе есть цикл отрицательного веса")
+    return dist, comparisons, time_taken
+
+
+# ============================================================================
+# РАЗБИЕНИЕ НА КОМПОНЕНТЫ СВЯЗНОСТИ
+# ============================================================================
+
+# Минимальная суммарная работа (Σ nᵢ³), при которой компоненты
+# обрабатываются пулом процессов: иначе запуск пула дороже расчёта
+PARALLEL_MIN_WORK = 10 ** 7
+
+
+class DisjointSet:
+    """Система непересекающихся множеств (union-find)
+
+    Объединение по размеру и сжатие путей (path halving) дают почти
+    константное амортизированное время операций.
+    """
+
+    def __init__(self, n):
+        self.parent = array('l', range(n))
+        self.size = array('l', [1]) * n
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        """Объединение множеств a и b; False, если они уже совпадают"""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+
+
+def _components(adj):
+    """Компоненты слабой связности по списку смежности"""
+    n = len(adj)
+    sets = DisjointSet(n)
+    for u, row in enumerate(adj):
+        for v, _ in row:
+            sets.union(u, v)
+
+    groups = {}
+    for v in range(n):
+        groups.setdefault(sets.find(v), []).append(v)
+    return list(groups.values())
+
+
+def connected_components(graph):
+    """Компоненты связности графа: списки индексов вершин по возрастанию
+
+    Для ориентированного графа - компоненты слабой связности: между
+    вершинами разных компонент нет пути ни в одну сторону.
+    """
+    return _components(adjacency_list(graph))
+
+
+class _Subgraph:
+    """Компонента связности в формате CSR с локальными индексами
+
+    Поддерживает len(), to_csr() и to_matrix(), поэтому передаётся в
+    shortest_paths как модель графа и пересылается процессам пула.
+    """
+
+    def __init__(self, adj, vertices):
+        local = {v: a for a, v in enumerate(vertices)}
+        self.indptr = array('l', [0])
+        self.indices = array('l')
+        values = []
+        for v in vertices:
+            for u, w in adj[v]:
+                self.indices.append(local[u])
+                values.append(w)
+            self.indptr.append(len(self.indices))
+        try:
+            self.weights = array('q', values)
+        except TypeError:
+            self.weights = array('d', values)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def to_csr(self):
+        return self.indptr, self.indices, self.weights
+
+    def to_matrix(self):
+        n = len(self)
+        matrix = [[0] * n for _ in range(n)]
+        for a in range(n):
+            for p in range(self.indptr[a], self.indptr[a + 1]):
+                matrix[a][self.indices[p]] = self.weights[p]
+        return matrix
+
+
+def _component_paths(args):
+    """Задача для пула: кратчайшие пути внутри одной компоненты"""
+    subgraph, density_threshold, next_hop = args
+    engines = []
+    dist, comparisons, _ = shortest_paths(subgraph, density_threshold, next_hop,
+                                          decompose=False, engines=engines)
+    if next_hop:
+        return dist.dist, comparisons, dist.next_hop, engines[0]
+    return dist, comparisons, None, engines[0]
+
+
+def componentwise_shortest_paths(graph, density_threshold=0.1, next_hop=False, workers=None,
+                                 engines=None):
+    """Кратчайшие пути по компонентам связности: Σ nᵢ³ вместо n³
+
+    Компоненты находятся системой непересекающихся множеств за
+    O(V + E), для каждой компоненты из двух и более вершин алгоритм
+    выбирается и запускается отдельно (shortest_paths), а результаты
+    собираются в общую матрицу с inf между разными компонентами.
+    Если компонент много и суммарная работа не меньше PARALLEL_MIN_WORK,
+    они обрабатываются пулом из workers процессов (по умолчанию - по
+    числу ядер). В демоническом процессе (например, в процессе другого
+    пула) дочерние процессы создавать нельзя, поэтому там компоненты
+    всегда считаются последовательно. engines - как у shortest_paths.
+
+    Returns:
+        (dist, comparisons, time_taken) - как у shortest_paths
+    """
+    start_time = time.time()
+    adj = adjacency_list(graph)
+    components = _components(adj)
+    if len(components) <= 1:
+        return shortest_paths(graph, density_threshold, next_hop, decompose=False,
+                              engines=engines)
+
+    n = len(adj)
+    inf = float('inf')
+    dist = [[inf] * n for _ in range(n)]
+    nxt = array('l', [-1]) * (n * n) if next_hop else None
+    for v in range(n):
+        dist[v][v] = 0
+        if next_hop:
+            nxt[v * n + v] = v
+
+    # Изолированные вершины уже учтены диагональю
+    components = [c for c in components if len(c) > 1]
+    tasks = [(_Subgraph(adj, c), density_threshold, next_hop) for c in components]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if current_process().daemon:
+        workers = 1
+    work = sum(len(c) ** 3 for c in components)
+    if workers > 1 and len(tasks) > 1 and work >= PARALLEL_MIN_WORK:
+        with Pool(min(workers, len(tasks))) as pool:
+            results = pool.map(_component_paths, tasks)
+    else:
+        results = [_component_paths(task) for task in tasks]
+
+    comparisons = 0
+    for vertices, (local_dist, count, local_next, engine) in zip(components, results):
+        comparisons += count
+        if engines is not None:
+            engines.append(engine)
+        size = len(vertices)
+        for a, i in enumerate(vertices):
+            row = dist[i]
+            for b, d in enumerate(local_dist[a]):
+                row[vertices[b]] = d
+            if next_hop:
+                base = i * n
+                for b in range(size):
+                    hop = local_next[a * size + b]
+                    if hop >= 0:
+                        nxt[base + vertices[b]] = vertices[hop]
+
+    if next_hop:
+        dist = ShortestPaths(dist, nxt)
+    time_taken = time.time() - start_time
+    return dist, comparisons, time_taken
+
+
+# ============================================================================
+# ОРАКУЛ РАССТОЯНИЙ ПО ОРИЕНТИРАМ (ALT)
+# ============================================================================
+
+class LandmarkOracle:
+    """Ответы на запросы distance(u, v) без матрицы всех пар
+
+    Выбирается k ориентиров (landmarks) - каждый следующий как можно
+    дальше от уже выбранных - и для них считаются расстояния от ориентира
+    и до него (Дейкстра по прямым и обратным дугам), O(k·E log V) времени
+    и O(k·V) памяти. По неравенству треугольника
+    d(v, t) >= max(d(L, t) - d(L, v), d(v, L) - d(t, L)) - это допустимая
+    и согласованная эвристика A* (ALT), поэтому distance() точен, но
+    просматривает лишь часть графа. bounds() за O(k) даёт оценку снизу
+    и сверху без поиска.
+
+    Счётчики comparisons и time_taken накапливаются, как у
+    DynamicShortestPaths.
+    """
+
+    def __init__(self, graph, landmarks=16, seed=None, active=4):
+        """graph - матрица смежности или модель графа с to_csr();
+        active - сколько лучших ориентиров использует один запрос"""
+        start_time = time.time()
+        self.adj = adjacency_list(graph)
+        if any(w < 0 for row in self.adj for _, w in row):
+            raise ValueError("Оракул по ориентирам требует неотрицательных весов")
+        n = len(self.adj)
+        self.reverse = [[] for _ in range(n)]
+        for u, row in enumerate(self.adj):
+            for v, w in row:
+                self.reverse[v].append((u, w))
+        symmetric = all(sorted(a) == sorted(b) for a, b in zip(self.adj, self.reverse))
+
+        self.active = active
+        self.comparisons = 0
+        self.landmarks = []
+        self.forward = []   # forward[i][v] = d(L_i, v)
+        self.backward = []  # backward[i][v] = d(v, L_i)
+        if n == 0:
+            self.time_taken = time.time() - start_time
+            return
+
+        # Первый ориентир - самая дальняя вершина от случайной стартовой,
+        # следующие - самые дальние от всех выбранных (непокрытые
+        # компоненты связности, где расстояние inf, выбираются раньше)
+        inf = float('inf')
+        rng = random.Random(seed)
+        nearest, comparisons = dijkstra(self.adj, rng.randrange(n))
+        self.comparisons += comparisons
+        for _ in range(min(landmarks, n)):
+            landmark = max(range(n), key=nearest.__getitem__)
+            if nearest[landmark] == 0:
+                break
+            forward, comparisons = dijkstra(self.adj, landmark)
+            self.comparisons += comparisons
+            if symmetric:
+                backward = forward
+            else:
+                backward, comparisons = dijkstra(self.reverse, landmark)
+                self.comparisons += comparisons
+            self.landmarks.append(landmark)
+            self.forward.append(array('d', forward))
+            self.backward.append(array('d', backward))
+            if len(self.landmarks) == 1:
+                nearest = [inf] * n
+            nearest = [min(a, b) for a, b in zip(nearest, forward)]
+
+        self.time_taken = time.time() - start_time
+
+    def __len__(self):
+        return len(self.adj)
+
+    def _lower_bound(self, v, t, landmarks):
+        """Оценка снизу d(v, t) по ориентирам landmarks (inf - пути нет)"""
+        inf = float('inf')
+        best = 0
+        for i in landmarks:
+            forward, backward = self.forward[i], self.backward[i]
+            to_t, to_v = forward[t], forward[v]
+            if to_t != inf and to_v != inf:
+                best = max(best, to_t - to_v)
+            elif to_v != inf:
+                return inf  # L достигает v, но не t - значит, и v не достигает t
+            from_v, from_t = backward[v], backward[t]
+            if from_v != inf and from_t != inf:
+                best = max(best, from_v - from_t)
+            elif from_t != inf:
+                return inf  # t достигает L, а v - нет
+        return best
+
+    def bounds(self, u, v):
+        """Оценка (снизу, сверху) расстояния из u в v за O(k) без поиска"""
+        if u == v:
+            return 0, 0
+        everything = range(len(self.landmarks))
+        upper = min((self.backward[i][u] + self.forward[i][v] for i in everything),
+                    default=float('inf'))
+        lower = self._lower_bound(u, v, everything)
+        return lower, upper
+
+    def distance(self, source, target):
+        """Точное расстояние из source в target поиском A* с ALT-эвристикой"""
+        inf = float('inf')
+        if source == target:
+            return 0
+        # Для запроса берутся ориентиры с наибольшей оценкой в source
+        ranked = sorted(range(len(self.landmarks)),
+                        key=lambda i: self._lower_bound(source, target, (i,)), reverse=True)
+        chosen = ranked[:self.active]
+        if self._lower_bound(source, target, chosen) == inf:
+            self.comparisons += len(self.landmarks)
+            return inf
+
+        heuristic = {source: self._lower_bound(source, target, chosen), target: 0}
+        dist = {source: 0}
+        heap = [(heuristic[source], source)]
+        comparisons = len(self.landmarks)
+        while heap:
+            f, u = heapq.heappop(heap)
+            comparisons += 1
+            d = dist[u]
+            if f > d + heuristic[u]:
+                continue  # устаревшая запись кучи
+            if u == target:
+                break
+            for v, w in self.adj[u]:
+                comparisons += 1
+                nd = d + w
+                if nd < dist.get(v, inf):
+                    h = heuristic.get(v)
+                    if h is None:
+                        h = heuristic[v] = self._lower_bound(v, target, chosen)
+                    if h == inf:
+                        continue
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd + h, v))
+        self.comparisons += comparisons
+        return dist.get(target, inf)
+
+
+def landmark_report(graph, landmarks=8, queries=200, seed=None):
+    """Сравнение LandmarkOracle с точным floyd_warshall на небольшом графе
+
+    Returns:
+        dict: время floyd_warshall и построения оракула, среднее время
+        запроса, число расхождений distance() с точным ответом, средняя и
+        максимальная относительная ошибка оценки сверху bounds() и доля
+        сравнений A* относительно Дейкстры из той же вершины
+    """
+    matrix = graph.to_matrix() if hasattr(graph, "to_matrix") else graph
+    n = len(matrix)
+    exact, _, exact_time = floyd_warshall(matrix, backend="numpy" if np is not None else "python")
+    oracle = LandmarkOracle(graph, landmarks, seed)
+
+    rng = random.Random(seed)
+    pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(queries)] if n else []
+    mismatches = 0
+    errors = []
+    astar = plain = 0
+    query_time = 0.0
+    for u, v in pairs:
+        before = oracle.comparisons
+        start_time = time.perf_counter()
+        d = oracle.distance(u, v)
+        query_time += time.perf_counter() - start_time
+        astar += oracle.comparisons - before
+        plain += dijkstra(oracle.adj, u)[1]
+        if d != exact[u][v]:
+            mismatches += 1
+        upper = oracle.bounds(u, v)[1]
+        if 0 < exact[u][v] < float('inf'):
+            errors.append((upper - exact[u][v]) / exact[u][v])
+
+    return {
+        "vertices": n,
+        "landmarks": len(oracle.landmarks),
+        "exact_time": exact_time,
+        "build_time": oracle.time_taken,
+        "query_time": query_time / len(pairs) if pairs else 0.0,
+        "mismatches": mismatches,
+        "mean_error": sum(errors) / len(errors) if errors else 0.0,
+        "max_error": max(errors, default=0.0),
+        "work_ratio": astar / plain if plain else 0.0,
+    }
+
+
+# ============================================================================
+# СЕРИАЛИЗАЦИЯ РЕЗУЛЬТАТА ДЛЯ КЭША
+# ============================================================================
+
+# Заголовок blob: тип элементов dist ('q' или 'd') и число вершин
+_BLOB_HEADER = struct.Struct('<cI')
+
+
+def matrix_hash(graph):
+    """Канонический хеш матрицы смежности (SHA-256, hex)
+
+    Хешируются размер и строки, упакованные в int64 (или float64, если
+    в матрице есть дробные веса); ключ не зависит от того, список это,
+    кортеж или модель графа.
+    """
+    if hasattr(graph, "to_matrix"):
+        graph = graph.to_matrix()
+    n = len(graph)
+    integral = all(isinstance(w, int) for row in graph for w in row)
+    typecode = 'q' if integral else 'd'
+
+    digest = hashlib.sha256(_BLOB_HEADER.pack(typecode.encode(), n))
+    for row in graph:
+        digest.update(array(typecode, row).tobytes())
+    return digest.hexdigest()
+
+
+def pack_shortest_paths(paths):
+    """Упаковка ShortestPaths в компактный blob
+
+    Формат: заголовок, матрица расстояний n×n (int64 с DistanceMatrix.INF
+    вместо бесконечности или float64), матрица следующих вершин n×n (int32).
+    Порядок байт - как на текущей машине: blob предназначен для
+    локального кэша.
+    """
+    n = len(paths)
+    inf = float('inf')
+    if isinstance(paths.dist, DistanceMatrix):
+        dist = paths.dist.data  # буфер уже в формате blob, без прохода по ячейкам
+    elif all(isinstance(d, int) for row in paths for d in row if d != inf):
+        dist = DistanceMatrix.from_rows(paths).data
+    else:
+        dist = array('d', (d for row in paths for d in row))
+
+    if isinstance(paths.next_hop, array):
+        hops = array('i', paths.next_hop)
+    else:  # DynamicShortestPaths хранит строки отдельными массивами
+        hops = array('i', (h for row in paths.next_hop for h in row))
+
+    return _BLOB_HEADER.pack(dist.typecode.encode(), n) + dist.tobytes() + hops.tobytes()
+
+
+def unpack_shortest_paths(blob):
+    """Восстановление ShortestPaths из blob (см. pack_shortest_paths)"""
+    typecode, n = _BLOB_HEADER.unpack_from(blob)
+    typecode = typecode.decode()
+    offset = _BLOB_HEADER.size
+
+    dist = array(typecode)
+    dist.frombytes(blob[offset:offset + dist.itemsize * n * n])
+    offset += dist.itemsize * n * n
+    hops = array('i')
+    hops.frombytes(blob[offset:])
+    if len(dist) != n * n or len(hops) != n * n:
+        raise ValueError("Повреждённый blob кратчайших путей")
+
+    if typecode == 'q':
+        rows = DistanceMatrix(n, dist)
+    else:
+        rows = [dist[i * n:(i + 1) * n].tolist() for i in range(n)]
+    return ShortestPaths(rows, array('l', hops))
+
+
+# ============================================================================
+# ИНКРЕМЕНТАЛЬНОЕ ОБНОВЛЕНИЕ ПРИ РЕДАКТИРОВАНИИ ГРАФА
+# ============================================================================
+
+# Относительный допуск при сравнении дробных длин путей: один и тот же
+# путь, сложенный в другом порядке, может отличаться в последних битах
+PATH_TOLERANCE = 1e-9
+
+
+class DynamicShortestPaths(ShortestPaths):
+    """Кратчайшие пути, поддерживаемые в актуальном состоянии при правках графа
+
+    Добавление ребра или уменьшение веса обновляет матрицу за O(n²),
+    удаление ребра пересчитывает Дейкстрой только строки тех источников,
+    чьи кратчайшие пути могли проходить через это ребро. Полный пересчёт
+    выполняется только при создании и при отрицательных весах.
+
+    Счётчики comparisons и time_taken накапливаются между запусками,
+    их можно обнулить после вывода результата.
+    """
+
+    def __init__(self, graph=(), directed=False, paths=None):
+        """paths - готовый результат ShortestPaths для этого графа
+        (например, из кэша); тогда пути не пересчитываются"""
+        self.directed = directed
+        adjacency = adjacency_list(graph)
+        self.adj = [dict(row) for row in adjacency]  # adj[u] = {v: вес}
+        self.negative_edges = sum(1 for row in adjacency for _, w in row if w < 0)
+        self.comparisons = 0
+        self.time_taken = 0.0
+
+        start_time = time.time()
+        super().__init__([], [])
+        if paths is None:
+            self._rebuild()
+        else:
+            self._load(paths)
+        self.time_taken += time.time() - start_time
+
+    def _next(self, u, v):
+        return self.next_hop[u][v]
+
+    def to_matrix(self):
+        """Текущая матрица смежности"""
+        n = len(self.adj)
+        matrix = [[0] * n for _ in range(n)]
+        for u, neighbours in enumerate(self.adj):
+            for v, w in neighbours.items():
+                matrix[u][v] = w
+        return matrix
+
+    def _rebuild(self):
+        """Полный пересчёт (при создании и при отрицательных весах)"""
+        paths, comparisons, _ = shortest_paths(self.to_matrix(), next_hop=True)
+        self._load(paths)
+        self.comparisons += comparisons
+
+    def _load(self, paths):
+        """Загрузка результата ShortestPaths с плоской матрицей next_hop
+
+        DistanceMatrix (целые веса) берётся без копирования - её буфер
+        уходит в кэш и на вывод как есть; в списки строк она переводится
+        только при первой правке (_mutable_rows).
+        """
+        n = len(paths)
+        if n != len(self.adj):
+            raise ValueError("Размер результата не совпадает с числом вершин графа")
+        if isinstance(paths.dist, DistanceMatrix):
+            self.dist = paths.dist
+        else:
+            self.dist = [list(row) for row in paths.dist]
+        # Строки матрицы следующих вершин хранятся отдельными массивами,
+        # чтобы удаление вершины не требовало перестройки всей матрицы
+        self.next_hop = [paths.next_hop[i * n:(i + 1) * n] for i in range(n)]
+
+    def _mutable_rows(self):
+        """Списки строк вместо DistanceMatrix перед изменением матрицы"""
+        if isinstance(self.dist, DistanceMatrix):
+            self.dist = list(self.dist)
+        return self.dist
+
+    def _relax_through(self, u, v, w):
+        """Учёт нового ребра u->v с весом w >= 0 за O(n²)"""
+        inf = float('inf')
+        dist = self._mutable_rows()
+        row_v = dist[v]
+        comparisons = 0
+
+        for i, row_i in enumerate(dist):
+            comparisons += 1
+            d_iu = row_i[u]
+            if d_iu == inf:
+                continue
+            base = d_iu + w
+            # Если до v уже не дальше, то и через v путь не улучшится
+            if row_i[v] <= base:
+                continue
+            hop = v if i == u else self.next_hop[i][u]
+            next_i = self.next_hop[i]
+            for j, d_vj in enumerate(row_v):
+                comparisons += 1
+                if base + d_vj < row_i[j]:
+                    row_i[j] = base + d_vj
+                    next_i[j] = hop
+
+        self.comparisons += comparisons
+
+    def _remove_arcs(self, arcs):
+        """Удаление дуг [(u, v), ...] с пересчётом только затронутых строк"""
+        inf = float('inf')
+        affected = set()
+        removed_negative = False
+        for u, v in arcs:
+            w = self.adj[u].pop(v)
+            if w < 0:
+                self.negative_edges -= 1
+                removed_negative = True
+            # Источники, для которых дуга лежала на кратчайшем пути. Сравнение
+            # с допуском: лишняя строка только пересчитается, а пропущенная
+            # осталась бы устаревшей
+            for s, row in enumerate(self.dist):
+                self.comparisons += 1
+                d_su = row[u]
+                if d_su != inf and d_su + w - row[v] <= PATH_TOLERANCE * (abs(d_su) + abs(w)):
+                    affected.add(s)
+
+        if self.negative_edges or removed_negative:
+            self._rebuild()
+            return
+
+        n = len(self.adj)
+        adjacency = [list(neighbours.items()) for neighbours in self.adj]
+        self._mutable_rows()
+        for s in affected:
+            first_hop = [-1] * n
+            row, comparisons = dijkstra(adjacency, s, first_hop)
+            self.dist[s] = row
+            self.next_hop[s] = array('l', first_hop)
+            self.comparisons += comparisons
+
+    def _arcs(self, u, v):
+        return [(u, v)] if self.directed else [(u, v), (v, u)]
+
+    def add_vertex(self):
+        """Добавление изолированной вершины, возвращает её индекс"""
+        inf = float('inf')
+        index = len(self.adj)
+        self.adj.append({})
+        for row, next_row in zip(self._mutable_rows(), self.next_hop):
+            row.append(inf)
+            next_row.append(-1)
+        self.dist.append([inf] * index + [0])
+        self.next_hop.append(array('l', [-1] * index + [index]))
+        return index
+
+    def set_edge(self, u, v, weight):
+        """Добавление ребра или изменение его веса
+
+        Отрицательный вес ведёт к полному пересчёту; если правка создаёт
+        цикл отрицательного веса, возникает ValueError, а граф и матрица
+        остаются такими, какими были до правки.
+        """
+        if u == v or weight == 0:
+            raise ValueError("Петли и рёбра нулевого веса не поддерживаются")
+        start_time = time.time()
+
+        arcs = self._arcs(u, v)
+        snapshot = {(a, b): self.adj[a].get(b) for a, b in arcs}
+        negative_edges = self.negative_edges
+        old = self.adj[u].get(v)
+        if old is not None and weight > old:
+            # Увеличение веса = удаление ребра и вставка с новым весом
+            self._remove_arcs(arcs)
+
+        for a, b in arcs:
+            previous = self.adj[a].get(b)
+            if previous is not None and previous < 0:
+                self.negative_edges -= 1
+            self.adj[a][b] = weight
+            if weight < 0:
+                self.negative_edges += 1
+
+        if self.negative_edges:
+            try:
+                self._rebuild()
+            except ValueError:
+                # Откат весов. Матрица не менялась: _rebuild падает до загрузки
+                # результата, а увеличение веса цикла отрицательного веса не создаёт
+                for (a, b), w in snapshot.items():
+                    if w is None:
+                        del self.adj[a][b]
+                    else:
+                        self.adj[a][b] = w
+                self.negative_edges = negative_edges
+                raise
+        else:
+            for a, b in self._arcs(u, v):
+                self._relax_through(a, b, weight)
+
+        self.time_taken += time.time() - start_time
+
+    def remove_edge(self, u, v):
+        """Удаление ребра"""
+        start_time = time.time()
+        self._remove_arcs(self._arcs(u, v))
+        self.time_taken += time.time() - start_time
+
+    def remove_vertex(self, index):
+        """Удаление вершины со всеми рёбрами; индексы после неё сдвигаются"""
+        start_time = time.time()
+
+        arcs = [(index, v) for v in self.adj[index]]
+        arcs += [(u, index) for u, neighbours in enumerate(self.adj) if index in neighbours]
+        self._remove_arcs(arcs)
+
+        del self.adj[index]
+        for neighbours in self.adj:
+            for v in sorted(v for v in neighbours if v > index):
+                neighbours[v - 1] = neighbours.pop(v)
+        self._mutable_rows()
+        del self.dist[index]
+        del self.next_hop[index]
+        for row in self.dist:
+            del row[index]
+        for s, next_row in enumerate(self.next_hop):
+            del next_row[index]
+            self.next_hop[s] = array('l', (h - 1 if h > index else h for h in next_row))
+
+        self.time_taken += time.time() - start_time
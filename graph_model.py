@@ -0,0 +1,230 @@
+"""
+Модель неориентированного взвешенного графа для canvas и алгоритмов
+"""
+import math
+from array import array
+
+
+class SpatialGrid:
+    """Равномерная сетка для поиска точек рядом с координатами
+
+    Плоскость делится на квадратные ячейки cell_size×cell_size, каждая точка
+    хранится в своей ячейке. Запрос просматривает только ячейки, пересекающие
+    круг поиска, поэтому при ограниченной плотности точек он выполняется
+    за O(1) в среднем независимо от их общего количества.
+    """
+
+    def __init__(self, cell_size=40):
+        if cell_size <= 0:
+            raise ValueError("Размер ячейки должен быть положительным")
+        self.cell_size = cell_size
+        self.cells = {}  # (cx, cy) -> {id: (x, y)}
+        self.points = {}  # id -> (x, y)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell(self, x, y):
+        return (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+
+    def insert(self, point_id, x, y):
+        self.points[point_id] = (x, y)
+        self.cells.setdefault(self._cell(x, y), {})[point_id] = (x, y)
+
+    def remove(self, point_id):
+        x, y = self.points.pop(point_id)
+        cell = self._cell(x, y)
+        del self.cells[cell][point_id]
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def move(self, point_id, x, y):
+        self.remove(point_id)
+        self.insert(point_id, x, y)
+
+    def nearest(self, x, y, max_distance):
+        """Ближайшая точка не дальше max_distance: (id, расстояние) или None"""
+        cx0, cy0 = self._cell(x - max_distance, y - max_distance)
+        cx1, cy1 = self._cell(x + max_distance, y + max_distance)
+
+        best = None
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for point_id, (px, py) in self.cells.get((cx, cy), {}).items():
+                    distance = math.hypot(x - px, y - py)
+                    if distance <= max_distance and (best is None or distance < best[1]):
+                        best = (point_id, distance)
+        return best
+
+
+class Graph:
+    """Граф с хешированной смежностью: поиск ребра и вставка за O(1)
+
+    Вершины идентифицируются целыми id. Порядок вершин (порядок добавления)
+    задаёт индексы строк в to_matrix() и to_csr(). Координаты вершин
+    дополнительно индексируются сеткой SpatialGrid для поиска по клику.
+    """
+
+    def __init__(self, cell_size=40):
+        self.positions = {}  # id -> (x, y)
+        self.adj = {}  # id -> {id соседа: вес}
+        self.weights = {}  # (min id, max id) -> вес, каждое ребро один раз
+        self.grid = SpatialGrid(cell_size)
+        self.next_id = 0
+        self._index = None  # id -> индекс, перестраивается после удаления
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, vertex_id):
+        return vertex_id in self.positions
+
+    @property
+    def edge_count(self):
+        return len(self.weights)
+
+    # ------------------------------------------------------------------
+    # Вершины
+    # ------------------------------------------------------------------
+
+    def add_vertex(self, x, y, vertex_id=None):
+        """Добавление вершины, возвращает её id"""
+        if vertex_id is None:
+            vertex_id = self.next_id
+        if vertex_id in self.positions:
+            raise ValueError(f"Вершина {vertex_id} уже существует")
+
+        if self._index is not None:
+            self._index[vertex_id] = len(self.positions)
+        self.positions[vertex_id] = (x, y)
+        self.adj[vertex_id] = {}
+        self.grid.insert(vertex_id, x, y)
+        self.next_id = max(self.next_id, vertex_id + 1)
+        return vertex_id
+
+    def remove_vertex(self, vertex_id):
+        """Удаление вершины и инцидентных рёбер за O(степени)"""
+        for neighbour in self.adj.pop(vertex_id):
+            del self.adj[neighbour][vertex_id]
+            del self.weights[_edge_key(vertex_id, neighbour)]
+        del self.positions[vertex_id]
+        self.grid.remove(vertex_id)
+        self._index = None
+
+    def move_vertex(self, vertex_id, x, y):
+        """Перемещение вершины"""
+        if vertex_id not in self.positions:
+            raise KeyError(vertex_id)
+        self.positions[vertex_id] = (x, y)
+        self.grid.move(vertex_id, x, y)
+
+    def vertex_at(self, x, y, radius):
+        """Ближайшая вершина не дальше radius от точки или None, O(1) в среднем"""
+        found = self.grid.nearest(x, y, radius)
+        return found[0] if found else None
+
+    def vertices(self):
+        """Список (x, y, id) в порядке индексов"""
+        return [(x, y, vid) for vid, (x, y) in self.positions.items()]
+
+    def vertex_ids(self):
+        """Список id в порядке индексов"""
+        return list(self.positions)
+
+    def index_of(self, vertex_id):
+        """Индекс вершины в матрице смежности"""
+        if self._index is None:
+            self._index = {vid: idx for idx, vid in enumerate(self.positions)}
+        return self._index[vertex_id]
+
+    # ------------------------------------------------------------------
+    # Рёбра
+    # ------------------------------------------------------------------
+
+    def add_edge(self, from_id, to_id, weight=1):
+        """Добавление ребра; False для петли, дубликата или нулевого веса"""
+        if from_id == to_id or weight == 0:
+            return False
+        if to_id in self.adj[from_id]:
+            return False
+
+        self.adj[from_id][to_id] = weight
+        self.adj[to_id][from_id] = weight
+        self.weights[_edge_key(from_id, to_id)] = weight
+        return True
+
+    def remove_edge(self, from_id, to_id):
+        """Удаление ребра"""
+        del self.adj[from_id][to_id]
+        del self.adj[to_id][from_id]
+        del self.weights[_edge_key(from_id, to_id)]
+
+    def has_edge(self, from_id, to_id):
+        return to_id in self.adj.get(from_id, ())
+
+    def weight(self, from_id, to_id):
+        return self.adj[from_id][to_id]
+
+    def edges(self):
+        """Список (from_id, to_id, вес) - каждое ребро один раз"""
+        return [(u, v, w) for (u, v), w in self.weights.items()]
+
+    # ------------------------------------------------------------------
+    # Экспорт
+    # ------------------------------------------------------------------
+
+    def to_matrix(self):
+        """Плотная матрица смежности n×n (0 - нет ребра)"""
+        n = len(self.positions)
+        matrix = [[0] * n for _ in range(n)]
+        for (u, v), w in self.weights.items():
+            i, j = self.index_of(u), self.index_of(v)
+            matrix[i][j] = w
+            matrix[j][i] = w
+        return matrix
+
+    def to_csr(self):
+        """Экспорт в формат CSR без плотной матрицы, O(V + E)
+
+        Returns:
+            (indptr, indices, weights) - соседи вершины с индексом i лежат
+            в indices[indptr[i]:indptr[i + 1]], веса - в том же диапазоне weights
+        """
+        indptr = array('l', [0])
+        indices = array('l')
+        values = []
+        for vid in self.positions:
+            for neighbour, w in self.adj[vid].items():
+                indices.append(self.index_of(neighbour))
+                values.append(w)
+            indptr.append(len(indices))
+
+        try:
+            weights = array('q', values)
+        except TypeError:
+            weights = array('d', values)
+        return indptr, indices, weights
+
+    @classmethod
+    def from_matrix(cls, matrix, positions=None, cell_size=40):
+        """Построение графа из симметричной матрицы смежности
+
+        Args:
+            matrix: матрица смежности (0 - нет ребра)
+            positions: координаты вершин [(x, y), ...] (по умолчанию (0, 0))
+            cell_size: размер ячейки сетки для поиска вершин по координатам
+        """
+        graph = cls(cell_size)
+        n = len(matrix)
+        for i in range(n):
+            x, y = positions[i] if positions else (0, 0)
+            graph.add_vertex(x, y, i)
+        for i in range(n):
+            for j in range(i + 1, n):
+                if matrix[i][j] != 0:
+                    graph.add_edge(i, j, matrix[i][j])
+        return graph
+
+
+def _edge_key(u, v):
+    return (u, v) if u < v else (v, u)
@@ -0,0 +1,394 @@
+"""
+Раскладка графа на плоскости: круг и силовой алгоритм Фрюхтермана-Рейнгольда
+
+Отталкивание всех пар вершин считается приближённо по квадродереву
+Барнса-Хата за O(n log n) на итерацию; для небольших графов при наличии
+NumPy - точно. С NumPy вся итерация векторизована (квадродерево строится
+по кодам Мортона и обходится по уровням сразу для всех вершин), без него
+остаётся чистый Python. Раскладка выполняется в фоновом потоке
+LayoutWorker, который отдаёт кадры координат через очередь.
+"""
+import math
+import queue
+import random
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # NumPy необязателен: остаётся чистый Python
+    np = None
+
+
+# До этого числа вершин точное векторизованное отталкивание (O(n²) в NumPy)
+# быстрее обхода квадродерева в Python
+EXACT_LIMIT = 1000
+# Глубина квадродерева ограничена, совпадающие точки сливаются в один лист
+MAX_DEPTH = 24
+
+
+def circle_layout(n, width=800, height=600):
+    """Вершины по кругу в центре области width×height"""
+    center_x, center_y = width / 2, height / 2
+    radius = min(width, height) / 3
+    return [(center_x + radius * math.cos(2 * math.pi * i / n),
+             center_y + radius * math.sin(2 * math.pi * i / n)) for i in range(n)]
+
+
+def fit_to_box(positions, width, height, margin=40):
+    """Равномерное масштабирование координат в прямоугольник с отступом"""
+    if not positions:
+        return []
+    xs = [x for x, _ in positions]
+    ys = [y for _, y in positions]
+    min_x, min_y = min(xs), min(ys)
+    span = max(max(xs) - min_x, max(ys) - min_y)
+    inner_w, inner_h = max(width - 2 * margin, 1), max(height - 2 * margin, 1)
+    scale = min(inner_w, inner_h) / span if span > 0 else 0
+    offset_x = margin + (inner_w - (max(xs) - min_x) * scale) / 2
+    offset_y = margin + (inner_h - (max(ys) - min_y) * scale) / 2
+    return [(offset_x + (x - min_x) * scale, offset_y + (y - min_y) * scale)
+            for x, y in positions]
+
+
+# ============================================================================
+# Отталкивание
+# ============================================================================
+
+def _build_quadtree(xs, ys):
+    """Квадродерево в плоских списках: узел i - квадрат (x0, y0, size),
+    число точек mass, суммы координат sum_x/sum_y, первый из четырёх
+    потомков child (-1 у листа), точка листа body (-1 - пусто, -2 - несколько)
+    """
+    x0, y0 = min(xs), min(ys)
+    size = max(max(xs) - x0, max(ys) - y0, 1e-9) * 1.0001
+    nx, ny, nsize = [x0], [y0], [size]
+    mass, sum_x, sum_y = [0], [0.0], [0.0]
+    child, body = [-1], [-1]
+
+    def quadrant(node, px, py):
+        half = nsize[node] / 2
+        return (px >= nx[node] + half) + 2 * (py >= ny[node] + half)
+
+    for i, (px, py) in enumerate(zip(xs, ys)):
+        node, depth = 0, 0
+        while True:
+            mass[node] += 1
+            sum_x[node] += px
+            sum_y[node] += py
+            if child[node] >= 0:
+                node = child[node] + quadrant(node, px, py)
+                depth += 1
+                continue
+            if mass[node] == 1:
+                body[node] = i
+                break
+            if depth >= MAX_DEPTH:
+                body[node] = -2
+                break
+
+            # Делим лист: прежняя точка переносится в своего потомка
+            first = len(mass)
+            half = nsize[node] / 2
+            for q in range(4):
+                nx.append(nx[node] + (q & 1) * half)
+                ny.append(ny[node] + (q >> 1) * half)
+                nsize.append(half)
+                mass.append(0)
+                sum_x.append(0.0)
+                sum_y.append(0.0)
+                child.append(-1)
+                body.append(-1)
+            child[node] = first
+            old = body[node]
+            body[node] = -1
+            target = first + quadrant(node, xs[old], ys[old])
+            mass[target], sum_x[target], sum_y[target] = 1, xs[old], ys[old]
+            body[target] = old
+
+            node = first + quadrant(node, px, py)
+            depth += 1
+
+    return nsize, mass, sum_x, sum_y, child, body
+
+
+def _repulsion_barnes_hut(xs, ys, k2, theta=0.9):
+    """Силы отталкивания k²/d с группировкой дальних вершин, O(n log n)"""
+    nsize, mass, sum_x, sum_y, child, body = _build_quadtree(xs, ys)
+    theta2 = theta * theta
+    n = len(xs)
+    fx, fy = [0.0] * n, [0.0] * n
+
+    for i in range(n):
+        px, py = xs[i], ys[i]
+        ax = ay = 0.0
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            m = mass[node]
+            if m == 0 or body[node] == i:
+                continue
+            dx = px - sum_x[node] / m
+            dy = py - sum_y[node] / m
+            d2 = dx * dx + dy * dy
+            # Узел достаточно далеко (size/d < theta) или это лист - одна сила
+            if child[node] < 0 or nsize[node] * nsize[node] < theta2 * d2:
+                if d2 < 1e-9:
+                    continue
+                f = k2 * m / d2
+                ax += dx * f
+                ay += dy * f
+            else:
+                c = child[node]
+                stack.extend((c, c + 1, c + 2, c + 3))
+        fx[i], fy[i] = ax, ay
+    return fx, fy
+
+
+def _repulsion_numpy(x, y, k2, theta=None, chunk=512):
+    """Точное отталкивание всех пар блоками строк в NumPy, O(n²)
+
+    theta не используется - параметр для единой сигнатуры с Барнсом-Хатом.
+    """
+    fx = np.empty_like(x)
+    fy = np.empty_like(y)
+    for start in range(0, len(x), chunk):
+        dx = x[start:start + chunk, None] - x[None, :]
+        dy = y[start:start + chunk, None] - y[None, :]
+        d2 = dx * dx + dy * dy
+        d2[d2 < 1e-9] = np.inf  # сама вершина и совпадающие точки
+        f = k2 / d2
+        fx[start:start + chunk] = (dx * f).sum(axis=1)
+        fy[start:start + chunk] = (dy * f).sum(axis=1)
+    return fx, fy
+
+
+def _spread_bits(v):
+    """Биты числа через один (0b111 -> 0b10101) для кода Мортона"""
+    v = v & 0xFFFFFFFF
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF),
+                        (4, 0x0F0F0F0F0F0F0F0F), (2, 0x3333333333333333),
+                        (1, 0x5555555555555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def _quadtree_levels(x, y):
+    """Квадродерево в NumPy по уровням, как в _build_quadtree
+
+    Точки упорядочиваются по коду Мортона ячейки глубины MAX_DEPTH, поэтому
+    узел любого уровня - непрерывный отрезок этого порядка, а его потомки -
+    непрерывный отрезок узлов следующего уровня. Уровни строятся, пока есть
+    узлы с несколькими точками.
+
+    Returns:
+        (size, levels): сторона корня и список по уровням кортежей
+        (mass, center_x, center_y, child_lo, child_hi)
+    """
+    n = len(x)
+    x0, y0 = x.min(), y.min()
+    size = max(x.max() - x0, y.max() - y0, 1e-9) * 1.0001
+    cells = 1 << MAX_DEPTH
+    qx = np.minimum((x - x0) * (cells / size), cells - 1).astype(np.uint64)
+    qy = np.minimum((y - y0) * (cells / size), cells - 1).astype(np.uint64)
+    code = _spread_bits(qx) | (_spread_bits(qy) << np.uint64(1))
+    order = np.argsort(code, kind='stable')
+    code, sx, sy = code[order], x[order], y[order]
+
+    levels = []
+    prev_starts = None
+    for depth in range(MAX_DEPTH + 1):
+        keys = code >> np.uint64(2 * (MAX_DEPTH - depth))
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        mass = np.diff(np.r_[starts, n])
+        center_x = np.add.reduceat(sx, starts) / mass
+        center_y = np.add.reduceat(sy, starts) / mass
+        if prev_starts is not None:
+            # Отрезки потомков узлов предыдущего уровня
+            lo = np.searchsorted(starts, prev_starts)
+            hi = np.r_[lo[1:], len(starts)]
+            levels[-1] = levels[-1][:3] + (lo, hi)
+        levels.append((mass, center_x, center_y, None, None))
+        prev_starts = starts
+        if mass.max() == 1:
+            break
+    return size, levels
+
+
+def _repulsion_barnes_hut_numpy(x, y, k2, theta=0.9):
+    """Барнс-Хат в NumPy: обход квадродерева по уровням сразу для всех вершин
+
+    Фронт - пары (вершина, узел). На каждом уровне далёкие узлы и листья
+    дают силу одной операцией, а близкие внутренние узлы заменяются парами
+    с их потомками. Результат совпадает с _repulsion_barnes_hut с точностью
+    до округления координат до ячейки глубины MAX_DEPTH.
+    """
+    n = len(x)
+    size, levels = _quadtree_levels(x, y)
+    theta2 = theta * theta
+    fx = np.zeros(n)
+    fy = np.zeros(n)
+    point = np.arange(n)
+    node = np.zeros(n, dtype=np.intp)
+
+    for depth, (mass, center_x, center_y, lo, hi) in enumerate(levels):
+        m = mass[node]
+        dx = x[point] - center_x[node]
+        dy = y[point] - center_y[node]
+        d2 = dx * dx + dy * dy
+        side = size / (1 << depth)
+        # Раскрываются внутренние узлы, для которых size/d >= theta
+        if lo is None:
+            expand = np.zeros(len(node), dtype=bool)
+        else:
+            expand = (m > 1) & (side * side >= theta2 * d2)
+        # Сама вершина (и совпадающие с ней точки) силы не дают
+        apply = ~expand & (d2 >= 1e-9)
+        f = k2 * m[apply] / d2[apply]
+        fx += np.bincount(point[apply], dx[apply] * f, minlength=n)
+        fy += np.bincount(point[apply], dy[apply] * f, minlength=n)
+        if not expand.any():
+            break
+
+        point, node = point[expand], node[expand]
+        first, count = lo[node], hi[node] - lo[node]
+        offsets = np.cumsum(count) - count
+        point = np.repeat(point, count)
+        node = np.repeat(first - offsets, count) + np.arange(len(point))
+    return fx, fy
+
+
+# ============================================================================
+# Силовая раскладка
+# ============================================================================
+
+def force_layout_frames(n, edges, positions=None, iterations=100, theta=0.9, seed=None):
+    """Итерации раскладки Фрюхтермана-Рейнгольда, генератор кадров
+
+    Args:
+        n: число вершин
+        edges: пары индексов (u, v, ...) - лишние элементы (вес) игнорируются
+        positions: начальные координаты [(x, y), ...] (по умолчанию случайные)
+        iterations: число итераций (температура убывает линейно до нуля)
+        theta: точность Барнса-Хата (меньше - точнее и медленнее)
+        seed: seed случайного начального размещения
+
+    Yields:
+        list: координаты [(x, y), ...] после каждой итерации в условных единицах
+        (характерная длина ребра - 1); для экрана - fit_to_box()
+    """
+    if n == 0:
+        return
+    side = math.sqrt(n)
+    if positions is None:
+        rng = random.Random(seed)
+        positions = [(rng.uniform(0, side), rng.uniform(0, side)) for _ in range(n)]
+    else:
+        positions = fit_to_box(positions, side, side, margin=0)
+    xs = [x for x, _ in positions]
+    ys = [y for _, y in positions]
+    pairs = [(u, v) for u, v, *_ in edges if u != v]
+    temperature = side / 10
+
+    if np is not None:
+        yield from _frames_numpy(xs, ys, pairs, iterations, theta, temperature)
+    else:
+        yield from _frames_python(xs, ys, pairs, iterations, theta, temperature)
+
+
+def _frames_numpy(xs, ys, pairs, iterations, theta, temperature, k=1.0):
+    """Итерации раскладки на массивах NumPy (см. _frames_python)"""
+    x = np.array(xs, dtype=float)
+    y = np.array(ys, dtype=float)
+    n = len(x)
+    edges = np.array(pairs, dtype=np.intp).reshape(-1, 2)
+    u, v = edges[:, 0], edges[:, 1]
+    repulsion = _repulsion_numpy if n <= EXACT_LIMIT else _repulsion_barnes_hut_numpy
+
+    for step in range(iterations):
+        fx, fy = repulsion(x, y, k * k, theta)
+
+        # Притяжение вдоль рёбер d²/k
+        dx = x[u] - x[v]
+        dy = y[u] - y[v]
+        f = np.sqrt(dx * dx + dy * dy) / k
+        fx += np.bincount(v, dx * f, minlength=n) - np.bincount(u, dx * f, minlength=n)
+        fy += np.bincount(v, dy * f, minlength=n) - np.bincount(u, dy * f, minlength=n)
+
+        # Смещение ограничено текущей температурой
+        limit = temperature * (1 - step / iterations)
+        length = np.sqrt(fx * fx + fy * fy)
+        moving = length > 0
+        scale = np.minimum(length[moving], limit) / length[moving]
+        x[moving] += fx[moving] * scale
+        y[moving] += fy[moving] * scale
+
+        yield list(zip(x.tolist(), y.tolist()))
+
+
+def _frames_python(xs, ys, pairs, iterations, theta, temperature, k=1.0):
+    """Итерации раскладки на списках: отталкивание Барнса-Хата, притяжение
+    вдоль рёбер и смещение, ограниченное температурой"""
+    n = len(xs)
+    for step in range(iterations):
+        fx, fy = _repulsion_barnes_hut(xs, ys, k * k, theta)
+
+        # Притяжение вдоль рёбер d²/k
+        for u, v in pairs:
+            dx = xs[u] - xs[v]
+            dy = ys[u] - ys[v]
+            f = math.sqrt(dx * dx + dy * dy) / k
+            fx[u] -= dx * f
+            fy[u] -= dy * f
+            fx[v] += dx * f
+            fy[v] += dy * f
+
+        # Смещение ограничено текущей температурой
+        limit = temperature * (1 - step / iterations)
+        for i in range(n):
+            length = math.sqrt(fx[i] * fx[i] + fy[i] * fy[i])
+            if length > 0:
+                scale = min(length, limit) / length
+                xs[i] += fx[i] * scale
+                ys[i] += fy[i] * scale
+
+        yield list(zip(xs, ys))
+
+
+def force_layout(n, edges, positions=None, iterations=100, theta=0.9, seed=None):
+    """Итоговые координаты силовой раскладки (последний кадр)"""
+    frame = positions or []
+    for frame in force_layout_frames(n, edges, positions, iterations, theta, seed):
+        pass
+    return frame
+
+
+class LayoutWorker(threading.Thread):
+    """Фоновая силовая раскладка
+
+    Кадры, уже вписанные в область width×height, складываются в очередь
+    frames; после последнего кадра кладётся None. Tkinter не потокобезопасен,
+    поэтому кадры забирает и применяет главный поток (GraphCanvas.poll_layout).
+    """
+
+    def __init__(self, n, edges, width, height, positions=None, iterations=100, margin=40):
+        super().__init__(daemon=True)
+        self.n = n
+        self.edges = edges
+        self.width = width
+        self.height = height
+        self.positions = positions
+        self.iterations = iterations
+        self.margin = margin
+        self.frames = queue.Queue()
+        self.cancelled = threading.Event()
+
+    def run(self):
+        for frame in force_layout_frames(self.n, self.edges, self.positions, self.iterations):
+            if self.cancelled.is_set():
+                return
+            self.frames.put(fit_to_box(frame, self.width, self.height, self.margin))
+        self.frames.put(None)
+
+    def cancel(self):
+        """Остановка после текущей итерации"""
+        self.cancelled.set()
@@ -1,63 +1,108 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, simpledialog
-import math
+import queue
 import random
-from graph import floyd_warshall
-from matrix import matrix_multiplication, generate_matrix
+from generators import gnm
+from layout import LayoutWorker, circle_layout
+from graph import (DistanceMatrix, DynamicShortestPaths, LazyDistanceMatrix, choose_engine,
+                   connected_components, ENGINE_NAMES, matrix_hash, pack_shortest_paths,
+                   unpack_shortest_paths, transitive_closure)
+from graph_model import Graph
+from matrix import matrix_multiplication, generate_matrix, strassen_levels, MULTIPLY_BACKENDS
 from sort import compare_sorts
-from database import db
+from database import get_db
 
 class GraphCanvas:
+    LAYOUT_POLL_MS = 40  # период опроса кадров фоновой раскладки
+    
     def __init__(self, canvas, width=800, height=600):
         self.canvas = canvas
         self.width = width
         self.height = height
-        self.vertices = []  # [(x, y, id), ...]
-        self.edges = []  # [(from_id, to_id, weight), ...]
-        self.vertex_id_counter = 0
         self.selected_vertex = None
         self.edge_start = None
-        self.mode = "add_vertex"  # "add_vertex", "add_edge", "delete"
+        self.mode = "add_vertex"  # "add_vertex", "add_edge", "delete", "distances"
         self.vertex_radius = 20
+        # Вершины и рёбра с поиском ребра за O(1); ячейка сетки поиска
+        # по координатам - диаметр вершины
+        self.graph = Graph(cell_size=self.vertex_radius * 2)
+        self.highlighted_path = []  # [vid, ...] - выделенный маршрут
+        self.path_edges = set()  # {frozenset((u, v)), ...} - рёбра маршрута
+        self.apsp = None  # DynamicShortestPaths после первого запуска алгоритма
+        self.lazy_rows = None  # LazyDistanceMatrix для запросов по клику
+        self.on_vertex_query = None  # обработчик клика в режиме "distances"
+        
+        # Элементы canvas создаются один раз и дальше обновляются на месте
+        self.vertex_items = {}  # vid -> (овал, подпись)
+        self.edge_items = {}  # frozenset((u, v)) -> (линия, фон веса, вес)
+        self.pending_redraw = None  # id отложенного вызова after_idle
+        self.full_redraw = False
+        self.moved_vertices = set()
+        self.layout_worker = None  # фоновая силовая раскладка
+        self.layout_ids = []  # id вершин в порядке индексов раскладки
         
     def add_vertex(self, x, y):
         """Добавление вершины"""
         # Проверяем, не слишком ли близко к существующим вершинам
-        for vx, vy, vid in self.vertices:
-            if math.sqrt((x - vx)**2 + (y - vy)**2) < self.vertex_radius * 2:
-                return False
+        nearest = self.graph.grid.nearest(x, y, self.vertex_radius * 2)
+        if nearest is not None and nearest[1] < self.vertex_radius * 2:
+            return False
         
-        self.vertices.append((x, y, self.vertex_id_counter))
-        self.vertex_id_counter += 1
-        self.draw()
+        vid = self.graph.add_vertex(x, y)
+        self.lazy_rows = None
+        if self.apsp is not None:
+            self.apsp.add_vertex()
+        self.create_vertex_items(vid)
         return True
     
     def get_vertex_at(self, x, y):
         """Получить вершину по координатам клика"""
-        for vx, vy, vid in self.vertices:
-            if math.sqrt((x - vx)**2 + (y - vy)**2) <= self.vertex_radius:
-                return vid
-        return None
+        return self.graph.vertex_at(x, y, self.vertex_radius)
     
     def add_edge(self, from_id, to_id, weight=1):
-        """Добавление ребра"""
-        if from_id == to_id:
+        """Добавление ребра (дубликаты отсекаются за O(1))"""
+        if not self.graph.add_edge(from_id, to_id, weight):
             return False
         
-        # Проверяем, не существует ли уже такое ребро
-        for f, t, w in self.edges:
-            if (f == from_id and t == to_id) or (f == to_id and t == from_id):
-                return False
-        
-        self.edges.append((from_id, to_id, weight))
-        self.draw()
+        self.lazy_rows = None
+        if self.apsp is not None:
+            try:
+                self.apsp.set_edge(self.graph.index_of(from_id), self.graph.index_of(to_id), weight)
+            except ValueError:
+                # Отрицательный цикл: пути не определены, ошибку покажет
+                # следующий запуск алгоритма
+                self.apsp = None
+        self.create_edge_items(from_id, to_id, weight, lower=True)
         return True
     
     def delete_vertex(self, vertex_id):
         """Удаление вершины и всех связанных рёбер"""
-        self.vertices = [(x, y, vid) for x, y, vid in self.vertices if vid != vertex_id]
-        self.edges = [(f, t, w) for f, t, w in self.edges if f != vertex_id and t != vertex_id]
-        self.draw()
+        self.lazy_rows = None
+        if self.apsp is not None:
+            self.apsp.remove_vertex(self.graph.index_of(vertex_id))
+        
+        for neighbour in self.graph.adj[vertex_id]:
+            for item in self.edge_items.pop(frozenset((vertex_id, neighbour)), ()):
+                self.canvas.delete(item)
+        for item in self.vertex_items.pop(vertex_id, ()):
+            self.canvas.delete(item)
+        if self.selected_vertex == vertex_id:
+            self.selected_vertex = None
+        self.graph.remove_vertex(vertex_id)
+    
+    def move_vertex(self, vertex_id, x, y):
+        """Перемещение вершины; canvas обновляется при ближайшем простое"""
+        self.graph.move_vertex(vertex_id, x, y)
+        self.moved_vertices.add(vertex_id)
+        self.schedule_redraw()
+    
+    def select_vertex(self, vertex_id):
+        """Выделение вершины (перекрашиваются только две вершины)"""
+        previous = self.selected_vertex
+        self.selected_vertex = vertex_id
+        for vid in (previous, vertex_id):
+            if vid in self.vertex_items:
+                self.canvas.itemconfig(self.vertex_items[vid][0], fill=self.vertex_color(vid))
     
     def on_click(self, event):
         """Обработка клика на canvas"""
@@ -70,8 +115,7 @@ class GraphCanvas:
             if vid is not None:
                 if self.edge_start is None:
                     self.edge_start = vid
-                    self.selected_vertex = vid
-                    self.draw()
+                    self.select_vertex(vid)
                 else:
                     if self.edge_start != vid:
                         # Запрашиваем вес ребра
@@ -79,12 +123,17 @@ class GraphCanvas:
                         if weight is not None:
                             self.add_edge(self.edge_start, vid, weight)
                         self.edge_start = None
-                        self.selected_vertex = None
-                        self.draw()
+                        self.select_vertex(None)
         elif self.mode == "delete":
             vid = self.get_vertex_at(x, y)
             if vid is not None:
                 self.delete_vertex(vid)
+        elif self.mode == "distances":
+            vid = self.get_vertex_at(x, y)
+            if vid is not None:
+                self.select_vertex(vid)
+                if self.on_vertex_query is not None:
+                    self.on_vertex_query(vid)
     
     def get_edge_weight(self):
         """Диалог для ввода веса ребра"""
@@ -136,94 +185,216 @@ class GraphCanvas:
     
     def clear(self):
         """Очистка графа"""
-        self.vertices = []
-        self.edges = []
-        self.vertex_id_counter = 0
+        self.stop_layout()
+        self.graph = Graph(cell_size=self.vertex_radius * 2)
         self.selected_vertex = None
         self.edge_start = None
+        self.highlighted_path = []
+        self.path_edges = set()
+        self.apsp = None
+        self.lazy_rows = None
         self.draw()
     
+    def highlight_path(self, path):
+        """Выделение маршрута (списка id вершин) на canvas"""
+        previous_vertices = self.highlighted_path
+        previous_edges = self.path_edges
+        self.highlighted_path = list(path)
+        self.path_edges = {frozenset(pair) for pair in zip(self.highlighted_path, self.highlighted_path[1:])}
+        
+        # Перекрашиваем только элементы старого и нового маршрута
+        for vid in set(previous_vertices) | set(self.highlighted_path):
+            if vid in self.vertex_items:
+                self.canvas.itemconfig(self.vertex_items[vid][0], fill=self.vertex_color(vid))
+        for key in previous_edges | self.path_edges:
+            if key in self.edge_items:
+                width, fill = self.edge_style(key)
+                self.canvas.itemconfig(self.edge_items[key][0], width=width, fill=fill)
+    
     def generate_random_graph(self, num_vertices=5, num_edges=8):
         """Генерация случайного графа"""
         self.clear()
         
-        # Размещаем вершины по кругу
-        center_x, center_y = self.width // 2, self.height // 2
-        radius = min(self.width, self.height) // 3
-        
-        vertex_ids = []
-        for i in range(num_vertices):
-            angle = 2 * math.pi * i / num_vertices
-            x = center_x + radius * math.cos(angle)
-            y = center_y + radius * math.sin(angle)
-            vid = self.vertex_id_counter
-            self.vertices.append((x, y, vid))
-            vertex_ids.append(vid)
-            self.vertex_id_counter += 1
-        
-        # Добавляем случайные рёбра
-        max_edges = min(num_edges, num_vertices * (num_vertices - 1) // 2)
-        added = 0
-        attempts = 0
-        while added < max_edges and attempts < max_edges * 2:
-            from_id = random.choice(vertex_ids)
-            to_id = random.choice(vertex_ids)
-            if from_id != to_id:
-                weight = random.randint(1, 10)
-                if self.add_edge(from_id, to_id, weight):
-                    added += 1
-            attempts += 1
+        # Начальное размещение по кругу, затем силовая раскладка в фоне
+        vertex_ids = [self.graph.add_vertex(x, y)
+                      for x, y in circle_layout(num_vertices, self.width, self.height)]
         
-        self.draw()
+        # Добавляем случайные рёбра: G(n, m) всегда даёт ровно m рёбер
+        edges = gnm(num_vertices, num_edges)
+        for u, v, weight in edges.edges():
+            self.graph.add_edge(vertex_ids[u], vertex_ids[v], weight)
+
+        self.request_redraw()
+        self.start_layout()
     
-    def to_matrix(self):
-        """Преобразование графа в матрицу смежности"""
-        if not self.vertices:
-            return None
+    def start_layout(self, iterations=100):
+        """Запуск силовой раскладки текущего графа в фоновом потоке"""
+        self.stop_layout()
+        if len(self.graph) < 2:
+            return
         
-        n = len(self.vertices)
-        matrix = [[0] * n for _ in range(n)]
+        self.layout_ids = self.graph.vertex_ids()
+        edges = [(self.graph.index_of(u), self.graph.index_of(v)) for u, v, _ in self.graph.edges()]
+        positions = [self.graph.positions[vid] for vid in self.layout_ids]
+        self.layout_worker = LayoutWorker(len(self.layout_ids), edges, self.width, self.height,
+                                          positions, iterations)
+        self.layout_worker.start()
+        self.canvas.after(self.LAYOUT_POLL_MS, self.poll_layout)
+    
+    def poll_layout(self):
+        """Применение последнего готового кадра раскладки (в главном потоке)"""
+        worker = self.layout_worker
+        if worker is None:
+            return
         
-        # Создаём словарь для быстрого доступа
-        id_to_index = {vid: idx for idx, (_, _, vid) in enumerate(self.vertices)}
+        frame, finished = None, False
+        while True:
+            try:
+                item = worker.frames.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                finished = True
+            else:
+                frame = item
         
-        for from_id, to_id, weight in self.edges:
-            from_idx = id_to_index[from_id]
-            to_idx = id_to_index[to_id]
-            matrix[from_idx][to_idx] = weight
-            matrix[to_idx][from_idx] = weight  # Неориентированный граф
+        # Промежуточные кадры пропускаются; вершины, удалённые во время
+        # раскладки, игнорируются
+        if frame is not None:
+            for vid, (x, y) in zip(self.layout_ids, frame):
+                if vid in self.graph:
+                    self.move_vertex(vid, x, y)
         
-        return matrix
+        if finished:
+            self.layout_worker = None
+        else:
+            self.canvas.after(self.LAYOUT_POLL_MS, self.poll_layout)
+    
+    def stop_layout(self):
+        """Остановка фоновой раскладки"""
+        if self.layout_worker is not None:
+            self.layout_worker.cancel()
+            self.layout_worker = None
+    
+    def distance_row(self, vertex_id):
+        """Расстояния от вершины: из готовой матрицы, если алгоритм уже
+        запускался, иначе одна строка ленивой матрицы (Дейкстра O(E log V))"""
+        index = self.graph.index_of(vertex_id)
+        if self.apsp is not None:
+            return self.apsp[index]
+        if self.lazy_rows is None:
+            self.lazy_rows = LazyDistanceMatrix(self.graph)
+        return self.lazy_rows[index]
+    
+    def to_matrix(self):
+        """Преобразование графа в матрицу смежности"""
+        if not len(self.graph):
+            return None
+        return self.graph.to_matrix()
+    
+    def vertex_color(self, vid):
+        """Цвет вершины: выбранная, на маршруте или обычная"""
+        if vid == self.selected_vertex:
+            return "red"
+        if vid in self.highlighted_path:
+            return "orange"
+        return "lightblue"
+    
+    def edge_style(self, key):
+        """Толщина и цвет линии ребра (рёбра маршрута - толще и красным)"""
+        if key in self.path_edges:
+            return 4, "red"
+        return 2, "gray"
+    
+    def edge_coords(self, from_id, to_id):
+        """Координаты линии ребра и середины для подписи веса"""
+        x1, y1 = self.graph.positions[from_id]
+        x2, y2 = self.graph.positions[to_id]
+        return (x1, y1, x2, y2), ((x1 + x2) / 2, (y1 + y2) / 2)
+    
+    def create_vertex_items(self, vid):
+        """Создание овала и подписи вершины"""
+        x, y = self.graph.positions[vid]
+        r = self.vertex_radius
+        oval = self.canvas.create_oval(x - r, y - r, x + r, y + r, fill=self.vertex_color(vid),
+                                       outline="black", width=2, tags=("vertex",))
+        text = self.canvas.create_text(x, y, text=str(vid), font=("Arial", 12, "bold"),
+                                       tags=("vertex",))
+        self.vertex_items[vid] = (oval, text)
+    
+    def create_edge_items(self, from_id, to_id, weight, lower=False):
+        """Создание линии и подписи веса ребра
+
+        lower=True опускает элементы ребра под уже нарисованные вершины.
+        """
+        key = frozenset((from_id, to_id))
+        line_coords, (mid_x, mid_y) = self.edge_coords(from_id, to_id)
+        width, fill = self.edge_style(key)
+        
+        line = self.canvas.create_line(*line_coords, width=width, fill=fill, tags=("edge",))
+        # Белый фон для текста через прямоугольник
+        rect = self.canvas.create_rectangle(mid_x - 15, mid_y - 10, mid_x + 15, mid_y + 10,
+                                            fill="white", outline="white", tags=("edge",))
+        text = self.canvas.create_text(mid_x, mid_y, text=str(weight), fill="blue",
+                                       font=("Arial", 10, "bold"), tags=("edge",))
+        if lower:
+            for item in (text, rect, line):
+                self.canvas.tag_lower(item)
+        self.edge_items[key] = (line, rect, text)
+    
+    def update_vertex_position(self, vid):
+        """Перенос элементов вершины и инцидентных рёбер, O(степени)"""
+        x, y = self.graph.positions[vid]
+        r = self.vertex_radius
+        oval, text = self.vertex_items[vid]
+        self.canvas.coords(oval, x - r, y - r, x + r, y + r)
+        self.canvas.coords(text, x, y)
+        
+        for neighbour in self.graph.adj[vid]:
+            key = frozenset((vid, neighbour))
+            if key not in self.edge_items:
+                continue
+            line, rect, label = self.edge_items[key]
+            line_coords, (mid_x, mid_y) = self.edge_coords(vid, neighbour)
+            self.canvas.coords(line, *line_coords)
+            self.canvas.coords(rect, mid_x - 15, mid_y - 10, mid_x + 15, mid_y + 10)
+            self.canvas.coords(label, mid_x, mid_y)
+    
+    def schedule_redraw(self):
+        """Отложенное обновление canvas: вызовы до простоя схлопываются в один"""
+        if self.pending_redraw is None:
+            self.pending_redraw = self.canvas.after_idle(self.flush_redraw)
+    
+    def request_redraw(self):
+        """Полная перерисовка при ближайшем простое (после массовых изменений)"""
+        self.full_redraw = True
+        self.schedule_redraw()
+    
+    def flush_redraw(self):
+        """Выполнение накопленных обновлений canvas"""
+        self.pending_redraw = None
+        if self.full_redraw:
+            self.draw()
+            return
+        
+        moved, self.moved_vertices = self.moved_vertices, set()
+        for vid in moved:
+            if vid in self.vertex_items:
+                self.update_vertex_position(vid)
     
     def draw(self):
-        """Отрисовка графа"""
+        """Полная отрисовка графа"""
+        self.full_redraw = False
+        self.moved_vertices = set()
         self.canvas.delete("all")
-        
-        # Рисуем рёбра
-        id_to_pos = {vid: (x, y) for x, y, vid in self.vertices}
-        
-        for from_id, to_id, weight in self.edges:
-            x1, y1 = id_to_pos[from_id]
-            x2, y2 = id_to_pos[to_id]
-            
-            # Рисуем линию
-            self.canvas.create_line(x1, y1, x2, y2, width=2, fill="gray")
-            
-            # Рисуем вес ребра
-            mid_x, mid_y = (x1 + x2) / 2, (y1 + y2) / 2
-            # Создаём белый фон для текста через прямоугольник
-            self.canvas.create_rectangle(mid_x - 15, mid_y - 10, mid_x + 15, mid_y + 10, 
-                                        fill="white", outline="white")
-            self.canvas.create_text(mid_x, mid_y, text=str(weight), fill="blue", 
-                                   font=("Arial", 10, "bold"))
-        
-        # Рисуем вершины
-        for x, y, vid in self.vertices:
-            color = "red" if vid == self.selected_vertex else "lightblue"
-            self.canvas.create_oval(x - self.vertex_radius, y - self.vertex_radius,
-                                   x + self.vertex_radius, y + self.vertex_radius,
-                                   fill=color, outline="black", width=2)
-            self.canvas.create_text(x, y, text=str(vid), font=("Arial", 12, "bold"))
+        self.vertex_items = {}
+        self.edge_items = {}
+        
+        # Рёбра рисуем первыми, чтобы вершины оказались поверх них
+        for from_id, to_id, weight in self.graph.edges():
+            self.create_edge_items(from_id, to_id, weight)
+        for vid in self.graph.positions:
+            self.create_vertex_items(vid)
 
 
 class GraphTab:
@@ -244,6 +415,8 @@ class GraphTab:
                        value="add_edge", command=self.change_mode).pack(anchor=tk.W, pady=2)
         ttk.Radiobutton(left_panel, text="Удалить", variable=self.mode_var,
                        value="delete", command=self.change_mode).pack(anchor=tk.W, pady=2)
+        ttk.Radiobutton(left_panel, text="Расстояния от вершины", variable=self.mode_var,
+                       value="distances", command=self.change_mode).pack(anchor=tk.W, pady=2)
         
         ttk.Separator(left_panel, orient=tk.HORIZONTAL).pack(fill=tk.X, pady=10)
         
@@ -253,6 +426,12 @@ class GraphTab:
                   command=self.generate_random).pack(pady=5, fill=tk.X)
         ttk.Button(left_panel, text="Запустить алгоритм", 
                   command=self.run_algorithm).pack(pady=5, fill=tk.X)
+        ttk.Button(left_panel, text="Показать путь", 
+                  command=self.show_path).pack(pady=5, fill=tk.X)
+        # Режим достижимости: битовое транзитивное замыкание вместо расстояний
+        self.reachability_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(left_panel, text="Только достижимость",
+                       variable=self.reachability_var).pack(anchor=tk.W, pady=2)
         
         ttk.Separator(left_panel, orient=tk.HORIZONTAL).pack(fill=tk.X, pady=10)
         
@@ -284,6 +463,7 @@ class GraphTab:
         
         self.graph_canvas = GraphCanvas(self.canvas, 800, 600)
         self.canvas.bind("<Button-1>", self.graph_canvas.on_click)
+        self.graph_canvas.on_vertex_query = self.show_distances
         
         # Правая панель - вывод результатов
         right_panel = ttk.Frame(self.frame)
@@ -300,8 +480,7 @@ class GraphTab:
         self.graph_canvas.mode = self.mode_var.get()
         if self.mode_var.get() != "add_edge":
             self.graph_canvas.edge_start = None
-            self.graph_canvas.selected_vertex = None
-            self.graph_canvas.draw()
+            self.graph_canvas.select_vertex(None)
     
     def clear_graph(self):
         """Очистка графа"""
@@ -324,7 +503,7 @@ class GraphTab:
             messagebox.showerror("Ошибка", "Введите корректные числа")
     
     def run_algorithm(self):
-        """Запуск алгоритма Флойда-Уоршелла"""
+        """Поиск кратчайших путей (алгоритм выбирается по плотности графа)"""
         matrix = self.graph_canvas.to_matrix()
         if matrix is None:
             messagebox.showwarning("Предупреждение", "Граф пуст. Добавьте вершины и рёбра.")
@@ -334,14 +513,44 @@ class GraphTab:
             messagebox.showwarning("Предупреждение", "Граф должен содержать минимум 2 вершины.")
             return
         
-        # Запускаем алгоритм
-        dist_matrix, comparisons, time_taken = floyd_warshall(matrix)
+        if self.reachability_var.get():
+            self.run_reachability(matrix)
+            return
+        
+        # Первый запуск берёт результат из кэша в БД или считает пути
+        # полностью, дальше правки графа обновляют матрицу инкрементально
+        if self.graph_canvas.apsp is None:
+            key = matrix_hash(matrix)
+            blob = get_db().get_cached_apsp(key)
+            if blob is not None:
+                title = "Результат из кэша"
+                self.graph_canvas.apsp = DynamicShortestPaths(matrix, paths=unpack_shortest_paths(blob))
+            else:
+                title = ENGINE_NAMES[choose_engine(matrix)]
+                components = len(connected_components(matrix))
+                if components > 1:
+                    # Алгоритм выбирается для каждой компоненты отдельно
+                    title = f"Компоненты связности ({components}), алгоритм по каждой"
+                try:
+                    self.graph_canvas.apsp = DynamicShortestPaths(matrix)
+                except ValueError as e:
+                    messagebox.showerror("Ошибка", f"{e}.\nКратчайшие пути не определены: в "
+                                         "неориентированном графе цикл образует любое "
+                                         "ребро отрицательного веса.")
+                    return
+                get_db().save_cached_apsp(key, len(matrix),
+                                          pack_shortest_paths(self.graph_canvas.apsp))
+        else:
+            title = "Инкрементальное обновление"
+        dist_matrix = self.graph_canvas.apsp
+        comparisons, time_taken = dist_matrix.comparisons, dist_matrix.time_taken
+        dist_matrix.comparisons, dist_matrix.time_taken = 0, 0.0
         
         # Выводим результаты
         self.output_text.delete(1.0, tk.END)
-        self.output_text.insert(tk.END, "=== Алгоритм Флойда-Уоршелла ===\n\n")
+        self.output_text.insert(tk.END, f"=== {title} ===\n\n")
         self.output_text.insert(tk.END, f"Количество вершин: {len(matrix)}\n")
-        self.output_text.insert(tk.END, f"Количество рёбер: {len(self.graph_canvas.edges)}\n")
+        self.output_text.insert(tk.END, f"Количество рёбер: {self.graph_canvas.graph.edge_count}\n")
         self.output_text.insert(tk.END, f"Сравнений: {comparisons}\n")
         self.output_text.insert(tk.END, f"Время выполнения: {time_taken:.6f} сек\n\n")
         
@@ -350,14 +559,87 @@ class GraphTab:
             self.output_text.insert(tk.END, " ".join(f"{val:>4}" for val in row) + "\n")
         
         self.output_text.insert(tk.END, "\nМатрица кратчайших расстояний:\n")
-        for i, row in enumerate(dist_matrix):
-            formatted_row = []
-            for val in row:
-                if val == float('inf'):
-                    formatted_row.append(" inf")
-                else:
-                    formatted_row.append(f"{int(val):>4}")
-            self.output_text.insert(tk.END, " ".join(formatted_row) + "\n")
+        if isinstance(dist_matrix.dist, DistanceMatrix):
+            # Результат ещё не правился - строки форматируются прямо из буфера int64
+            lines = dist_matrix.dist.format_rows()
+        else:
+            lines = [" ".join(f"{d:>4}" for d in row) for row in dist_matrix]
+        self.output_text.insert(tk.END, "\n".join(lines) + "\n")
+    
+    def run_reachability(self, matrix):
+        """Транзитивное замыкание: какие вершины достижимы из каких"""
+        reach, comparisons, time_taken = transitive_closure(matrix)
+        
+        self.output_text.delete(1.0, tk.END)
+        self.output_text.insert(tk.END, "=== Достижимость (Уоршелл на битовых строках) ===\n\n")
+        self.output_text.insert(tk.END, f"Количество вершин: {len(matrix)}\n")
+        self.output_text.insert(tk.END, f"Проверок бита: {comparisons}\n")
+        self.output_text.insert(tk.END, f"Время выполнения: {time_taken:.6f} сек\n\n")
+        
+        self.output_text.insert(tk.END, "Матрица достижимости:\n")
+        for row in reach:
+            self.output_text.insert(tk.END, " ".join(f"{val:>2}" for val in row) + "\n")
+        
+        self.output_text.insert(tk.END, "\nДостижимо вершин (включая саму):\n")
+        for i in range(len(reach)):
+            self.output_text.insert(tk.END, f"{i}: {reach.count(i)}\n")
+    
+    def show_distances(self, vertex_id):
+        """Расстояния от вершины, выбранной кликом, без расчёта всей матрицы"""
+        graph_canvas = self.graph_canvas
+        lazy = graph_canvas.apsp is None
+        try:
+            row = graph_canvas.distance_row(vertex_id)
+        except ValueError as e:
+            messagebox.showerror("Ошибка", f"{e}.")
+            return
+        
+        self.output_text.delete(1.0, tk.END)
+        self.output_text.insert(tk.END, f"=== Расстояния от вершины {vertex_id} ===\n\n")
+        if lazy:
+            rows = graph_canvas.lazy_rows
+            self.output_text.insert(tk.END, f"Вычислено строк: {rows.computed} из {len(rows)}\n")
+            self.output_text.insert(tk.END, f"Сравнений (всего): {rows.comparisons}\n\n")
+        else:
+            self.output_text.insert(tk.END, "Строка из рассчитанной матрицы\n\n")
+        
+        for vid, dist in zip(graph_canvas.graph.vertex_ids(), row):
+            text = "inf" if dist == float('inf') else dist
+            self.output_text.insert(tk.END, f"{vertex_id} → {vid}: {text}\n")
+    
+    def show_path(self):
+        """Выделение кратчайшего маршрута между двумя вершинами без пересчёта"""
+        paths = self.graph_canvas.apsp
+        if paths is None:
+            messagebox.showwarning("Предупреждение", "Сначала запустите алгоритм.")
+            return
+        
+        from_id = simpledialog.askinteger("Маршрут", "Из вершины:")
+        if from_id is None:
+            return
+        to_id = simpledialog.askinteger("Маршрут", "В вершину:")
+        if to_id is None:
+            return
+        
+        graph = self.graph_canvas.graph
+        if from_id not in graph or to_id not in graph:
+            messagebox.showerror("Ошибка", "Вершина не найдена")
+            return
+        
+        u = graph.index_of(from_id)
+        v = graph.index_of(to_id)
+        route = paths.path(u, v)
+        if not route:
+            self.graph_canvas.highlight_path([])
+            self.output_text.insert(tk.END, f"\nПути из {from_id} в {to_id} нет\n")
+            return
+        
+        vertex_ids = graph.vertex_ids()
+        path_ids = [vertex_ids[idx] for idx in route]
+        self.graph_canvas.highlight_path(path_ids)
+        self.output_text.insert(tk.END, f"\nПуть {from_id} → {to_id}: "
+                                f"{' → '.join(str(vid) for vid in path_ids)} "
+                                f"(длина {paths[u][v]})\n")
     
     def save_graph(self):
         """Сохранить граф в БД"""
@@ -369,16 +651,16 @@ class GraphTab:
         name = simpledialog.askstring("Сохранение графа", "Введите название графа:")
         if name:
             try:
-                vertices = len(self.graph_canvas.vertices)
-                edges = len(self.graph_canvas.edges)
-                db.save_graph(name, vertices, edges, matrix)
+                vertices = len(self.graph_canvas.graph)
+                edges = self.graph_canvas.graph.edge_count
+                get_db().save_graph(name, vertices, edges, matrix)
                 messagebox.showinfo("Успех", f"Граф '{name}' сохранен в базу данных!")
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось сохранить граф: {e}")
     
     def load_graph(self):
         """Загрузить граф из БД"""
-        graphs = db.get_all_graphs()
+        graphs = get_db().get_all_graphs()
         if not graphs:
             messagebox.showinfo("Информация", "В базе данных нет сохраненных графов.")
             return
@@ -427,30 +709,28 @@ class GraphTab:
             # Восстанавливаем граф из матрицы
             self.graph_canvas.clear()
             matrix = graph['matrix']
-            n = len(matrix)
-            
-            # Размещаем вершины по кругу
-            center_x, center_y = 400, 300
-            radius = 200
-            
-            for i in range(n):
-                angle = 2 * math.pi * i / n
-                x = center_x + radius * math.cos(angle)
-                y = center_y + radius * math.sin(angle)
-                self.graph_canvas.vertices.append((x, y, i))
-                self.graph_canvas.vertex_id_counter = max(self.graph_canvas.vertex_id_counter, i + 1)
+            positions = circle_layout(len(matrix), self.graph_canvas.width,
+                                      self.graph_canvas.height)
             
-            # Восстанавливаем рёбра
-            for i in range(n):
-                for j in range(i + 1, n):
-                    if matrix[i][j] != 0:
-                        self.graph_canvas.edges.append((i, j, matrix[i][j]))
-            
-            self.graph_canvas.draw()
+            # Восстанавливаем вершины и рёбра, затем раскладываем их в фоне
+            self.graph_canvas.graph = Graph.from_matrix(matrix, positions,
+                                                        self.graph_canvas.vertex_radius * 2)
+            self.graph_canvas.request_redraw()
+            self.graph_canvas.start_layout()
             messagebox.showinfo("Успех", f"Граф '{graph['name']}' загружен!")
 
 
 class MatrixTab:
+    # Предел размеров: с backend "numpy" умножение 500×500 занимает доли секунды
+    MAX_SIZE = 500
+
+    @classmethod
+    def backends(cls):
+        """Движки для выбора: Штрассен только если до MAX_SIZE он доходит до рекурсии,
+        иначе это то же базовое ядро под другим именем"""
+        return tuple(b for b in MULTIPLY_BACKENDS
+                     if b != "strassen" or strassen_levels(cls.MAX_SIZE) > 0)
+
     def __init__(self, parent):
         self.frame = ttk.Frame(parent)
         
@@ -490,6 +770,15 @@ class MatrixTab:
         ttk.Button(left_panel, text="Умножить матрицы", 
                   command=self.multiply_matrices).pack(pady=5, fill=tk.X)
         
+        # Движок умножения
+        backend_frame = ttk.Frame(left_panel)
+        backend_frame.pack(pady=2, fill=tk.X)
+        ttk.Label(backend_frame, text="Движок:").pack(side=tk.LEFT, padx=2)
+        self.backend_var = tk.StringVar(
+            value="numpy" if "numpy" in MULTIPLY_BACKENDS else "transposed")
+        ttk.Combobox(backend_frame, textvariable=self.backend_var, values=self.backends(),
+                     state="readonly", width=10).pack(side=tk.LEFT, padx=2)
+        
         ttk.Separator(left_panel, orient=tk.HORIZONTAL).pack(fill=tk.X, pady=10)
         
         # Редактирование матриц
@@ -549,12 +838,13 @@ class MatrixTab:
             rows_b = int(self.rows_b_var.get())
             cols_b = int(self.cols_b_var.get())
             
-            if rows_a < 1 or rows_a > 20 or cols_a < 1 or cols_a > 20:
-                messagebox.showerror("Ошибка", "Размеры матрицы A должны быть от 1 до 20")
+            limit = self.MAX_SIZE
+            if rows_a < 1 or rows_a > limit or cols_a < 1 or cols_a > limit:
+                messagebox.showerror("Ошибка", f"Размеры матрицы A должны быть от 1 до {limit}")
                 return
             
-            if rows_b < 1 or rows_b > 20 or cols_b < 1 or cols_b > 20:
-                messagebox.showerror("Ошибка", "Размеры матрицы B должны быть от 1 до 20")
+            if rows_b < 1 or rows_b > limit or cols_b < 1 or cols_b > limit:
+                messagebox.showerror("Ошибка", f"Размеры матрицы B должны быть от 1 до {limit}")
                 return
             
             # Проверяем возможность умножения
@@ -579,15 +869,18 @@ class MatrixTab:
             rows_a = len(self.matrix_a)
             cols_a = len(self.matrix_a[0]) if self.matrix_a else 0
             self.matrix_a_text.insert(tk.END, f"Размер: {rows_a}×{cols_a}\n\n")
-            for row in self.matrix_a:
-                self.matrix_a_text.insert(tk.END, " ".join(f"{val:>4}" for val in row) + "\n")
+            self.matrix_a_text.insert(tk.END, self.format_matrix(self.matrix_a, 4))
         
         if self.matrix_b:
             rows_b = len(self.matrix_b)
             cols_b = len(self.matrix_b[0]) if self.matrix_b else 0
             self.matrix_b_text.insert(tk.END, f"Размер: {rows_b}×{cols_b}\n\n")
-            for row in self.matrix_b:
-                self.matrix_b_text.insert(tk.END, " ".join(f"{val:>4}" for val in row) + "\n")
+            self.matrix_b_text.insert(tk.END, self.format_matrix(self.matrix_b, 4))
+    
+    @staticmethod
+    def format_matrix(matrix, width):
+        """Текст матрицы одной строкой - одна вставка в виджет вместо построчных"""
+        return "".join(" ".join(f"{val:>{width}}" for val in row) + "\n" for row in matrix)
     
     def clear_matrices(self):
         """Очистка матриц"""
@@ -659,8 +952,8 @@ class MatrixTab:
             try:
                 rows = int(rows_var.get())
                 cols = int(cols_var.get())
-                if rows < 1 or rows > 20 or cols < 1 or cols > 20:
-                    messagebox.showerror("Ошибка", "Размеры должны быть от 1 до 20")
+                if rows < 1 or rows > self.MAX_SIZE or cols < 1 or cols > self.MAX_SIZE:
+                    messagebox.showerror("Ошибка", f"Размеры должны быть от 1 до {self.MAX_SIZE}")
                     return
             except ValueError:
                 messagebox.showerror("Ошибка", "Введите корректные размеры")
@@ -730,7 +1023,9 @@ class MatrixTab:
         
         try:
             # Запускаем умножение
-            result_matrix, comparisons, time_taken = matrix_multiplication(self.matrix_a, self.matrix_b)
+            backend = self.backend_var.get()
+            result_matrix, comparisons, time_taken = matrix_multiplication(
+                self.matrix_a, self.matrix_b, backend=backend)
             
             # Выводим результаты
             self.result_text.delete(1.0, tk.END)
@@ -738,12 +1033,12 @@ class MatrixTab:
             self.result_text.insert(tk.END, f"Размер A: {rows_a}×{cols_a}\n")
             self.result_text.insert(tk.END, f"Размер B: {rows_b}×{cols_b}\n")
             self.result_text.insert(tk.END, f"Размер результата: {len(result_matrix)}×{len(result_matrix[0])}\n")
-            self.result_text.insert(tk.END, f"Сравнений: {comparisons}\n")
+            self.result_text.insert(tk.END, f"Движок: {backend}\n")
+            self.result_text.insert(tk.END, f"Умножений: {comparisons}\n")
             self.result_text.insert(tk.END, f"Время выполнения: {time_taken:.6f} сек\n\n")
             
             self.result_text.insert(tk.END, "Результирующая матрица:\n")
-            for row in result_matrix:
-                self.result_text.insert(tk.END, " ".join(f"{val:>6}" for val in row) + "\n")
+            self.result_text.insert(tk.END, self.format_matrix(result_matrix, 6))
         except ValueError as e:
             messagebox.showerror("Ошибка", str(e))
     
@@ -763,14 +1058,14 @@ class MatrixTab:
                     # Можно попытаться распарсить результат, но для простоты оставим None
                     pass
                 
-                db.save_matrices(name, self.matrix_a, self.matrix_b, result)
+                get_db().save_matrices(name, self.matrix_a, self.matrix_b, result)
                 messagebox.showinfo("Успех", f"Матрицы '{name}' сохранены в базу данных!")
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось сохранить: {e}")
     
     def load_matrices(self):
         """Загрузить матрицы из БД"""
-        matrices = db.get_all_matrices()
+        matrices = get_db().get_all_matrices()
         if not matrices:
             messagebox.showinfo("Информация", "В базе данных нет сохраненных матриц.")
             return
@@ -827,8 +1122,7 @@ class MatrixTab:
             if m['result']:
                 self.result_text.delete(1.0, tk.END)
                 self.result_text.insert(tk.END, "Результирующая матрица:\n")
-                for row in m['result']:
-                    self.result_text.insert(tk.END, " ".join(f"{val:>6}" for val in row) + "\n")
+                self.result_text.insert(tk.END, self.format_matrix(m['result'], 6))
             messagebox.showinfo("Успех", f"Матрицы '{m['name']}' загружены!")
 
 
@@ -1095,7 +1389,7 @@ class SortTab:
         if name:
             try:
                 for algorithm_name, data in self.last_results.items():
-                    db.save_sort_result(
+                    get_db().save_sort_result(
                         name=f"{name} - {algorithm_name}",
                         array_size=len(self.array),
                         input_array=self.array,
@@ -1110,7 +1404,7 @@ class SortTab:
     
     def load_sort_results(self):
         """Загрузить результаты сортировки из БД"""
-        sorts = db.get_all_sorts()
+        sorts = get_db().get_all_sorts()
         if not sorts:
             messagebox.showinfo("Информация", "В базе данных нет сохраненных результатов.")
             return
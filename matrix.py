@@ -1,11 +1,79 @@
+import os
 import time
 import random
+from array import array
+from itertools import chain
+from multiprocessing import Pool, shared_memory
+from operator import mul
 
-def matrix_multiplication(A, B):
-    """Умножение матриц O(n³) - полиномиальная сложность"""
-    comparisons = 0
-    start_time = time.time()
-    
+try:
+    import numpy as np
+except ImportError:  # NumPy необязателен: остаётся чистый Python
+    np = None
+
+
+# ============================================================================
+# ПОЛУКОЛЬЦА И ОБОБЩЁННОЕ ПРОИЗВЕДЕНИЕ
+# ============================================================================
+
+# Предел размера временного тайла (элементов) в NumPy-ядре
+TILE_ELEMENTS = 1 << 20
+
+
+class Semiring:
+    """Полукольцо (⊕, ⊗) для произведения C[i][j] = ⊕_k A[i][k] ⊗ B[k][j]
+
+    zero - нейтральный элемент ⊕ и поглощающий для ⊗: такие A[i][k]
+    пропускаются целиком. row_update(row_c, a, row_b) - быстрое ядро
+    строки C ⊕= a ⊗ B[k] на списках; np_add/np_mul - ufunc-и NumPy для
+    тайлового ядра, np_product - готовое произведение (например, matmul).
+    """
+
+    def __init__(self, name, zero, add, mul, row_update=None,
+                 np_add=None, np_mul=None, np_product=None):
+        self.name = name
+        self.zero = zero
+        self.add = add
+        self.mul = mul
+        self.row_update = row_update or (
+            lambda row_c, a, row_b: [add(c, mul(a, b)) for c, b in zip(row_c, row_b)])
+        self.np_add = np_add
+        self.np_mul = np_mul
+        self.np_product = np_product
+
+    def __repr__(self):
+        return f"Semiring({self.name!r})"
+
+
+def _row_plus_times(row_c, a, row_b):
+    return [c + a * b for c, b in zip(row_c, row_b)]
+
+
+def _row_min_plus(row_c, a, row_b):
+    return [s if (s := a + b) < c else c for c, b in zip(row_c, row_b)]
+
+
+# Обычное произведение: (+, ×), ноль - 0
+PLUS_TIMES = Semiring("plus_times", 0, lambda x, y: x + y, lambda x, y: x * y,
+                      _row_plus_times,
+                      np_add=np.add if np is not None else None,
+                      np_mul=np.multiply if np is not None else None,
+                      np_product=np.matmul if np is not None else None)
+# Тропическое произведение: (min, +), ноль - бесконечность. Произведение
+# матрицы расстояний на себя даёт кратчайшие пути вдвое большей длины
+MIN_PLUS = Semiring("min_plus", float('inf'), min, lambda x, y: x + y,
+                    _row_min_plus,
+                    np_add=np.minimum if np is not None else None,
+                    np_mul=np.add if np is not None else None)
+
+SEMIRINGS = {
+    "plus_times": PLUS_TIMES,
+    "min_plus": MIN_PLUS,
+}
+
+
+def _check_shapes(A, B):
+    """Проверка размеров, возвращает (rows_A, cols_A, cols_B)"""
     # Проверка на пустые матрицы
     if not A or not B:
         raise ValueError("Матрицы не могут быть пустыми")
@@ -31,19 +99,647 @@ def matrix_multiplication(A, B):
     # Проверка возможности умножения
     if cols_A != rows_B:
         raise ValueError(f"Нельзя умножить матрицу {rows_A}×{cols_A} на матрицу {rows_B}×{cols_B}")
-    
-    # Создаем результирующую матрицу заполненную нулями
-    C = [[0 for _ in range(cols_B)] for _ in range(rows_A)]
-    
-    for i in range(rows_A):
-        for j in range(cols_B):
-            for k in range(cols_A):
-                comparisons += 1
-                C[i][j] += A[i][k] * B[k][j]
-    
+    return rows_A, cols_A, cols_B
+
+
+def _product_python(A, B, semiring):
+    """Порядок i-k-j: строка C обновляется целой строкой B за проход"""
+    zero = semiring.zero
+    update = semiring.row_update
+    cols_B = len(B[0])
+    C = []
+    for row_a in A:
+        row_c = [zero] * cols_B
+        for a, row_b in zip(row_a, B):
+            if a != zero:
+                row_c = update(row_c, a, row_b)
+        C.append(row_c)
+    return C
+
+
+def _exact_dtype(A, B, growth=1):
+    """Тип NumPy, в котором целочисленное A·B считается точно
+
+    Целые: float64 (BLAS), если оценка max|A|·max|B|·k·growth меньше 2**53
+    (все частичные суммы точны); int64 - если меньше 2**63; иначе
+    dtype=object с длинной арифметикой Python. growth - во сколько раз
+    промежуточные значения алгоритма могут превысить оценку обычного
+    произведения. Дробные - float64.
+
+    Returns:
+        (dtype, integral)
+    """
+    integral = all(isinstance(x, int) for M in (A, B) for row in M for x in row)
+    if not integral:
+        return np.float64, False
+
+    largest_a = max(abs(x) for row in A for x in row)
+    largest_b = max(abs(x) for row in B for x in row)
+    bound = largest_a * largest_b * len(B) * growth
+    if bound < 2 ** 53:
+        return np.float64, True
+    if bound < 2 ** 63:
+        return np.int64, True
+    return object, True
+
+
+def _matmul_exact(A, B):
+    """A @ B в NumPy с результатом, совпадающим с эталоном на Python"""
+    dtype, integral = _exact_dtype(A, B)
+    c = np.array(A, dtype=dtype) @ np.array(B, dtype=dtype)
+    if integral and dtype is np.float64:
+        c = c.astype(np.int64)
+    return c.tolist()
+
+
+def _product_numpy(A, B, semiring, block_size):
+    """Тайловое ядро: блок строк A × блок k × все столбцы B
+
+    Тайл block×block×cols_B сворачивается по k одной ufunc-редукцией;
+    размер тайла ограничен TILE_ELEMENTS, чтобы он оставался в кэше.
+    У (+, ×) вместо тайлов - точное матричное произведение (_matmul_exact).
+    """
+    if semiring is PLUS_TIMES:
+        return _matmul_exact(A, B)
+
+    # Бесконечность (ноль полукольца (min, +)) целочисленности не мешает
+    inf = float('inf')
+    integral = all(isinstance(x, int) or x == inf or x == -inf
+                   for M in (A, B) for row in M for x in row)
+    a = np.array(A, dtype=np.float64)
+    b = np.array(B, dtype=np.float64)
+    if semiring.np_product is not None:
+        c = semiring.np_product(a, b)
+    else:
+        rows, inner = a.shape
+        cols = b.shape[1]
+        block_k = max(1, min(block_size, TILE_ELEMENTS // (block_size * cols)))
+        c = np.full((rows, cols), semiring.zero, dtype=np.float64)
+        for i0 in range(0, rows, block_size):
+            block_c = c[i0:i0 + block_size]
+            block_a = a[i0:i0 + block_size]
+            for k0 in range(0, inner, block_k):
+                tile = semiring.np_mul(block_a[:, k0:k0 + block_k, None], b[None, k0:k0 + block_k, :])
+                semiring.np_add(block_c, semiring.np_add.reduce(tile, axis=1), out=block_c)
+
+    rows = c.tolist()
+    if integral:
+        # Целые входы - целый результат (бесконечность остаётся float)
+        rows = [[int(x) if x - x == 0 else x for x in row] for row in rows]
+    return rows
+
+
+def semiring_product(A, B, semiring=PLUS_TIMES, backend=None, block_size=32):
+    """Произведение матриц над полукольцом O(n³)
+
+    Args:
+        A, B: матрицы списками строк
+        semiring: Semiring или имя из SEMIRINGS ("plus_times", "min_plus")
+        backend: "python" (i-k-j на списках) или "numpy" (тайловое ядро,
+            для (+, ×) - точный matmul); по умолчанию - "numpy", если он
+            установлен и результат будет точным, иначе "python"
+        block_size: сторона тайла NumPy-ядра
+
+    Returns:
+        (C, comparisons, time_taken); comparisons - число операций ⊗
+        (rows_A·cols_A·cols_B), как у matrix_multiplication
+    """
+    start_time = time.time()
+    if isinstance(semiring, str):
+        if semiring not in SEMIRINGS:
+            raise ValueError(f"Неизвестное полукольцо: {semiring}")
+        semiring = SEMIRINGS[semiring]
+    rows_A, cols_A, cols_B = _check_shapes(A, B)
+
+    if backend is None:
+        backend = "numpy" if np is not None and _fits_float64(A, B, semiring, cols_A) else "python"
+    if backend == "numpy":
+        if np is None:
+            raise ImportError("Для backend='numpy' требуется пакет numpy")
+        if semiring.np_product is None and (semiring.np_add is None or semiring.np_mul is None):
+            raise ValueError(f"Для полукольца {semiring.name} нет NumPy-ядра")
+        C = _product_numpy(A, B, semiring, block_size)
+    elif backend == "python":
+        C = _product_python(A, B, semiring)
+    else:
+        raise ValueError(f"Неизвестный backend: {backend}")
+
+    comparisons = rows_A * cols_A * cols_B
     time_taken = time.time() - start_time
     return C, comparisons, time_taken
 
+
+def _fits_float64(A, B, semiring, inner):
+    """Все значения и результат точно представимы в float64"""
+    if semiring is PLUS_TIMES:
+        return True  # _matmul_exact сам выбирает точный тип
+    if semiring.np_product is None and semiring.np_mul is None:
+        return False
+    inf = float('inf')
+    largest = max((abs(x) for M in (A, B) for row in M for x in row if x != inf and x != -inf),
+                  default=0)
+    return 2 * largest < 2 ** 53
+
+
+# ============================================================================
+# ЯДРА УМНОЖЕНИЯ НА ЧИСТОМ PYTHON
+# ============================================================================
+
+# Столбцов B в одном блоке tiled-ядра
+TILE_COLUMNS = 64
+
+
+def _multiply_transposed(A, B):
+    """C[i][j] = sum(map(mul, A[i], столбец j)) по заранее транспонированной B
+
+    Столбцы B становятся кортежами, и скалярное произведение целиком
+    считается в C (map + sum) без индексации во внутреннем цикле.
+    """
+    columns = list(zip(*B))
+    return [[sum(map(mul, row, col)) for col in columns] for row in A]
+
+
+def _multiply_tiled(A, B, block_size=TILE_COLUMNS):
+    """Транспонированное ядро по блокам столбцов B
+
+    Блок из block_size столбцов проходит все строки A, пока он в кэше,
+    и записывается в строки C срезом.
+    """
+    columns = list(zip(*B))
+    C = [[0] * len(columns) for _ in A]
+    for j0 in range(0, len(columns), block_size):
+        block = columns[j0:j0 + block_size]
+        for row, row_c in zip(A, C):
+            row_c[j0:j0 + block_size] = [sum(map(mul, row, col)) for col in block]
+    return C
+
+
+_PYTHON_KERNELS = {
+    "transposed": _multiply_transposed,
+    "tiled": _multiply_tiled,
+}
+
+
+# ============================================================================
+# УМНОЖЕНИЕ МАТРИЦ
+# ============================================================================
+
+# Доступные backend умножения: NumPy - только если установлен
+MULTIPLY_BACKENDS = (("python",) + tuple(_PYTHON_KERNELS) + ("strassen", "parallel")
+                     + (("numpy",) if np is not None else ()))
+
+
+def matrix_multiplication(A, B, backend="python"):
+    """Умножение матриц O(n³) - полиномиальная сложность
+
+    Args:
+        A, B: матрицы списками строк
+        backend: "python" - ядро semiring_product над (+, ×) на списках;
+            "numpy" - оператор @ (BLAS) с точной целочисленной
+            арифметикой (см. _matmul_exact); "transposed" и "tiled" -
+            ядра без зависимостей по транспонированной B (примерно вдвое
+            быстрее "python"); "strassen" - strassen_multiplication с
+            порогом по умолчанию; "parallel" - parallel_multiplication
+            на всех ядрах; None - "numpy", если установлен
+
+    Returns:
+        (C, comparisons, time_taken); comparisons - число умножений
+        rows_A·cols_A·cols_B, считается аналитически
+    """
+    if backend is None:
+        backend = "numpy" if np is not None else "python"
+    if backend == "strassen":
+        return strassen_multiplication(A, B)
+    if backend == "parallel":
+        return parallel_multiplication(A, B)
+    if backend in _PYTHON_KERNELS:
+        start_time = time.time()
+        rows_A, cols_A, cols_B = _check_shapes(A, B)
+        C = _PYTHON_KERNELS[backend](A, B)
+        return C, rows_A * cols_A * cols_B, time.time() - start_time
+    C, comparisons, time_taken = semiring_product(A, B, PLUS_TIMES, backend=backend)
+    return C, comparisons, time_taken
+
+
+# ============================================================================
+# АЛГОРИТМ ШТРАССЕНА-ВИНОГРАДА
+# ============================================================================
+
+# Сторона блока, на которой рекурсия передаёт работу базовому ядру.
+# Значения по умолчанию; на своей машине - tune_strassen_cutoff().
+# На списках рекурсия не окупилась ни разу: n=500 - 3.6-4.0 с без неё
+# против 4.7-5.6 с с порогами 64-256, n=1024 - 39 с против 46 с с одним
+# уровнем (порог 512), поэтому до n=2048 работает только базовое ядро
+STRASSEN_CUTOFF = {"python": 2048, "numpy": 1024}
+
+
+def _strassen_plan(n, cutoff):
+    """(size, levels): сторона блока базового ядра и глубина рекурсии
+
+    Матрицы дополняются нулями до size·2**levels, size ≤ cutoff - это
+    меньше лишних нулей, чем дополнение до степени двойки.
+    """
+    levels = 0
+    while n > cutoff:
+        n = (n + 1) // 2
+        levels += 1
+    return n, levels
+
+
+def _list_add(X, Y):
+    return [[x + y for x, y in zip(row_x, row_y)] for row_x, row_y in zip(X, Y)]
+
+
+def _list_sub(X, Y):
+    return [[x - y for x, y in zip(row_x, row_y)] for row_x, row_y in zip(X, Y)]
+
+
+def _list_quadrants(M):
+    h = len(M) // 2
+    return ([row[:h] for row in M[:h]], [row[h:] for row in M[:h]],
+            [row[:h] for row in M[h:]], [row[h:] for row in M[h:]])
+
+
+def _list_join(C11, C12, C21, C22):
+    return [a + b for a, b in zip(C11, C12)] + [a + b for a, b in zip(C21, C22)]
+
+
+def _array_quadrants(M):
+    h = M.shape[0] // 2
+    return M[:h, :h], M[:h, h:], M[h:, :h], M[h:, h:]
+
+
+def _array_join(C11, C12, C21, C22):
+    return np.block([[C11, C12], [C21, C22]])
+
+
+def _winograd(A, B, levels, base, add, sub, quadrants, join):
+    """Рекурсия Штрассена-Винограда: 7 произведений и 15 сложений блоков"""
+    if levels == 0:
+        return base(A, B)
+    A11, A12, A21, A22 = quadrants(A)
+    B11, B12, B21, B22 = quadrants(B)
+
+    S1 = add(A21, A22)
+    S2 = sub(S1, A11)
+    S3 = sub(A11, A21)
+    S4 = sub(A12, S2)
+    T1 = sub(B12, B11)
+    T2 = sub(B22, T1)
+    T3 = sub(B22, B12)
+    T4 = sub(T2, B21)
+
+    def product(X, Y):
+        return _winograd(X, Y, levels - 1, base, add, sub, quadrants, join)
+
+    M1 = product(A11, B11)
+    M2 = product(A12, B21)
+    M3 = product(S4, B22)
+    M4 = product(A22, T4)
+    M5 = product(S1, T1)
+    M6 = product(S2, T2)
+    M7 = product(S3, T3)
+
+    U2 = add(M1, M6)
+    U3 = add(U2, M7)
+    U4 = add(U2, M5)
+    return join(add(M1, M2), add(U4, M3), sub(U3, M4), add(U3, M5))
+
+
+def strassen_levels(n, backend=None):
+    """Глубина рекурсии Штрассена для матриц n×n с порогом по умолчанию
+
+    0 - рекурсии нет, strassen_multiplication сводится к базовому ядру.
+    """
+    if backend is None:
+        backend = "numpy" if np is not None else "python"
+    return _strassen_plan(n, STRASSEN_CUTOFF[backend])[1]
+
+
+def strassen_multiplication(A, B, cutoff=None, backend=None):
+    """Умножение матриц Штрассена-Винограда O(n^log₂7) ≈ O(n^2.81)
+
+    Блоки делятся на четверти, пока сторона больше cutoff; на каждом
+    уровне 7 умножений вместо 8. Непарные и прямоугольные матрицы
+    дополняются нулями до квадрата size·2**levels, результат обрезается.
+
+    Args:
+        A, B: матрицы списками строк
+        cutoff: сторона блока для базового ядра (по умолчанию
+            STRASSEN_CUTOFF[backend])
+        backend: базовое ядро - "python" (транспонированная B) или "numpy"
+            (@, для целых выбирается точный тип с учётом роста
+            промежуточных сумм); по умолчанию - "numpy", если установлен
+
+    Returns:
+        (C, comparisons, time_taken) как у matrix_multiplication;
+        comparisons - число умножений в базовом ядре: 7**levels·size³
+    """
+    start_time = time.time()
+    rows_A, cols_A, cols_B = _check_shapes(A, B)
+    if backend is None:
+        backend = "numpy" if np is not None else "python"
+    if backend not in ("python", "numpy"):
+        raise ValueError(f"Неизвестный backend: {backend}")
+    if backend == "numpy" and np is None:
+        raise ImportError("Для backend='numpy' требуется пакет numpy")
+    if cutoff is None:
+        cutoff = STRASSEN_CUTOFF[backend]
+    if cutoff < 1:
+        raise ValueError("Порог рекурсии должен быть положительным")
+
+    size, levels = _strassen_plan(max(rows_A, cols_A, cols_B), cutoff)
+    if levels == 0:
+        # Рекурсии нет - дополнять не нужно
+        C = _matmul_exact(A, B) if backend == "numpy" else _multiply_transposed(A, B)
+        return C, rows_A * cols_A * cols_B, time.time() - start_time
+
+    n = size << levels
+    if backend == "numpy":
+        # Операнды растут не более чем в 4 раза за уровень, суммы блоков - тоже
+        dtype, integral = _exact_dtype(A, B, growth=64 ** levels * -(-n // cols_A))
+        a = np.zeros((n, n), dtype=dtype)
+        b = np.zeros((n, n), dtype=dtype)
+        a[:rows_A, :cols_A] = A
+        b[:cols_A, :cols_B] = B
+        c = _winograd(a, b, levels, np.matmul, np.add, np.subtract,
+                      _array_quadrants, _array_join)[:rows_A, :cols_B]
+        if integral and dtype is np.float64:
+            c = c.astype(np.int64)
+        C = c.tolist()
+    else:
+        a = [row + [0] * (n - cols_A) for row in A] + [[0] * n for _ in range(n - rows_A)]
+        b = [row + [0] * (n - cols_B) for row in B] + [[0] * n for _ in range(n - cols_A)]
+        C = _winograd(a, b, levels, _multiply_transposed, _list_add, _list_sub, _list_quadrants, _list_join)
+        C = [row[:cols_B] for row in C[:rows_A]]
+
+    comparisons = 7 ** levels * size ** 3
+    time_taken = time.time() - start_time
+    return C, comparisons, time_taken
+
+
+def tune_strassen_cutoff(n=None, candidates=None, backend=None, apply=True):
+    """Подбор порога рекурсии Штрассена на текущей машине
+
+    Случайные матрицы n×n перемножаются с каждым порогом-кандидатом;
+    порог ≥ n означает базовое ядро без рекурсии. Если оно и оказалось
+    быстрее всех, точка перелома лежит выше n, и порог не уменьшается:
+    результат - наибольший из лучшего кандидата и текущего порога.
+
+    Args:
+        n: сторона тестовых матриц (по умолчанию 256 для "python",
+            1024 для "numpy")
+        candidates: пороги (по умолчанию степени двойки от 16 до n)
+        backend: базовое ядро, как у strassen_multiplication
+        apply: записать лучший порог в STRASSEN_CUTOFF[backend]
+
+    Returns:
+        (cutoff, timings) - подобранный порог и словарь {порог: секунды}
+    """
+    if backend is None:
+        backend = "numpy" if np is not None else "python"
+    if n is None:
+        n = 1024 if backend == "numpy" else 256
+    if candidates is None:
+        candidates = [1 << p for p in range(4, n.bit_length()) if 1 << p <= n]
+    A = generate_matrix(n)
+    B = generate_matrix(n)
+
+    timings = {}
+    for cutoff in candidates:
+        start_time = time.perf_counter()
+        strassen_multiplication(A, B, cutoff, backend)
+        timings[cutoff] = time.perf_counter() - start_time
+    best = min(timings, key=timings.get)
+    if best >= n:
+        best = max(best, STRASSEN_CUTOFF[backend])
+    if apply:
+        STRASSEN_CUTOFF[backend] = best
+    return best, timings
+
+
+# ============================================================================
+# ПАРАЛЛЕЛЬНОЕ УМНОЖЕНИЕ
+# ============================================================================
+
+def _shared_typecode(A, B, backend):
+    """Код array для общих буферов и признак целочисленного результата
+
+    "q" - целые, если результат помещается в int64; "d" - дробные (а для
+    NumPy и целые с точным float64, см. _exact_dtype). None - значения в
+    буфер фиксированной ширины не помещаются.
+    """
+    if backend == "numpy":
+        dtype, integral = _exact_dtype(A, B)
+        return {np.float64: "d", np.int64: "q"}.get(dtype), integral
+    integral = all(isinstance(x, int) for M in (A, B) for row in M for x in row)
+    if not integral:
+        return "d", False
+    largest_a = max(abs(x) for row in A for x in row)
+    largest_b = max(abs(x) for row in B for x in row)
+    return ("q" if largest_a * largest_b * len(B) < 2 ** 63 else None), True
+
+
+def _multiply_block(task):
+    """Строки start:stop результата (выполняется в процессе пула)
+
+    A, B и C открываются по именам общей памяти без копирования; блок C
+    записывается прямо в общий буфер.
+    """
+    names, (rows, inner, cols), typecode, backend, start, stop = task
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    try:
+        if backend == "numpy":
+            dtype = np.float64 if typecode == "d" else np.int64
+            a = np.ndarray((rows, inner), dtype, buffer=blocks[0].buf)
+            b = np.ndarray((inner, cols), dtype, buffer=blocks[1].buf)
+            c = np.ndarray((rows, cols), dtype, buffer=blocks[2].buf)
+            np.matmul(a[start:stop], b, out=c[start:stop])
+            del a, b, c
+        else:
+            with blocks[0].buf.cast(typecode) as a, blocks[1].buf.cast(typecode) as b:
+                rows_a = [a[i * inner:(i + 1) * inner].tolist() for i in range(start, stop)]
+                rows_b = [b[k * cols:(k + 1) * cols].tolist() for k in range(inner)]
+            product = _multiply_transposed(rows_a, rows_b)
+            with blocks[2].buf.cast(typecode) as c:
+                c[start * cols:stop * cols] = array(typecode, chain.from_iterable(product))
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def parallel_multiplication(A, B, workers=None, backend=None):
+    """Умножение матриц на пуле процессов по блокам строк A
+
+    A, B и результат лежат в multiprocessing.shared_memory: процессы
+    читают их без копирования, и каждый пишет свой блок строк прямо в
+    общий буфер C. Работа делится поровну, поэтому ускорение близко к
+    числу ядер, пока блок строк заметно дороже запуска пула.
+
+    Args:
+        A, B: матрицы списками строк
+        workers: число процессов (по умолчанию - по числу ядер; 1 - без пула)
+        backend: ядро блока - "python" (транспонированная B) или "numpy"
+            (@); по умолчанию - "numpy", если установлен
+
+    Returns:
+        (C, comparisons, time_taken) как у matrix_multiplication. Целые,
+        не помещающиеся в int64, считаются в текущем процессе
+    """
+    start_time = time.time()
+    rows_A, cols_A, cols_B = _check_shapes(A, B)
+    if backend is None:
+        backend = "numpy" if np is not None else "python"
+    if backend not in ("python", "numpy"):
+        raise ValueError(f"Неизвестный backend: {backend}")
+    if backend == "numpy" and np is None:
+        raise ImportError("Для backend='numpy' требуется пакет numpy")
+    workers = min(workers or os.cpu_count() or 1, rows_A)
+    comparisons = rows_A * cols_A * cols_B
+
+    typecode, integral = _shared_typecode(A, B, backend)
+    if workers == 1 or typecode is None:
+        C = _matmul_exact(A, B) if backend == "numpy" else _multiply_transposed(A, B)
+        return C, comparisons, time.time() - start_time
+
+    shapes = ((rows_A, cols_A), (cols_A, cols_B), (rows_A, cols_B))
+    itemsize = array(typecode).itemsize
+    blocks = [shared_memory.SharedMemory(create=True, size=rows * cols * itemsize)
+              for rows, cols in shapes]
+    try:
+        for block, M in zip(blocks, (A, B)):
+            with block.buf.cast(typecode) as view:
+                view[:] = array(typecode, chain.from_iterable(M))
+
+        bounds = [rows_A * w // workers for w in range(workers + 1)]
+        names = tuple(block.name for block in blocks)
+        tasks = [(names, (rows_A, cols_A, cols_B), typecode, backend, start, stop)
+                 for start, stop in zip(bounds, bounds[1:])]
+        with Pool(workers) as pool:
+            pool.map(_multiply_block, tasks)
+
+        with blocks[2].buf.cast(typecode) as view:
+            flat = view.tolist()
+        if integral and typecode == "d":
+            flat = [int(x) for x in flat]
+        C = [flat[i * cols_B:(i + 1) * cols_B] for i in range(rows_A)]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    time_taken = time.time() - start_time
+    return C, comparisons, time_taken
+
+
+# ============================================================================
+# ЦЕПОЧКА УМНОЖЕНИЙ
+# ============================================================================
+
+# Ядра без повторной проверки размеров: цепочка проверяется один раз
+_CHAIN_KERNELS = {
+    "python": lambda X, Y: _product_python(X, Y, PLUS_TIMES),
+    "transposed": _multiply_transposed,
+    "tiled": _multiply_tiled,
+    "strassen": lambda X, Y: strassen_multiplication(X, Y)[0],
+    "parallel": lambda X, Y: parallel_multiplication(X, Y)[0],
+    "numpy": _matmul_exact,
+}
+
+
+def _chain_dims(matrices):
+    """Проверка цепочки, возвращает размеры d: матрица i имеет d[i]×d[i+1]"""
+    if not matrices:
+        raise ValueError("Цепочка матриц пуста")
+    dims = []
+    for index, M in enumerate(matrices, 1):
+        if not M or not M[0]:
+            raise ValueError(f"Матрица A{index} пуста")
+        cols = len(M[0])
+        if any(len(row) != cols for row in M):
+            raise ValueError(f"Строки матрицы A{index} имеют разную длину")
+        if dims and dims[-1] != len(M):
+            raise ValueError(f"Нельзя умножить матрицу A{index - 1} (столбцов: {dims[-1]}) "
+                             f"на A{index} (строк: {len(M)})")
+        if not dims:
+            dims.append(len(M))
+        dims.append(cols)
+    return dims
+
+
+def plan_chain(matrices):
+    """Оптимальная расстановка скобок в цепочке A1·A2·…·An, O(n³)
+
+    Динамическое программирование: cost[i][j] - наименьшее число
+    умножений для Ai…Aj, split[i][j] - где ставить последнее умножение.
+
+    Returns:
+        dict: order (строка со скобками, например "((A1 × A2) × A3)"),
+        cost - умножений по плану, naive_cost - при умножении слева
+        направо, splits - таблица разбиений для multiply_chain
+    """
+    dims = _chain_dims(matrices)
+    n = len(matrices)
+    cost = [[0] * n for _ in range(n)]
+    split = [[0] * n for _ in range(n)]
+    for length in range(2, n + 1):
+        for i in range(n - length + 1):
+            j = i + length - 1
+            cost[i][j] = float('inf')
+            for k in range(i, j):
+                candidate = cost[i][k] + cost[k + 1][j] + dims[i] * dims[k + 1] * dims[j + 1]
+                if candidate < cost[i][j]:
+                    cost[i][j], split[i][j] = candidate, k
+
+    def order(i, j):
+        if i == j:
+            return f"A{i + 1}"
+        return f"({order(i, split[i][j])} × {order(split[i][j] + 1, j)})"
+
+    naive_cost = sum(dims[0] * dims[k] * dims[k + 1] for k in range(1, n))
+    return {
+        'order': order(0, n - 1),
+        'cost': cost[0][n - 1],
+        'naive_cost': naive_cost,
+        'splits': split,
+    }
+
+
+def multiply_chain(matrices, backend=None):
+    """Произведение цепочки матриц в оптимальном порядке
+
+    Размеры проверяются один раз (plan_chain), затем пары умножаются по
+    плану ядром backend без повторных проверок.
+
+    Args:
+        matrices: список матриц A1…An
+        backend: имя из MULTIPLY_BACKENDS; по умолчанию самое быстрое
+            доступное ядро - "numpy", без него "transposed"
+
+    Returns:
+        (C, plan, time_taken); plan - результат plan_chain: порядок,
+        число умножений по плану и при умножении слева направо
+    """
+    start_time = time.time()
+    if backend is None:
+        backend = "numpy" if np is not None else "transposed"
+    if backend not in MULTIPLY_BACKENDS:
+        raise ValueError(f"Неизвестный backend: {backend}")
+    plan = plan_chain(matrices)
+    kernel = _CHAIN_KERNELS[backend]
+    split = plan['splits']
+
+    def product(i, j):
+        if i == j:
+            return [list(row) for row in matrices[i]]
+        k = split[i][j]
+        return kernel(product(i, k), product(k + 1, j))
+
+    C = product(0, len(matrices) - 1)
+    time_taken = time.time() - start_time
+    return C, plan, time_taken
+
+
 def generate_matrix(rows, cols=None):
     """
     Генерация случайной матрицы
@@ -2,9 +2,31 @@
 Все тесты для проекта KursPy
 """
 import unittest
-from graph import floyd_warshall
-from matrix import matrix_multiplication, generate_matrix
+import math
+import os
+import random
+import tempfile
+from multiprocessing import Pool
+import graph
+from graph import (floyd_warshall, floyd_warshall_blocked, floyd_warshall_mmap,
+                   all_pairs_dijkstra, choose_engine, shortest_paths, johnson,
+                   bellman_ford_potentials, DynamicShortestPaths, matrix_hash,
+                   pack_shortest_paths, unpack_shortest_paths, DisjointSet,
+                   connected_components, componentwise_shortest_paths,
+                   transitive_closure, DistanceMatrix, LandmarkOracle,
+                   landmark_report, LazyDistanceMatrix, min_plus_shortest_paths)
+from graph_model import Graph, SpatialGrid
+from generators import (gnm, gnp, grid, random_geometric, barabasi_albert,
+                        _pair_from_index)
+import layout
+from layout import LayoutWorker, circle_layout, fit_to_box, force_layout
+import matrix
+from matrix import (matrix_multiplication, generate_matrix, semiring_product, MIN_PLUS,
+                    MULTIPLY_BACKENDS, strassen_multiplication, tune_strassen_cutoff,
+                    parallel_multiplication, plan_chain, multiply_chain)
 from sort import bubble_sort, selection_sort, compare_sorts, generate_test_data
+from database import Database
+import batch
 
 
 # ============================================================================
@@ -94,6 +116,970 @@ class TestFloydWarshall(unittest.TestCase):
         self.assertIsInstance(time_taken, float)
         self.assertEqual(len(dist), 2)
         self.assertEqual(len(dist[0]), 2)
+    
+    def test_unknown_backend(self):
+        """Тест неизвестного backend"""
+        with self.assertRaises(ValueError):
+            floyd_warshall([[0]], backend="fortran")
+    
+    @unittest.skipIf(graph.np is None, "numpy не установлен")
+    def test_numpy_backend_matches_reference(self):
+        """Тест совпадения NumPy-версии с эталоном"""
+        rng = random.Random(1)
+        n = 12
+        matrix = [[0] * n for _ in range(n)]
+        for _ in range(30):
+            i, j = rng.randrange(n), rng.randrange(n)
+            if i != j:
+                matrix[i][j] = matrix[j][i] = rng.randint(1, 10)
+        
+        expected, expected_comparisons, _ = floyd_warshall(matrix)
+        dist, comparisons, time_taken = floyd_warshall(matrix, backend="numpy")
+        self.assertEqual(dist, expected)
+        self.assertEqual(comparisons, expected_comparisons)
+        self.assertIsInstance(dist, list)
+    
+    def test_blocked_matches_reference(self):
+        """Тест совпадения блочной многопроцессной версии с эталоном"""
+        rng = random.Random(2)
+        n = 11
+        matrix = [[0] * n for _ in range(n)]
+        for _ in range(20):
+            i, j = rng.randrange(n), rng.randrange(n)
+            if i != j:
+                matrix[i][j] = rng.randint(1, 10)
+        
+        expected, expected_comparisons, _ = floyd_warshall(matrix)
+        for block_size, workers in ((3, 1), (3, 2), (4, 3), (64, 2)):
+            dist, comparisons, time_taken = floyd_warshall_blocked(matrix, block_size, workers)
+            self.assertEqual(dist, expected)
+            self.assertEqual(comparisons, expected_comparisons)
+        
+        dist, _, _ = floyd_warshall(matrix, backend="blocked")
+        self.assertEqual(dist, expected)
+
+
+def random_graph_matrix(n, edges, seed, max_weight=10):
+    """Случайная симметричная матрица смежности для тестов"""
+    rng = random.Random(seed)
+    matrix = [[0] * n for _ in range(n)]
+    for _ in range(edges):
+        i, j = rng.randrange(n), rng.randrange(n)
+        if i != j:
+            matrix[i][j] = matrix[j][i] = rng.randint(1, max_weight)
+    return matrix
+
+
+class TestAllPairsDijkstra(unittest.TestCase):
+    """Тесты для разреженного движка и автоматического выбора алгоритма"""
+    
+    def test_matches_floyd_warshall(self):
+        """Тест совпадения Дейкстры из каждой вершины с Флойдом-Уоршеллом"""
+        for seed in range(5):
+            matrix = random_graph_matrix(15, 20, seed)
+            expected, _, _ = floyd_warshall(matrix)
+            dist, comparisons, time_taken = all_pairs_dijkstra(matrix)
+            self.assertEqual(dist, expected)
+            self.assertGreater(comparisons, 0)
+    
+    def test_uniform_weights_bfs(self):
+        """Тест графа с одинаковыми весами (BFS)"""
+        matrix = random_graph_matrix(12, 15, 7, max_weight=1)
+        for i in range(12):
+            for j in range(12):
+                if matrix[i][j]:
+                    matrix[i][j] = 3
+        expected, _, _ = floyd_warshall(matrix)
+        dist, _, _ = all_pairs_dijkstra(matrix)
+        self.assertEqual(dist, expected)
+    
+    def test_negative_weights(self):
+        """Тест отказа Дейкстры на отрицательных весах"""
+        with self.assertRaises(ValueError):
+            all_pairs_dijkstra([[0, -1], [0, 0]])
+    
+    def test_choose_engine(self):
+        """Тест выбора алгоритма по плотности"""
+        sparse = [[0] * 20 for _ in range(20)]
+        for i in range(19):
+            sparse[i][i + 1] = sparse[i + 1][i] = 2
+        dense = [[0 if i == j else 1 for j in range(5)] for i in range(5)]
+        negative = [row[:] for row in sparse]
+        negative[0][1] = -1
+        
+        self.assertEqual(choose_engine(sparse), "dijkstra")
+        self.assertEqual(choose_engine(dense), "floyd_warshall")
+        self.assertEqual(choose_engine(negative), "johnson")
+        negative_dense = [row[:] for row in dense]
+        negative_dense[0][1] = -1
+        self.assertEqual(choose_engine(negative_dense), "floyd_warshall")
+        
+        dist, _, _ = shortest_paths(sparse)
+        self.assertEqual(dist[0][19], 38)
+        self.assertEqual(dist, floyd_warshall(sparse)[0])
+
+
+def potential_graph_matrix(n, edges, seed):
+    """Ориентированный граф с отрицательными весами без отрицательных циклов
+
+    Веса вида base + p[u] - p[v] при base >= 0: вес любого цикла равен
+    сумме base, поэтому отрицательных циклов нет.
+    """
+    rng = random.Random(seed)
+    potential = [rng.randint(0, 20) for _ in range(n)]
+    matrix = [[0] * n for _ in range(n)]
+    for _ in range(edges):
+        i, j = rng.randrange(n), rng.randrange(n)
+        weight = rng.randint(1, 10) + potential[i] - potential[j]
+        if i != j and weight != 0:
+            matrix[i][j] = weight
+    return matrix
+
+
+class TestJohnson(unittest.TestCase):
+    """Тесты для алгоритма Джонсона и обнаружения отрицательных циклов"""
+    
+    def test_matches_floyd_warshall(self):
+        """Тест совпадения с Флойдом-Уоршеллом при отрицательных весах"""
+        for seed in range(5):
+            matrix = potential_graph_matrix(20, 40, seed)
+            self.assertTrue(any(w < 0 for row in matrix for w in row))
+            expected, _, _ = floyd_warshall(matrix)
+            dist, comparisons, time_taken = johnson(matrix)
+            self.assertEqual(dist, expected)
+            self.assertGreater(comparisons, 0)
+    
+    def test_routes(self):
+        """Тест восстановления маршрутов после перевзвешивания"""
+        matrix = potential_graph_matrix(15, 30, 11)
+        paths, _, _ = johnson(matrix, next_hop=True)
+        for u in range(15):
+            for v in range(15):
+                route = paths.path(u, v)
+                if paths[u][v] == float('inf'):
+                    self.assertEqual(route, [])
+                else:
+                    length = sum(matrix[a][b] for a, b in zip(route, route[1:]))
+                    self.assertEqual(length, paths[u][v])
+    
+    def test_negative_cycle(self):
+        """Тест обнаружения цикла отрицательного веса"""
+        cycle = [[0, 1, 0], [0, 0, -3], [1, 0, 0]]
+        with self.assertRaises(ValueError):
+            bellman_ford_potentials(graph.adjacency_list(cycle))
+        with self.assertRaises(ValueError):
+            johnson(cycle)
+        # Неориентированное отрицательное ребро - уже цикл u -> v -> u
+        with self.assertRaises(ValueError):
+            shortest_paths([[0, -1], [-1, 0]])
+    
+    def test_dispatcher_uses_johnson(self):
+        """Тест выбора Джонсона для разреженного графа с отрицательными весами"""
+        matrix = potential_graph_matrix(40, 60, 3)
+        self.assertEqual(choose_engine(matrix), "johnson")
+        dist, _, _ = shortest_paths(matrix)
+        self.assertEqual(dist, floyd_warshall(matrix)[0])
+
+
+class TestDistanceMatrix(unittest.TestCase):
+    """Тесты для целочисленной матрицы расстояний и backend='int64'"""
+
+    def setUp(self):
+        self.numpy = graph.np
+
+    def tearDown(self):
+        graph.np = self.numpy
+
+    def test_matches_reference(self):
+        """Тест совпадения с эталоном с NumPy и без него"""
+        matrices = [random_graph_matrix(15, 25, 2), potential_graph_matrix(15, 30, 5), []]
+        for use_numpy in (True, False):
+            if not use_numpy:
+                graph.np = None
+            for matrix in matrices:
+                expected, expected_comparisons, _ = floyd_warshall(matrix)
+                dist, comparisons, _ = floyd_warshall(matrix, backend="int64")
+                self.assertIsInstance(dist, DistanceMatrix)
+                self.assertEqual(dist, expected)
+                self.assertEqual(comparisons, expected_comparisons)
+
+    def test_routes(self):
+        """Тест восстановления маршрутов"""
+        matrix = potential_graph_matrix(12, 25, 8)
+        paths, _, _ = floyd_warshall(matrix, backend="int64", next_hop=True)
+        for u in range(12):
+            for v in range(12):
+                route = paths.path(u, v)
+                if paths.dist.get(u, v) == float('inf'):
+                    self.assertEqual(route, [])
+                else:
+                    length = sum(matrix[a][b] for a, b in zip(route, route[1:]))
+                    self.assertEqual(length, paths[u][v])
+
+    def test_storage(self):
+        """Тест компактного хранения, доступа и форматирования"""
+        inf = float('inf')
+        dist = DistanceMatrix.from_rows([[0, 5], [inf, 0]])
+        self.assertEqual(dist.nbytes, 4 * 8)
+        self.assertEqual(dist[1], [inf, 0])
+        self.assertEqual(dist[-2], [0, 5])
+        for index in (2, -3):
+            with self.assertRaises(IndexError):
+                dist[index]
+        self.assertEqual(dist.get(0, 1), 5)
+        self.assertEqual(dist.get(1, 0), inf)
+        self.assertEqual(dist.format_rows(), ["   0    5", " inf    0"])
+        with self.assertRaises(ValueError):
+            DistanceMatrix(3, dist.data)
+
+    def test_invalid_weights(self):
+        """Тест отказа для дробных весов и риска переполнения"""
+        with self.assertRaises(ValueError):
+            floyd_warshall([[0, 1.5], [1.5, 0]], backend="int64")
+        with self.assertRaises(OverflowError):
+            floyd_warshall([[0, 2 ** 62], [2 ** 62, 0]], backend="int64")
+        # Диспетчер в таких случаях остаётся на float
+        dist, _, _ = shortest_paths([[0, 1.5], [1.5, 0]], density_threshold=0)
+        self.assertNotIsInstance(dist, DistanceMatrix)
+
+    def test_negative_cycle(self):
+        """Тест отрицательного цикла, уводящего расстояния за пределы int64"""
+        n = 70
+        cycle = [[0] * n for _ in range(n)]
+        for i in range(n):
+            cycle[i][(i + 1) % n] = -10 ** 15
+        for use_numpy in (True, False):
+            if not use_numpy:
+                graph.np = None
+            with self.assertRaises(ValueError):
+                shortest_paths(cycle, density_threshold=0, decompose=False)
+
+    def test_cache_blob(self):
+        """Тест упаковки в blob без преобразования элементов"""
+        matrix = random_graph_matrix(10, 12, 6)
+        paths, _, _ = floyd_warshall(matrix, backend="int64", next_hop=True)
+        blob = pack_shortest_paths(paths)
+        self.assertEqual(blob, pack_shortest_paths(floyd_warshall(matrix, next_hop=True)[0]))
+        restored = unpack_shortest_paths(blob)
+        self.assertIsInstance(restored.dist, DistanceMatrix)
+        self.assertEqual(restored.dist, paths.dist)
+
+
+class TestLandmarkOracle(unittest.TestCase):
+    """Тесты для оракула расстояний по ориентирам"""
+
+    def test_distance_matches_floyd_warshall(self):
+        """Тест точности A* для неориентированного и ориентированного графов"""
+        for matrix in (random_graph_matrix(25, 40, 3), potential_graph_matrix(25, 60, 4)):
+            # Оракулу нужны неотрицательные веса
+            matrix = [[abs(w) for w in row] for row in matrix]
+            expected, _, _ = floyd_warshall(matrix)
+            oracle = LandmarkOracle(matrix, landmarks=4, seed=1)
+            self.assertEqual(len(oracle.landmarks), 4)
+            for u in range(25):
+                for v in range(25):
+                    self.assertEqual(oracle.distance(u, v), expected[u][v])
+                    lower, upper = oracle.bounds(u, v)
+                    self.assertLessEqual(lower, expected[u][v])
+                    self.assertGreaterEqual(upper, expected[u][v])
+
+    def test_disconnected(self):
+        """Тест недостижимых вершин и ориентира в каждой компоненте"""
+        matrix = [[0, 2, 0, 0], [2, 0, 0, 0], [0, 0, 0, 3], [0, 0, 3, 0]]
+        oracle = LandmarkOracle(matrix, landmarks=2, seed=0)
+        self.assertEqual({v // 2 for v in oracle.landmarks}, {0, 1})
+        self.assertEqual(oracle.distance(0, 3), float('inf'))
+        self.assertEqual(oracle.bounds(0, 3)[0], float('inf'))
+        self.assertEqual(oracle.distance(2, 3), 3)
+
+    def test_model_graph(self):
+        """Тест построения по модели графа без плотной матрицы"""
+        edges = grid(6, 6, seed=2)
+        oracle = LandmarkOracle(edges.to_graph(), landmarks=3, seed=2)
+        expected, _, _ = floyd_warshall(edges.to_matrix())
+        self.assertEqual(oracle.distance(0, 35), expected[0][35])
+
+    def test_negative_weights(self):
+        """Тест отказа на отрицательных весах"""
+        with self.assertRaises(ValueError):
+            LandmarkOracle([[0, -1], [-1, 0]])
+
+    def test_report(self):
+        """Тест отчёта о точности и времени"""
+        report = landmark_report(random_graph_matrix(30, 50, 5), landmarks=4, queries=50, seed=5)
+        self.assertEqual(report["mismatches"], 0)
+        self.assertEqual(report["landmarks"], 4)
+        self.assertGreaterEqual(report["mean_error"], 0)
+        self.assertGreater(report["work_ratio"], 0)
+
+class TestLazyDistanceMatrix(unittest.TestCase):
+    """Тесты для ленивой матрицы расстояний"""
+
+    def test_rows_on_demand(self):
+        """Тест вычисления и запоминания строк по запросу"""
+        matrix = random_graph_matrix(20, 30, 9)
+        expected, _, _ = floyd_warshall(matrix)
+        lazy = LazyDistanceMatrix(matrix)
+        self.assertEqual(lazy.computed, 0)
+        self.assertEqual(lazy[5], expected[5])
+        comparisons = lazy.comparisons
+        self.assertIs(lazy[5], lazy[5])
+        self.assertEqual(lazy.comparisons, comparisons)
+        self.assertEqual(lazy.computed, 1)
+        self.assertEqual(lazy.materialize(), expected)
+        self.assertEqual(lazy.computed, 20)
+
+    def test_negative_weights(self):
+        """Тест отрицательных весов через потенциалы Беллмана-Форда"""
+        matrix = potential_graph_matrix(15, 30, 2)
+        expected, _, _ = floyd_warshall(matrix)
+        lazy = LazyDistanceMatrix(matrix)
+        self.assertIsNotNone(lazy.potentials)
+        for source in (0, 7, 14):
+            self.assertEqual(lazy[source], expected[source])
+        with self.assertRaises(ValueError):
+            LazyDistanceMatrix([[0, -1], [-1, 0]])
+
+    def test_model_graph(self):
+        """Тест модели графа и одинаковых весов (BFS)"""
+        edges = grid(5, 5, min_weight=2, max_weight=2)
+        lazy = LazyDistanceMatrix(edges.to_graph())
+        self.assertEqual(lazy.weight, 2)
+        self.assertEqual(lazy[0][24], 16)
+        with self.assertRaises(IndexError):
+            lazy[25]
+
+class TestMinPlusShortestPaths(unittest.TestCase):
+    """Тесты для кратчайших путей возведением в квадрат над (min, +)"""
+
+    def test_matches_floyd_warshall(self):
+        """Тест совпадения с эталоном на обоих backend"""
+        backends = ["python"] + (["numpy"] if graph.np is not None else [])
+        for matrix in (random_graph_matrix(17, 25, 3), potential_graph_matrix(12, 30, 6), [[0]]):
+            expected, _, _ = floyd_warshall(matrix)
+            for backend in backends:
+                dist, comparisons, _ = min_plus_shortest_paths(matrix, backend)
+                self.assertEqual(dist, expected)
+                self.assertGreaterEqual(comparisons, 0)
+
+    def test_value_types(self):
+        """Тест типов: целый граф даёт целые расстояния на любом backend"""
+        backends = [None, "python"] + (["numpy"] if graph.np is not None else [])
+        matrix = [[0, 1, 0, 0], [1, 0, 2, 0], [0, 2, 0, 0], [0, 0, 0, 0]]
+        expected, _, _ = floyd_warshall(matrix)
+        for backend in backends:
+            dist, _, _ = min_plus_shortest_paths(matrix, backend)
+            self.assertEqual([[type(x) for x in row] for row in dist],
+                             [[type(x) for x in row] for row in expected])
+
+    def test_negative_cycle(self):
+        """Тест цикла отрицательного веса через все вершины"""
+        with self.assertRaises(ValueError):
+            min_plus_shortest_paths([[0, 1, 0], [0, 0, 1], [-3, 0, 0]])
+
+
+def matrix_arcs(matrix):
+    """Дуги (u, v, вес) матрицы смежности"""
+    return [(i, j, w) for i, row in enumerate(matrix) for j, w in enumerate(row)
+            if w != 0 and i != j]
+
+
+class TestFloydWarshallMmap(unittest.TestCase):
+    """Тесты для Флойда-Уоршелла во внешней памяти"""
+    
+    def test_matches_reference(self):
+        """Тест совпадения с эталоном для разных типов и размеров блока"""
+        matrix = random_graph_matrix(17, 30, 4)
+        expected, expected_comparisons, _ = floyd_warshall(matrix)
+        for dtype in ("float32", "int32"):
+            for block_rows in (1, 5, 64):
+                dist, comparisons, time_taken = floyd_warshall_mmap(
+                    17, matrix_arcs(matrix), dtype=dtype, block_rows=block_rows)
+                with dist:
+                    self.assertEqual(list(dist), expected)
+                self.assertEqual(comparisons, expected_comparisons)
+    
+    def test_negative_weights_int32(self):
+        """Тест отрицательных весов: бесконечность int32 не становится конечной"""
+        matrix = potential_graph_matrix(15, 25, 6)
+        expected, _, _ = floyd_warshall(matrix)
+        dist, _, _ = floyd_warshall_mmap(15, matrix_arcs(matrix), dtype="int32", block_rows=4)
+        with dist:
+            self.assertEqual(list(dist), expected)
+    
+    def test_edge_list_input_and_file(self):
+        """Тест входа с to_csr() и сохранения матрицы в заданный файл"""
+        edges = gnm(20, 35, seed=8)
+        expected, _, _ = floyd_warshall(edges.to_matrix())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "dist.bin")
+            dist, _, _ = floyd_warshall_mmap(20, edges, path=path, block_rows=6)
+            with dist:
+                self.assertEqual(list(dist), expected)
+            self.assertEqual(os.path.getsize(path), 20 * 20 * 4)
+    
+    def test_temporary_file_removed(self):
+        """Тест удаления временного файла и пустого графа"""
+        dist, _, _ = floyd_warshall_mmap(3, [(0, 1, 2)])
+        path = dist.path
+        self.assertEqual(dist[0], [0, 2, float('inf')])
+        dist.close()
+        self.assertFalse(os.path.exists(path))
+        
+        empty, _, _ = floyd_warshall_mmap(0, [])
+        with empty:
+            self.assertEqual(list(empty), [])
+
+
+class TestConnectedComponents(unittest.TestCase):
+    """Тесты для разбиения на компоненты связности перед расчётом путей"""
+    
+    def disconnected_matrix(self):
+        matrix = [[0] * 12 for _ in range(12)]
+        for offset in (0, 5):
+            part = random_graph_matrix(5, 8, offset)
+            for i in range(5):
+                for j in range(5):
+                    matrix[offset + i][offset + j] = part[i][j]
+        matrix[10][11] = 4  # дуга в одну сторону
+        return matrix
+    
+    def test_disjoint_set(self):
+        """Тест объединения множеств"""
+        sets = DisjointSet(5)
+        self.assertTrue(sets.union(0, 1))
+        self.assertTrue(sets.union(3, 4))
+        self.assertFalse(sets.union(1, 0))
+        self.assertEqual(sets.find(0), sets.find(1))
+        self.assertNotEqual(sets.find(1), sets.find(3))
+    
+    def test_connected_components(self):
+        """Тест поиска компонент, включая слабую связность и одиночные вершины"""
+        components = connected_components([[0, 1, 0, 0], [0, 0, 0, 0],
+                                           [0, 0, 0, 0], [0, 0, 2, 0]])
+        self.assertEqual(sorted(components), [[0, 1], [2, 3]])
+        self.assertEqual(len(connected_components(Graph.from_matrix([[0] * 3] * 3))), 3)
+    
+    def test_matches_floyd_warshall(self):
+        """Тест совпадения сборки по компонентам с полным расчётом"""
+        matrix = self.disconnected_matrix()
+        expected, _, _ = floyd_warshall(matrix)
+        for threshold in (0, 0.1, 1.0):
+            dist, comparisons, time_taken = componentwise_shortest_paths(matrix, threshold)
+            self.assertEqual(dist, expected)
+        self.assertEqual(shortest_paths(matrix)[0], expected)
+    
+    def test_fewer_comparisons(self):
+        """Тест сокращения работы: Σ nᵢ³ вместо n³"""
+        matrix = self.disconnected_matrix()
+        _, full, _ = floyd_warshall(matrix)
+        _, split, _ = componentwise_shortest_paths(matrix, density_threshold=0)
+        self.assertLess(split, full / 3)
+    
+    def test_engines_per_component(self):
+        """Тест списка engines: по одному алгоритму на каждую компоненту"""
+        matrix = self.disconnected_matrix()
+        engines = []
+        shortest_paths(matrix, engines=engines)
+        components = [c for c in connected_components(Graph.from_matrix(matrix)) if len(c) > 1]
+        self.assertEqual(len(engines), len(components))
+        engines = []
+        shortest_paths(matrix, decompose=False, engines=engines)
+        self.assertEqual(engines, [choose_engine(matrix)])
+    
+    def test_routes_use_global_indices(self):
+        """Тест маршрутов: локальные индексы компонент переводятся в общие"""
+        matrix = self.disconnected_matrix()
+        paths, _, _ = componentwise_shortest_paths(matrix, next_hop=True)
+        self.assertEqual(paths.path(10, 11), [10, 11])
+        self.assertEqual(paths.path(11, 10), [])
+        self.assertEqual(paths.path(0, 7), [])
+        for u in range(5, 10):
+            for v in range(5, 10):
+                route = paths.path(u, v)
+                if paths[u][v] != float('inf'):
+                    self.assertEqual(sum(matrix[a][b] for a, b in zip(route, route[1:])),
+                                     paths[u][v])
+    
+    def test_parallel_pool(self):
+        """Тест обработки компонент пулом процессов"""
+        matrix = self.disconnected_matrix()
+        expected, _, _ = floyd_warshall(matrix)
+        original = graph.PARALLEL_MIN_WORK
+        graph.PARALLEL_MIN_WORK = 0
+        try:
+            dist, _, _ = componentwise_shortest_paths(matrix, workers=2)
+        finally:
+            graph.PARALLEL_MIN_WORK = original
+        self.assertEqual(dist, expected)
+    
+    def test_workers_disable_pool(self):
+        """Тест shortest_paths(workers=1): компоненты считаются без пула"""
+        matrix = self.disconnected_matrix()
+        expected, _, _ = floyd_warshall(matrix)
+        original = graph.PARALLEL_MIN_WORK, graph.Pool
+        graph.PARALLEL_MIN_WORK = 0
+        graph.Pool = None  # любая попытка создать пул упадёт
+        try:
+            dist, _, _ = shortest_paths(matrix, workers=1)
+        finally:
+            graph.PARALLEL_MIN_WORK, graph.Pool = original
+        self.assertEqual(dist, expected)
+    
+    def test_inside_pool_worker(self):
+        """Тест вызова из процесса пула: вложенный пул не создаётся"""
+        matrix = self.disconnected_matrix()
+        expected, _, _ = floyd_warshall(matrix)
+        original = graph.PARALLEL_MIN_WORK
+        graph.PARALLEL_MIN_WORK = 0
+        try:
+            with Pool(1) as pool:
+                dist, _, _ = pool.apply(componentwise_shortest_paths, (matrix, 0.1, False, 2))
+        finally:
+            graph.PARALLEL_MIN_WORK = original
+        self.assertEqual(dist, expected)
+
+
+class TestTransitiveClosure(unittest.TestCase):
+    """Тесты для достижимости на битовых строках"""
+    
+    def expected_reachability(self, matrix):
+        dist, _, _ = floyd_warshall(matrix)
+        return [[0 if d == float('inf') else 1 for d in row] for row in dist]
+    
+    def test_matches_floyd_warshall(self):
+        """Тест совпадения с конечностью расстояний Флойда-Уоршелла"""
+        for seed in range(5):
+            rng = random.Random(seed)
+            n = 70  # больше 64 - строка занимает несколько машинных слов
+            matrix = [[0] * n for _ in range(n)]
+            for _ in range(90):
+                i, j = rng.randrange(n), rng.randrange(n)
+                if i != j:
+                    matrix[i][j] = rng.randint(1, 5)
+            reach, comparisons, time_taken = transitive_closure(matrix, backend="python")
+            self.assertEqual(list(reach), self.expected_reachability(matrix))
+            self.assertEqual(comparisons, n * n)
+    
+    @unittest.skipIf(graph.np is None, "numpy не установлен")
+    def test_numpy_backend(self):
+        """Тест совпадения uint64-версии с версией на целых числах"""
+        matrix = potential_graph_matrix(130, 200, 5)
+        python_rows = transitive_closure(matrix, backend="python")[0].rows
+        self.assertEqual(transitive_closure(matrix, backend="numpy")[0].rows, python_rows)
+    
+    def test_queries(self):
+        """Тест запросов достижимости и подсчёта"""
+        reach, _, _ = transitive_closure([[0, 1, 0], [0, 0, 1], [0, 0, 0]])
+        self.assertTrue(reach.reachable(0, 2))
+        self.assertFalse(reach.reachable(2, 0))
+        self.assertEqual([reach.count(u) for u in range(3)], [3, 2, 1])
+        self.assertEqual(reach[2], [0, 0, 1])
+        with self.assertRaises(ValueError):
+            transitive_closure([[0]], backend="fortran")
+    
+    def test_graph_model_input(self):
+        """Тест входа в виде модели графа"""
+        edges = gnm(30, 20, seed=9)
+        expected = self.expected_reachability(edges.to_matrix())
+        self.assertEqual(list(transitive_closure(edges)[0]), expected)
+
+
+class TestShortestPathRoutes(unittest.TestCase):
+    """Тесты для матрицы следующих вершин и восстановления маршрутов"""
+    
+    def assert_valid_routes(self, matrix, paths):
+        n = len(matrix)
+        for u in range(n):
+            for v in range(n):
+                route = paths.path(u, v)
+                if paths[u][v] == float('inf'):
+                    self.assertEqual(route, [])
+                    continue
+                self.assertEqual(route[0], u)
+                self.assertEqual(route[-1], v)
+                length = sum(matrix[a][b] for a, b in zip(route, route[1:]))
+                self.assertEqual(length, paths[u][v])
+    
+    def test_simple_route(self):
+        """Тест маршрута через промежуточную вершину"""
+        graph = [
+            [0, 1, 4],
+            [1, 0, 2],
+            [4, 2, 0]
+        ]
+        paths, comparisons, time_taken = floyd_warshall(graph, next_hop=True)
+        self.assertEqual(paths.path(0, 2), [0, 1, 2])
+        self.assertEqual(paths.path(1, 1), [1])
+        self.assertEqual(paths[0][2], 3)
+        self.assertEqual(len(paths.next_hop), 9)
+    
+    def test_all_engines(self):
+        """Тест корректности маршрутов во всех движках"""
+        matrix = random_graph_matrix(14, 18, 11)
+        engines = [lambda m: floyd_warshall(m, next_hop=True),
+                   lambda m: all_pairs_dijkstra(m, next_hop=True)]
+        if graph.np is not None:
+            engines.append(lambda m: floyd_warshall(m, backend="numpy", next_hop=True))
+        expected, _, _ = floyd_warshall(matrix)
+        for engine in engines:
+            paths, _, _ = engine(matrix)
+            self.assertEqual(list(paths), expected)
+            self.assert_valid_routes(matrix, paths)
+    
+    def test_blocked_without_next_hop(self):
+        """Тест отказа блочного варианта строить маршруты"""
+        with self.assertRaises(ValueError):
+            floyd_warshall([[0, 1], [1, 0]], backend="blocked", next_hop=True)
+
+
+class TestDynamicShortestPaths(unittest.TestCase):
+    """Тесты для инкрементального обновления кратчайших путей"""
+    
+    def assert_matches_reference(self, paths):
+        matrix = paths.to_matrix()
+        expected, _, _ = floyd_warshall(matrix)
+        self.assertEqual(len(paths), len(expected))
+        for u in range(len(matrix)):
+            for v in range(len(matrix)):
+                # Дробные длины сравниваются с точностью до округления
+                self.assertAlmostEqual(paths[u][v], expected[u][v], places=9)
+                route = paths.path(u, v)
+                if expected[u][v] != float('inf'):
+                    length = sum(matrix[a][b] for a, b in zip(route, route[1:]))
+                    self.assertAlmostEqual(length, expected[u][v], places=9)
+    
+    def test_add_edges(self):
+        """Тест добавления рёбер и уменьшения веса"""
+        paths = DynamicShortestPaths([[0] * 4 for _ in range(4)])
+        paths.set_edge(0, 1, 5)
+        paths.set_edge(1, 2, 1)
+        self.assertEqual(paths[0][2], 6)
+        self.assertEqual(paths[2][0], 6)
+        paths.set_edge(0, 2, 2)
+        self.assertEqual(paths[0][1], 3)
+        self.assertEqual(paths.path(0, 1), [0, 2, 1])
+        self.assertEqual(paths[0][3], float('inf'))
+        self.assert_matches_reference(paths)
+    
+    def test_remove_edge_and_vertex(self):
+        """Тест удаления ребра, увеличения веса и удаления вершины"""
+        graph = [
+            [0, 1, 4],
+            [1, 0, 2],
+            [4, 2, 0]
+        ]
+        paths = DynamicShortestPaths(graph)
+        paths.remove_edge(0, 1)
+        self.assertEqual(paths[0][1], 6)
+        paths.set_edge(1, 2, 10)
+        self.assertEqual(paths[0][1], 14)
+        paths.remove_vertex(0)
+        self.assertEqual(len(paths), 2)
+        self.assertEqual(paths[0][1], 10)
+        self.assert_matches_reference(paths)
+    
+    def test_random_edits(self):
+        """Тест случайной последовательности правок (в т.ч. ориентированный
+        граф и дробные веса)"""
+        for directed, fractional in [(False, False), (True, False), (False, True), (True, True)]:
+            rng = random.Random(5)
+            paths = DynamicShortestPaths(random_graph_matrix(8, 10, 3), directed=directed)
+            for _ in range(40):
+                n = len(paths)
+                action = rng.random()
+                if action < 0.1:
+                    paths.add_vertex()
+                elif action < 0.2 and n > 2:
+                    paths.remove_vertex(rng.randrange(n))
+                elif action < 0.4:
+                    u = rng.randrange(n)
+                    if paths.adj[u]:
+                        paths.remove_edge(u, rng.choice(list(paths.adj[u])))
+                else:
+                    u, v = rng.sample(range(n), 2)
+                    weight = round(rng.uniform(0.1, 1), 1) if fractional else rng.randint(1, 9)
+                    paths.set_edge(u, v, weight)
+                self.assert_matches_reference(paths)
+
+    def test_fractional_weight_increase(self):
+        """Тест увеличения дробного веса: 0.2 + 0.7 != 0.9 в float"""
+        paths = DynamicShortestPaths([[0] * 4 for _ in range(4)])
+        paths.set_edge(3, 2, 0.2)
+        paths.set_edge(1, 3, 0.2)
+        paths.set_edge(2, 0, 0.7)
+        paths.set_edge(1, 3, 0.3)
+        self.assertAlmostEqual(paths[0][1], 1.2)
+        self.assert_matches_reference(paths)
+
+    def test_keeps_int64_buffer(self):
+        """Тест: целочисленный результат хранится в DistanceMatrix до первой правки"""
+        paths = DynamicShortestPaths([[0, 1, -1], [0, 0, 2], [0, 0, 0]], directed=True)
+        self.assertIsInstance(paths.dist, DistanceMatrix)
+        restored = unpack_shortest_paths(pack_shortest_paths(paths))
+        self.assertIsInstance(restored.dist, DistanceMatrix)
+        # Увеличение отрицательного веса: пересчёт, затем вставка ребра
+        paths.set_edge(0, 2, 5)
+        self.assertEqual(paths[0], [0, 1, 3])
+        self.assert_matches_reference(paths)
+        paths.add_vertex()
+        self.assertEqual(len(paths[0]), 4)
+        self.assert_matches_reference(paths)
+
+    def test_negative_cycle_rollback(self):
+        """Тест отката правки, создающей цикл отрицательного веса"""
+        paths = DynamicShortestPaths([[0] * 3 for _ in range(3)], directed=True)
+        paths.set_edge(0, 1, 2)
+        paths.set_edge(1, 2, 3)
+        paths.set_edge(2, 0, 4)
+        with self.assertRaises(ValueError):
+            paths.set_edge(2, 0, -6)
+        self.assertEqual(paths.adj[2], {0: 4})
+        self.assert_matches_reference(paths)
+        with self.assertRaises(ValueError):
+            paths.set_edge(1, 0, -3)
+        self.assertNotIn(0, paths.adj[1])
+        paths.set_edge(2, 0, -1)
+        self.assertEqual(paths[1][0], 2)
+        self.assert_matches_reference(paths)
+
+
+class TestGraphModel(unittest.TestCase):
+    """Тесты для модели графа с хешированной смежностью"""
+    
+    def test_add_and_remove(self):
+        """Тест добавления и удаления вершин и рёбер"""
+        g = Graph()
+        a = g.add_vertex(0, 0)
+        b = g.add_vertex(10, 0)
+        c = g.add_vertex(20, 0)
+        self.assertTrue(g.add_edge(a, b, 3))
+        self.assertFalse(g.add_edge(b, a, 5))
+        self.assertFalse(g.add_edge(a, a, 1))
+        self.assertTrue(g.add_edge(b, c, 4))
+        self.assertTrue(g.has_edge(c, b))
+        self.assertEqual(g.weight(b, a), 3)
+        self.assertEqual(g.edge_count, 2)
+        
+        g.remove_vertex(b)
+        self.assertEqual(len(g), 2)
+        self.assertEqual(g.edge_count, 0)
+        self.assertEqual(g.index_of(c), 1)
+        self.assertEqual(g.add_vertex(5, 5), 3)
+    
+    def test_matrix_and_csr(self):
+        """Тест экспорта в матрицу и CSR"""
+        matrix = random_graph_matrix(10, 15, 4)
+        g = Graph.from_matrix(matrix)
+        self.assertEqual(g.to_matrix(), matrix)
+        
+        indptr, indices, weights = g.to_csr()
+        self.assertEqual(len(indptr), 11)
+        for i in range(10):
+            row = {indices[p]: weights[p] for p in range(indptr[i], indptr[i + 1])}
+            self.assertEqual(row, {j: w for j, w in enumerate(matrix[i]) if w})
+    
+    def test_algorithms_accept_model(self):
+        """Тест алгоритмов поверх модели графа"""
+        matrix = random_graph_matrix(12, 10, 6)
+        g = Graph.from_matrix(matrix)
+        expected, _, _ = floyd_warshall(matrix)
+        self.assertEqual(choose_engine(g), choose_engine(matrix))
+        self.assertEqual(shortest_paths(g)[0], expected)
+        self.assertEqual(all_pairs_dijkstra(g)[0], expected)
+        self.assertEqual(list(DynamicShortestPaths(g)), expected)
+
+
+class TestSpatialGrid(unittest.TestCase):
+    """Тесты для сетки поиска вершин по координатам"""
+    
+    def test_matches_linear_search(self):
+        """Тест совпадения с полным перебором"""
+        rng = random.Random(8)
+        grid = SpatialGrid(cell_size=40)
+        points = {}
+        for i in range(300):
+            points[i] = (rng.uniform(-500, 500), rng.uniform(-500, 500))
+            grid.insert(i, *points[i])
+        for i in range(0, 300, 3):
+            grid.remove(i)
+            del points[i]
+        for i in range(1, 300, 3):
+            points[i] = (rng.uniform(-500, 500), rng.uniform(-500, 500))
+            grid.move(i, *points[i])
+        
+        for _ in range(200):
+            x, y = rng.uniform(-520, 520), rng.uniform(-520, 520)
+            for radius in (20, 55):
+                candidates = [((px - x) ** 2 + (py - y) ** 2) ** 0.5 for px, py in points.values()]
+                expected = min((d for d in candidates if d <= radius), default=None)
+                found = grid.nearest(x, y, radius)
+                if expected is None:
+                    self.assertIsNone(found)
+                else:
+                    self.assertAlmostEqual(found[1], expected)
+    
+    def test_graph_vertex_at(self):
+        """Тест поиска вершины графа по клику"""
+        g = Graph(cell_size=40)
+        a = g.add_vertex(100, 100)
+        b = g.add_vertex(150, 100)
+        self.assertEqual(g.vertex_at(105, 98, 20), a)
+        self.assertEqual(g.vertex_at(140, 100, 20), b)
+        self.assertIsNone(g.vertex_at(125, 130, 20))
+        g.move_vertex(a, 300, 300)
+        self.assertIsNone(g.vertex_at(105, 98, 20))
+        self.assertEqual(g.vertex_at(310, 300, 20), a)
+        g.remove_vertex(b)
+        self.assertIsNone(g.vertex_at(150, 100, 20))
+
+
+class TestGenerators(unittest.TestCase):
+    """Тесты генераторов случайных графов"""
+
+    def assert_simple(self, edges):
+        pairs = {(min(u, v), max(u, v)) for u, v, _ in edges.edges()}
+        self.assertEqual(len(pairs), edges.edge_count)
+        for u, v in pairs:
+            self.assertNotEqual(u, v)
+            self.assertTrue(0 <= u < len(edges) and 0 <= v < len(edges))
+
+    def test_pair_from_index(self):
+        """Номер ребра взаимно однозначно переводится в пару вершин"""
+        n = 7
+        expected = [(i, j) for i in range(n) for j in range(i + 1, n)]
+        self.assertEqual([_pair_from_index(k, n) for k in range(len(expected))], expected)
+
+    def test_gnm_exact_edge_count(self):
+        """G(n, m) всегда даёт ровно m рёбер, даже для полного графа"""
+        self.assertEqual(gnm(50, 300, seed=1).edge_count, 300)
+        full = gnm(6, 100, seed=1)
+        self.assertEqual(full.edge_count, 15)
+        self.assert_simple(full)
+
+    def test_seed_reproducible(self):
+        """Одинаковый seed - одинаковый граф"""
+        a, b = gnp(200, 0.05, seed=7), gnp(200, 0.05, seed=7)
+        self.assertEqual(list(a.edges()), list(b.edges()))
+
+    def test_gnp_density(self):
+        """Число рёбер G(n, p) близко к p·n(n-1)/2"""
+        edges = gnp(400, 0.02, seed=3)
+        self.assert_simple(edges)
+        expected = 0.02 * 400 * 399 / 2
+        self.assertLess(abs(edges.edge_count - expected), expected * 0.15)
+        self.assertEqual(gnp(10, 0, seed=1).edge_count, 0)
+        self.assertEqual(gnp(10, 1, seed=1).edge_count, 45)
+
+    def test_grid(self):
+        """Решётка 3×4: 3·3 + 2·4 = 17 рёбер"""
+        edges = grid(3, 4, seed=1)
+        self.assertEqual(len(edges), 12)
+        self.assertEqual(edges.edge_count, 17)
+        self.assert_simple(edges)
+
+    def test_random_geometric_matches_brute_force(self):
+        """Поиск по ячейкам находит те же пары, что и полный перебор"""
+        edges = random_geometric(300, 0.1, seed=5)
+        self.assert_simple(edges)
+        pos = edges.positions
+        expected = {(i, j) for i in range(300) for j in range(i + 1, 300)
+                    if (pos[i][0] - pos[j][0]) ** 2 + (pos[i][1] - pos[j][1]) ** 2 <= 0.01}
+        self.assertEqual({(min(u, v), max(u, v)) for u, v, _ in edges.edges()}, expected)
+
+    def test_barabasi_albert(self):
+        """Граф Барабаши-Альберт: (n - m)·m рёбер, без кратных"""
+        edges = barabasi_albert(200, 3, seed=2)
+        self.assertEqual(edges.edge_count, (200 - 3) * 3)
+        self.assert_simple(edges)
+        with self.assertRaises(ValueError):
+            barabasi_albert(3, 3)
+
+    def test_edge_list_interop(self):
+        """EdgeList совместим с Graph и алгоритмами кратчайших путей"""
+        edges = gnm(30, 60, seed=4)
+        matrix = edges.to_matrix()
+        self.assertEqual(edges.to_graph().to_matrix(), matrix)
+        self.assertEqual(shortest_paths(edges)[0], shortest_paths(matrix)[0])
+
+
+class TestLayout(unittest.TestCase):
+    """Тесты силовой раскладки графа"""
+
+    def test_fit_to_box(self):
+        """Координаты вписываются в область с отступом"""
+        fitted = fit_to_box([(-5, 0), (5, 2), (0, 10)], 200, 100, margin=10)
+        for x, y in fitted:
+            self.assertTrue(10 - 1e-9 <= x <= 190 + 1e-9)
+            self.assertTrue(10 - 1e-9 <= y <= 90 + 1e-9)
+        self.assertEqual(fit_to_box([(3, 3)], 100, 100, 10), [(50, 50)])
+
+    def test_barnes_hut_close_to_exact(self):
+        """Приближение Барнса-Хата близко к точному отталкиванию"""
+        rng = random.Random(1)
+        xs = [rng.uniform(0, 10) for _ in range(300)]
+        ys = [rng.uniform(0, 10) for _ in range(300)]
+        fx, fy = layout._repulsion_barnes_hut(xs, ys, 1.0, theta=0.5)
+        error = total = 0.0
+        for i in range(300):
+            ex = sum((xs[i] - xs[j]) / ((xs[i] - xs[j]) ** 2 + (ys[i] - ys[j]) ** 2)
+                     for j in range(300) if j != i)
+            ey = sum((ys[i] - ys[j]) / ((xs[i] - xs[j]) ** 2 + (ys[i] - ys[j]) ** 2)
+                     for j in range(300) if j != i)
+            error += abs(fx[i] - ex) + abs(fy[i] - ey)
+            total += abs(ex) + abs(ey)
+        self.assertLess(error / total, 0.02)
+
+    def test_coincident_points(self):
+        """Совпадающие вершины не ломают квадродерево"""
+        fx, fy = layout._repulsion_barnes_hut([1.0] * 5 + [2.0], [1.0] * 6, 1.0)
+        self.assertEqual(len(fx), 6)
+        self.assertTrue(all(math.isfinite(f) for f in fx + fy))
+
+    @unittest.skipIf(layout.np is None, "numpy не установлен")
+    def test_barnes_hut_numpy_matches_python(self):
+        """Векторизованный обход квадродерева даёт те же силы, что и Python"""
+        rng = random.Random(2)
+        xs = [rng.uniform(0, 10) for _ in range(500)] + [3.0] * 4
+        ys = [rng.uniform(0, 10) for _ in range(500)] + [7.0] * 4
+        expected = layout._repulsion_barnes_hut(xs, ys, 1.0, theta=0.7)
+        actual = layout._repulsion_barnes_hut_numpy(layout.np.array(xs), layout.np.array(ys),
+                                                   1.0, theta=0.7)
+        for exp, act in zip(expected, actual):
+            for e, a in zip(exp, act.tolist()):
+                self.assertAlmostEqual(e, a, places=6)
+
+    def test_neighbours_end_up_close(self):
+        """После раскладки решётки соседи ближе, чем случайные пары"""
+        edges = grid(6, 6, seed=1)
+        original = layout.EXACT_LIMIT
+        for limit in (original, 0):  # точное отталкивание и Барнс-Хат
+            layout.EXACT_LIMIT = limit
+            try:
+                positions = force_layout(36, edges.edges(), circle_layout(36), iterations=80)
+            finally:
+                layout.EXACT_LIMIT = original
+            edge_length = sum(math.dist(positions[u], positions[v])
+                              for u, v, _ in edges.edges()) / edges.edge_count
+            pair_length = sum(math.dist(positions[u], positions[v])
+                              for u in range(36) for v in range(u + 1, 36)) / (36 * 35 / 2)
+            self.assertLess(edge_length * 2, pair_length)
+
+    def test_worker_streams_frames(self):
+        """Фоновый поток отдаёт кадры в пределах области и завершает их None"""
+        edges = gnm(40, 60, seed=2)
+        worker = LayoutWorker(40, list(edges.edges()), 800, 600, iterations=10)
+        worker.start()
+        worker.join(30)
+        frames = []
+        while True:
+            frame = worker.frames.get_nowait()
+            if frame is None:
+                break
+            frames.append(frame)
+        self.assertEqual(len(frames), 10)
+        for x, y in frames[-1]:
+            self.assertTrue(0 <= x <= 800 and 0 <= y <= 600)
 
 
 # ============================================================================
@@ -176,6 +1162,248 @@ class TestMatrixMultiplication(unittest.TestCase):
         self.assertEqual(len(result[0]), 3)
         self.assertEqual(result[0][0], 10)
 
+    def test_comparisons_formula(self):
+        """Тест аналитического числа умножений rows·inner·cols"""
+        A = [[1] * 4 for _ in range(3)]
+        B = [[1] * 5 for _ in range(4)]
+        for backend in MULTIPLY_BACKENDS:
+            _, comparisons, _ = matrix_multiplication(A, B, backend=backend)
+            self.assertEqual(comparisons, 3 * 4 * 5)
+
+    @unittest.skipIf(matrix.np is None, "NumPy не установлен")
+    def test_numpy_backend_exact(self):
+        """Тест совпадения NumPy с эталоном на всех диапазонах целых"""
+        rng = random.Random(21)
+        for magnitude in (10, 10 ** 6, 10 ** 9, 10 ** 30):
+            A = [[rng.randint(-magnitude, magnitude) for _ in range(6)] for _ in range(4)]
+            B = [[rng.randint(-magnitude, magnitude) for _ in range(5)] for _ in range(6)]
+            expected, _, _ = matrix_multiplication(A, B, backend="python")
+            result, _, _ = matrix_multiplication(A, B, backend="numpy")
+            self.assertEqual(result, expected)
+            self.assertTrue(all(type(x) is int for row in result for x in row))
+
+    def test_python_kernels(self):
+        """Тест ядер transposed и tiled против эталона, включая дробные"""
+        rng = random.Random(23)
+        cases = [(1, 1, 1), (3, 5, 2), (7, 70, 130)]
+        for rows, inner, cols in cases:
+            A = [[rng.randint(-99, 99) for _ in range(inner)] for _ in range(rows)]
+            B = [[rng.randint(-99, 99) for _ in range(cols)] for _ in range(inner)]
+            expected, _, _ = matrix_multiplication(A, B)
+            for backend in ("transposed", "tiled"):
+                result, comparisons, _ = matrix_multiplication(A, B, backend=backend)
+                self.assertEqual(result, expected)
+                self.assertEqual(comparisons, rows * inner * cols)
+        result, _, _ = matrix_multiplication([[0.5, 2]], [[4], [0.25]], backend="tiled")
+        self.assertEqual(result, [[2.5]])
+        with self.assertRaises(ValueError):
+            matrix_multiplication([[1, 2]], [[1, 2]], backend="transposed")
+
+    def test_unknown_backend(self):
+        """Тест неизвестного backend"""
+        with self.assertRaises(ValueError):
+            matrix_multiplication([[1]], [[1]], backend="fortran")
+
+
+class TestSemiringProduct(unittest.TestCase):
+    """Тесты для произведения матриц над полукольцами"""
+
+    def setUp(self):
+        self.backends = ["python"] + (["numpy"] if matrix.np is not None else [])
+
+    def test_plus_times(self):
+        """Тест обычного произведения на обоих backend и разных тайлах"""
+        rng = random.Random(4)
+        A = [[rng.randint(-9, 9) for _ in range(7)] for _ in range(5)]
+        B = [[rng.randint(-9, 9) for _ in range(6)] for _ in range(7)]
+        expected, _, _ = matrix_multiplication(A, B)
+        for backend in self.backends:
+            for block_size in (1, 3, 32):
+                C, comparisons, _ = semiring_product(A, B, backend=backend, block_size=block_size)
+                self.assertEqual(C, expected)
+                self.assertEqual(comparisons, 5 * 7 * 6)
+
+    def test_min_plus(self):
+        """Тест тропического произведения с бесконечностями"""
+        inf = float('inf')
+        A = [[0, 3, inf], [2, 0, inf]]
+        B = [[0, 1], [4, 0], [1, inf]]
+        for backend in self.backends:
+            C, _, _ = semiring_product(A, B, MIN_PLUS, backend)
+            self.assertEqual(C, [[0, 1], [2, 0]])
+            self.assertTrue(all(type(x) is int for row in C for x in row))
+            C, _, _ = semiring_product([[inf]], [[5]], "min_plus", backend)
+            self.assertEqual(C, [[inf]])
+
+    def test_large_integers(self):
+        """Тест точности целых, не представимых в float64"""
+        C, _, _ = semiring_product([[10 ** 20]], [[3]])
+        self.assertEqual(C, [[3 * 10 ** 20]])
+
+    def test_invalid_arguments(self):
+        """Тест неизвестного полукольца, backend и несовместимых размеров"""
+        with self.assertRaises(ValueError):
+            semiring_product([[1]], [[1]], "max_min")
+        with self.assertRaises(ValueError):
+            semiring_product([[1]], [[1]], backend="fortran")
+        with self.assertRaises(ValueError):
+            semiring_product([[1, 2]], [[1, 2]])
+
+
+class TestStrassenMultiplication(unittest.TestCase):
+    """Тесты для умножения Штрассена-Винограда"""
+
+    def setUp(self):
+        self.backends = ["python"] + (["numpy"] if matrix.np is not None else [])
+
+    def test_matches_reference(self):
+        """Тест совпадения с эталоном на непарных и прямоугольных матрицах"""
+        rng = random.Random(22)
+        for rows, inner, cols in [(1, 1, 1), (2, 2, 2), (5, 7, 3), (9, 4, 11), (16, 16, 16)]:
+            A = [[rng.randint(-50, 50) for _ in range(inner)] for _ in range(rows)]
+            B = [[rng.randint(-50, 50) for _ in range(cols)] for _ in range(inner)]
+            expected, _, _ = matrix_multiplication(A, B)
+            for backend in self.backends:
+                for cutoff in (1, 2, 3, 8):
+                    result, _, _ = strassen_multiplication(A, B, cutoff, backend)
+                    self.assertEqual(result, expected)
+
+    def test_operation_count(self):
+        """Тест числа умножений 7**levels·size³"""
+        A = [[1, 2], [3, 4]]
+        B = [[5, 6], [7, 8]]
+        result, comparisons, time_taken = strassen_multiplication(A, B, cutoff=1)
+        self.assertEqual(result, [[19, 22], [43, 50]])
+        self.assertEqual(comparisons, 7)
+        self.assertGreaterEqual(time_taken, 0)
+        # 10 → 5 → 3: блок 3×3, два уровня
+        _, comparisons, _ = strassen_multiplication(generate_matrix(10), generate_matrix(10), cutoff=4)
+        self.assertEqual(comparisons, 7 ** 2 * 3 ** 3)
+
+    def test_large_integers(self):
+        """Тест точности при росте промежуточных сумм"""
+        rng = random.Random(7)
+        for magnitude in (10 ** 6, 10 ** 12, 10 ** 30):
+            A = [[rng.randint(-magnitude, magnitude) for _ in range(6)] for _ in range(6)]
+            B = [[rng.randint(-magnitude, magnitude) for _ in range(6)] for _ in range(6)]
+            expected, _, _ = matrix_multiplication(A, B)
+            for backend in self.backends:
+                result, _, _ = strassen_multiplication(A, B, 1, backend)
+                self.assertEqual(result, expected)
+
+    def test_engine_in_matrix_multiplication(self):
+        """Тест backend "strassen" у matrix_multiplication"""
+        A = generate_matrix(4, 6)
+        B = generate_matrix(6, 5)
+        self.assertEqual(matrix_multiplication(A, B, backend="strassen")[0],
+                         matrix_multiplication(A, B)[0])
+
+    def test_invalid_arguments(self):
+        """Тест неверного порога, backend и несовместимых размеров"""
+        with self.assertRaises(ValueError):
+            strassen_multiplication([[1]], [[1]], cutoff=0)
+        with self.assertRaises(ValueError):
+            strassen_multiplication([[1]], [[1]], backend="fortran")
+        with self.assertRaises(ValueError):
+            strassen_multiplication([[1, 2]], [[1, 2]])
+
+    def test_tune_cutoff(self):
+        """Тест подбора порога без изменения значения по умолчанию"""
+        before = dict(matrix.STRASSEN_CUTOFF)
+        cutoff, timings = tune_strassen_cutoff(32, candidates=(8, 16, 32), backend="python",
+                                               apply=False)
+        # Если без рекурсии быстрее, порог по умолчанию не уменьшается
+        self.assertIn(cutoff, (8, 16, before["python"]))
+        self.assertEqual(sorted(timings), [8, 16, 32])
+        self.assertEqual(matrix.STRASSEN_CUTOFF, before)
+    
+    def test_levels(self):
+        """Тест глубины рекурсии с порогом по умолчанию"""
+        cutoff = matrix.STRASSEN_CUTOFF["python"]
+        self.assertEqual(matrix.strassen_levels(cutoff, "python"), 0)
+        self.assertEqual(matrix.strassen_levels(cutoff + 1, "python"), 1)
+        self.assertEqual(matrix.strassen_levels(4 * cutoff, "python"), 2)
+
+
+class TestParallelMultiplication(unittest.TestCase):
+    """Тесты для параллельного умножения через общую память"""
+
+    def setUp(self):
+        self.backends = ["python"] + (["numpy"] if matrix.np is not None else [])
+
+    def test_matches_reference(self):
+        """Тест совпадения с эталоном при разном числе процессов"""
+        rng = random.Random(24)
+        A = [[rng.randint(-99, 99) for _ in range(9)] for _ in range(7)]
+        B = [[rng.randint(-99, 99) for _ in range(5)] for _ in range(9)]
+        expected, _, _ = matrix_multiplication(A, B)
+        for backend in self.backends:
+            for workers in (1, 2, 3, 10):
+                result, comparisons, _ = parallel_multiplication(A, B, workers, backend)
+                self.assertEqual(result, expected)
+                self.assertEqual(comparisons, 7 * 9 * 5)
+        self.assertEqual(matrix_multiplication(A, B, backend="parallel")[0], expected)
+
+    def test_value_types(self):
+        """Тест дробных и целых вне int64 (считаются без общей памяти)"""
+        for backend in self.backends:
+            result, _, _ = parallel_multiplication([[0.5, 2], [1, 1]], [[4], [0.25]], 2, backend)
+            self.assertEqual(result, [[2.5], [4.25]])
+            result, _, _ = parallel_multiplication([[10 ** 20], [1]], [[3]], 2, backend)
+            self.assertEqual(result, [[3 * 10 ** 20], [3]])
+
+    def test_invalid_arguments(self):
+        """Тест неизвестного backend и несовместимых размеров"""
+        with self.assertRaises(ValueError):
+            parallel_multiplication([[1]], [[1]], backend="fortran")
+        with self.assertRaises(ValueError):
+            parallel_multiplication([[1, 2]], [[1, 2]], workers=2)
+
+
+class TestMultiplyChain(unittest.TestCase):
+    """Тесты для цепочки умножений"""
+
+    def setUp(self):
+        dims = [30, 35, 15, 5, 10, 20, 25]
+        self.matrices = [generate_matrix(dims[i], dims[i + 1]) for i in range(6)]
+
+    def test_plan(self):
+        """Тест оптимального порядка на классическом примере"""
+        plan = plan_chain(self.matrices)
+        self.assertEqual(plan['cost'], 15125)
+        self.assertEqual(plan['naive_cost'], 40500)
+        self.assertEqual(plan['order'], "((A1 × (A2 × A3)) × ((A4 × A5) × A6))")
+
+    def test_product(self):
+        """Тест совпадения с умножением слева направо на всех ядрах"""
+        expected = self.matrices[0]
+        for M in self.matrices[1:]:
+            expected, _, _ = matrix_multiplication(expected, M)
+        for backend in MULTIPLY_BACKENDS:
+            result, plan, time_taken = multiply_chain(self.matrices, backend)
+            self.assertEqual(result, expected)
+            self.assertEqual(plan['cost'], 15125)
+            self.assertGreaterEqual(time_taken, 0)
+
+    def test_single_matrix(self):
+        """Тест цепочки из одной матрицы"""
+        A = [[1, 2], [3, 4]]
+        result, plan, _ = multiply_chain([A])
+        self.assertEqual(result, A)
+        self.assertIsNot(result, A)
+        self.assertEqual((plan['order'], plan['cost']), ("A1", 0))
+
+    def test_invalid_chain(self):
+        """Тест пустой цепочки, несовместимых размеров и backend"""
+        with self.assertRaises(ValueError):
+            multiply_chain([])
+        with self.assertRaises(ValueError):
+            plan_chain([[[1, 2]], [[1, 2]]])
+        with self.assertRaises(ValueError):
+            plan_chain([[[1], [1, 2]]])
+        with self.assertRaises(ValueError):
+            multiply_chain([[[1]]], backend="fortran")
+
 
 class TestGenerateMatrix(unittest.TestCase):
     """Тесты для генерации матриц"""
@@ -391,6 +1619,180 @@ class TestAllSortsConsistency(unittest.TestCase):
                            f"Bubble и Selection дали разные результаты для {arr}")
 
 
+# ============================================================================
+# ТЕСТЫ ДЛЯ БАЗЫ ДАННЫХ (кэш кратчайших путей)
+# ============================================================================
+
+class TestApspCache(unittest.TestCase):
+    """Тесты для хеша графа, упаковки результата и LRU-кэша в SQLite"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmpdir.name, "test.db"))
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_matrix_hash(self):
+        """Хеш зависит только от содержимого матрицы"""
+        matrix = random_graph_matrix(10, 15, 1)
+        same = [tuple(row) for row in matrix]
+        changed = [row[:] for row in matrix]
+        changed[0][1] += 1
+        self.assertEqual(matrix_hash(matrix), matrix_hash(same))
+        self.assertEqual(matrix_hash(matrix), matrix_hash(Graph.from_matrix(matrix)))
+        self.assertNotEqual(matrix_hash(matrix), matrix_hash(changed))
+        self.assertNotEqual(matrix_hash([[0]]), matrix_hash([[0, 0], [0, 0]]))
+    
+    def test_pack_roundtrip(self):
+        """Расстояния, бесконечности и маршруты переживают упаковку"""
+        matrix = random_graph_matrix(12, 10, 2)
+        paths, _, _ = floyd_warshall(matrix, next_hop=True)
+        restored = unpack_shortest_paths(pack_shortest_paths(paths))
+        self.assertEqual(list(restored), list(paths))
+        self.assertIn(float('inf'), [d for row in restored for d in row])
+        for u in range(12):
+            for v in range(12):
+                self.assertEqual(restored.path(u, v), paths.path(u, v))
+        
+        dynamic = DynamicShortestPaths(matrix)
+        self.assertEqual(list(unpack_shortest_paths(pack_shortest_paths(dynamic))), list(paths))
+        
+        fractional, _, _ = floyd_warshall([[0, 0.5], [0.5, 0]], next_hop=True)
+        self.assertEqual(list(unpack_shortest_paths(pack_shortest_paths(fractional))),
+                         [[0, 0.5], [0.5, 0]])
+    
+    def test_dynamic_from_cached_paths(self):
+        """DynamicShortestPaths из кэша не пересчитывает пути и правится дальше"""
+        matrix = random_graph_matrix(10, 14, 3)
+        paths, _, _ = floyd_warshall(matrix, next_hop=True)
+        dynamic = DynamicShortestPaths(matrix, paths=paths)
+        self.assertEqual(dynamic.comparisons, 0)
+        self.assertEqual(list(dynamic), list(paths))
+        
+        dynamic.set_edge(0, 9, 1)
+        matrix[0][9] = matrix[9][0] = 1
+        self.assertEqual(list(dynamic), floyd_warshall(matrix)[0])
+        with self.assertRaises(ValueError):
+            DynamicShortestPaths([[0]], paths=paths)
+    
+    def test_cache_hit_and_miss(self):
+        """Сохранённый результат находится по хешу"""
+        self.assertIsNone(self.db.get_cached_apsp("missing"))
+        self.assertTrue(self.db.save_cached_apsp("a", 3, b"abc"))
+        self.assertEqual(self.db.get_cached_apsp("a"), b"abc")
+        self.assertEqual(self.db.get_apsp_cache_stats(), {'entries': 1, 'size': 3})
+        self.db.clear_apsp_cache()
+        self.assertIsNone(self.db.get_cached_apsp("a"))
+    
+    def test_lru_eviction(self):
+        """При переполнении вытесняются давно не использованные записи"""
+        for key in ("a", "b", "c"):
+            self.db.save_cached_apsp(key, 1, b"x" * 40, max_bytes=100)
+        # "a" вытеснена при добавлении "c"
+        self.assertIsNone(self.db.get_cached_apsp("a"))
+        
+        self.db.get_cached_apsp("b")  # "b" становится свежее "c"
+        self.db.save_cached_apsp("d", 1, b"x" * 40, max_bytes=100)
+        self.assertIsNone(self.db.get_cached_apsp("c"))
+        self.assertIsNotNone(self.db.get_cached_apsp("b"))
+        self.assertIsNotNone(self.db.get_cached_apsp("d"))
+        
+        # Запись больше предела не сохраняется и ничего не вытесняет
+        self.assertFalse(self.db.save_cached_apsp("huge", 1, b"x" * 200, max_bytes=100))
+        self.assertEqual(self.db.get_apsp_cache_stats()['entries'], 2)
+
+
+
+class TestBatch(unittest.TestCase):
+    """Тесты для пакетного расчёта кратчайших путей по графам из БД"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmpdir.name, "test.db"))
+        self.matrices = [random_graph_matrix(8 + i, 10 + i, i) for i in range(5)]
+        self.ids = [self.db.save_graph(f"g{i}", len(m), 0, m) for i, m in enumerate(self.matrices)]
+        self.negative = self.db.save_graph("neg", 2, 1, [[0, -1], [-1, 0]])
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_stream_batches(self):
+        """Графы читаются пачками по возрастанию id"""
+        batches = list(self.db.iter_graph_batches(batch_size=4))
+        self.assertEqual([len(b) for b in batches], [4, 2])
+        self.assertEqual([g['id'] for b in batches for g in b], self.ids + [self.negative])
+    
+    def test_run_batch(self):
+        """Результаты совпадают с floyd_warshall, ошибки сохраняются"""
+        seen = []
+        stats = batch.run_batch(self.db, workers=1, batch_size=2,
+                                on_result=lambda record, row: seen.append(record['id']))
+        self.assertEqual(stats['graphs'], 6)
+        self.assertEqual(stats['errors'], 1)
+        self.assertGreater(stats['graphs_per_sec'], 0)
+        self.assertEqual(sorted(seen), sorted(self.ids + [self.negative]))
+        
+        for graph_id, matrix in zip(self.ids, self.matrices):
+            result = self.db.get_apsp_result(graph_id)
+            self.assertIsNone(result['error'])
+            self.assertEqual(list(unpack_shortest_paths(result['result'])), floyd_warshall(matrix)[0])
+        failed = self.db.get_apsp_result(self.negative)
+        self.assertIsNone(failed['result'])
+        self.assertIn("отрицательного", failed['error'])
+        
+        # Повторный запуск с only_missing ничего не считает
+        self.assertEqual(batch.run_batch(self.db, workers=1, only_missing=True)['graphs'], 0)
+    
+    def test_engine_label(self):
+        """В отчёт попадают алгоритмы, которые действительно запускались"""
+        self.assertEqual(batch.engine_label(["dijkstra", "floyd_warshall", "dijkstra"]),
+                         "dijkstra+floyd_warshall")
+        self.assertEqual(batch.engine_label([]), "-")
+        # Две компоненты: плотный треугольник и разреженная цепочка
+        matrix = [[0] * 28 for _ in range(28)]
+        for i in range(3):
+            for j in range(3):
+                if i != j:
+                    matrix[i][j] = 1
+        for i in range(3, 27):
+            matrix[i][i + 1] = matrix[i + 1][i] = 1
+        _, engine, *_ = batch.analyze_graph({'id': 1, 'matrix': matrix})
+        self.assertEqual(engine, "floyd_warshall+dijkstra")
+    
+    def test_large_disconnected_graph(self):
+        """Граф из двух больших компонент считается в процессе пула без вложенного пула"""
+        n = 220  # Σ nᵢ³ больше PARALLEL_MIN_WORK
+        rng = random.Random(3)
+        matrix = [[0] * (2 * n) for _ in range(2 * n)]
+        for base in (0, n):
+            for i in range(n):
+                u, v = base + i, base + (i + 1) % n
+                matrix[u][v] = matrix[v][u] = rng.randint(1, 9)
+        self.assertGreaterEqual(2 * n ** 3, graph.PARALLEL_MIN_WORK)
+        graph_id = self.db.save_graph("two rings", 2 * n, 0, matrix)
+        
+        original = os.cpu_count
+        os.cpu_count = lambda: 4  # как на многоядерной машине
+        try:
+            stats = batch.run_batch(self.db, workers=2, batch_size=3)
+        finally:
+            os.cpu_count = original
+        self.assertEqual(stats['graphs'], 7)
+        result = self.db.get_apsp_result(graph_id)
+        self.assertIsNone(result['error'])
+        paths = unpack_shortest_paths(result['result'])
+        self.assertEqual(paths[0][n], float('inf'))
+        self.assertEqual(list(paths), shortest_paths(matrix, workers=1)[0])
+    
+    def test_process_pool(self):
+        """Пул процессов даёт те же результаты"""
+        stats = batch.run_batch(self.db, workers=2, batch_size=2)
+        self.assertEqual(stats['graphs'], 6)
+        result = self.db.get_apsp_result(self.ids[3])
+        self.assertEqual(list(unpack_shortest_paths(result['result'])),
+                         floyd_warshall(self.matrices[3])[0])
+
 # ============================================================================
 # ЗАПУСК ВСЕХ ТЕСТОВ
 # ============================================================================